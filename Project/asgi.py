@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+实时推送接口（rider/events/、merchant/events/、customer/events/，见 Project/live.py）只在以 ASGI 方式部署时可用，
+例如 uvicorn Project.asgi:application；每个进程各自读取发件箱并推送给连接到本进程的客户端。
 """
 
 import os
@@ -0,0 +1,197 @@
+"""
+压测/基准工具：在多个线程中并发执行同一操作，统计吞吐量与延迟分位数。
+各 app 的 management command（bench_login 等）共用这里的实现。
+"""
+import contextvars
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+
+from Project.db_utils import execute_fetchall, execute_non_query, quote_table
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed, errors=0):
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        'count': count,
+        'errors': errors,
+        'elapsed_seconds': round(elapsed, 4),
+        'throughput_per_second': round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        'latency_ms': {
+            'mean': round(sum(ordered) / count * 1000, 3) if count else 0.0,
+            'p50': round(percentile(ordered, 50) * 1000, 3),
+            'p95': round(percentile(ordered, 95) * 1000, 3),
+            'p99': round(percentile(ordered, 99) * 1000, 3),
+            'max': round(ordered[-1] * 1000, 3) if count else 0.0,
+        },
+    }
+
+
+def run_concurrently(task, iterations, workers):
+    """
+    用 workers 个线程共执行 iterations 次 task(index)。
+    task 抛出异常计为一次错误；返回 summarize() 的统计结果。
+    """
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies = []
+    errors = [0]
+
+    def worker():
+        try:
+            while True:
+                index = next(counter)
+                if index >= iterations:
+                    return
+                started = time.perf_counter()
+                try:
+                    task(index)
+                except Exception:
+                    with lock:
+                        errors[0] += 1
+                    continue
+                duration = time.perf_counter() - started
+                with lock:
+                    latencies.append(duration)
+        finally:
+            # 每个线程都持有自己的数据库连接，结束时主动关闭
+            connections.close_all()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(worker) for _ in range(workers)]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed, errors[0])
+
+
+# 注入的网络延迟与正在进行的 SQL 计数；由每个连接上的 _observe_query 读取，对所有线程生效
+_injected_latency = {'seconds': 0.0}
+_query_counters = []
+# 只统计当前上下文的计数器；数据库线程池（db_async、run_parallel）执行时带入调用方的上下文，一并计入
+_context_counters = contextvars.ContextVar('context_query_counters', default=())
+_hook_lock = threading.Lock()
+_hook_users = [0]
+
+
+def _observe_query(execute, sql, params, many, context):
+    if _injected_latency['seconds']:
+        time.sleep(_injected_latency['seconds'])
+    for counter in [*_query_counters, *_context_counters.get()]:
+        counter.add(context['connection'].alias, sql, params)
+    return execute(sql, params, many, context)
+
+
+def _install_observer(sender=None, connection=None, **kwargs):
+    if _observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_observe_query)
+
+
+@contextmanager
+def _observing_queries():
+    # 当前线程已打开的连接直接装上；其余线程的连接在新建或从连接池借出时装上
+    for connection in connections.all(initialized_only=True):
+        _install_observer(connection=connection)
+    with _hook_lock:
+        if not _hook_users[0]:
+            connection_created.connect(_install_observer)
+        _hook_users[0] += 1
+    try:
+        yield
+    finally:
+        with _hook_lock:
+            _hook_users[0] -= 1
+            if not _hook_users[0]:
+                connection_created.disconnect(_install_observer)
+
+
+class QueryCounter:
+    def __init__(self, record_sql=False):
+        self.count = 0
+        # record_sql 时按执行顺序记录 (库别名, SQL, 参数)
+        self.queries = [] if record_sql else None
+        self._lock = threading.Lock()
+
+    def add(self, alias, sql, params):
+        with self._lock:
+            self.count += 1
+            if self.queries is not None:
+                self.queries.append((alias, sql, params))
+
+
+@contextmanager
+def count_queries(record_sql=False, scoped=False):
+    """
+    统计块内所有线程、所有库执行的 SQL 条数，产出 QueryCounter；record_sql 时同时记录每条 SQL。
+    与 CaptureQueriesContext 不同，异步视图在数据库线程池中执行的查询也计入。
+    scoped 时只统计当前上下文发起的查询（含它交给数据库线程池的查询），并发压测中其他线程的请求不计入。
+    """
+    counter = QueryCounter(record_sql)
+    with _observing_queries():
+        if scoped:
+            token = _context_counters.set((*_context_counters.get(), counter))
+        else:
+            _query_counters.append(counter)
+        try:
+            yield counter
+        finally:
+            if scoped:
+                _context_counters.reset(token)
+            else:
+                _query_counters.remove(counter)
+
+
+@contextmanager
+def injected_latency(milliseconds):
+    """
+    模拟应用与远程数据库之间的网络往返：块内每条 SQL 执行前等待 milliseconds 毫秒（等待期间释放 GIL，与真实的网络等待一样）。
+    对所有线程、所有库生效；块开始前先关闭当前线程已打开的连接，之后的连接都是新建或从连接池借出的。
+    """
+    connections.close_all()
+    with _observing_queries():
+        _injected_latency['seconds'] = milliseconds / 1000
+        try:
+            yield
+        finally:
+            _injected_latency['seconds'] = 0.0
+
+
+def allow_test_host():
+    """
+    测试客户端默认使用 testserver 作为 Host，压测期间临时放行以便直接调用真实视图。
+    """
+    return override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'])
+
+
+def delete_users_by_prefix(prefix):
+    """删除压测创建的账号（用户名以 prefix 开头）及其资料、角色记录和 session"""
+    rows = execute_fetchall('SELECT id FROM auth_user WHERE username LIKE %s', [f'{prefix}%'])
+    user_ids = [row['id'] for row in rows]
+    if not user_ids:
+        return 0
+    placeholders = ','.join(['%s'] * len(user_ids))
+    profile_filter = f'SELECT id FROM user_profile WHERE user_id IN ({placeholders})'
+    for table_name in ('customer', 'merchant', 'platform', 'rider'):
+        execute_non_query(
+            f'DELETE FROM {quote_table(table_name)} WHERE user_profile_id IN ({profile_filter})',
+            user_ids,
+        )
+    execute_non_query(f'DELETE FROM user_profile WHERE user_id IN ({placeholders})', user_ids)
+    execute_non_query(f'DELETE FROM auth_user WHERE id IN ({placeholders})', user_ids)
+    return len(user_ids)
@@ -0,0 +1,15 @@
+"""
+带连接池的数据库后端：请求结束时连接归还到本进程的池中而不是断开，下一个请求直接复用，
+省掉每个请求到远程 MySQL 的 TCP 握手和认证。
+
+在 DATABASES 中把 ENGINE 设为 Project.db_backends.mysql（或 Project.db_backends.sqlite3），
+池参数放在 OPTIONS['pool'] 中：
+
+- size:       每个工作进程最多持有的连接数（借出 + 空闲），超过时请求排队等待
+- timeout:    池满时等待空闲连接的秒数，超时抛出 PoolExhausted
+- max_age:    连接建立超过该秒数后不再复用，归还时直接关闭并在下次借出时重建
+- ping_after: 空闲超过该秒数的连接借出前先 ping 一次，失败则丢弃重连
+
+CONN_MAX_AGE 应保持为 0：每个请求结束时 Django 调用 close()，连接由此归还到池中。
+请求中发生过数据库错误、或仍处于事务中的连接不会放回池里，而是直接关闭。
+"""
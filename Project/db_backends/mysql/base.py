@@ -0,0 +1,17 @@
+from django.db.backends.mysql import base
+
+from Project.db_backends.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    def ping_connection(self, connection):
+        try:
+            connection.ping()
+            return True
+        except Exception:
+            return False
+
+    def _set_autocommit(self, autocommit):
+        # 池里的连接归还时都处于自动提交状态，状态相同时不再多发一次 SET autocommit
+        if self.connection.get_autocommit() != autocommit:
+            super()._set_autocommit(autocommit)
@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import closing
+from functools import partial
+
+from django.utils.functional import cached_property
+
+DEFAULT_POOL_OPTIONS = {
+    'size': 8,
+    'timeout': 10,
+    'max_age': 600,
+    'ping_after': 5,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class PoolEntry:
+    __slots__ = ('connection', 'created_at', 'returned_at', 'uses')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.returned_at = self.created_at
+        self.uses = 0
+
+
+class ConnectionPool:
+    """
+    一个进程内、一个数据库别名对应一个池。空闲连接后进先出，最近用过的连接最可能仍然有效；
+    借出的连接数由信号量限制，归还（或丢弃）时释放名额。
+    """
+
+    def __init__(self, size, timeout, max_age, ping_after):
+        self.size = size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.ping_after = ping_after
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self.stats = {'created': 0, 'reused': 0, 'pinged': 0, 'expired': 0, 'discarded': 0}
+
+    def acquire(self, connect, ping):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolExhausted(f'数据库连接池已满（{self.size} 个连接），等待 {self.timeout} 秒后仍无空闲连接')
+        try:
+            entry = self._take_idle(ping)
+            if entry is None:
+                entry = PoolEntry(connect())
+                self._count('created')
+            else:
+                self._count('reused')
+            entry.uses += 1
+            return entry
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, entry, reusable):
+        try:
+            if not reusable:
+                self._discard(entry, 'discarded')
+            elif self._expired(entry, time.monotonic()):
+                self._discard(entry, 'expired')
+            else:
+                entry.returned_at = time.monotonic()
+                with self._lock:
+                    self._idle.append(entry)
+        finally:
+            self._slots.release()
+
+    def clear(self):
+        with self._lock:
+            entries, self._idle = list(self._idle), deque()
+        for entry in entries:
+            self._discard(entry, 'expired')
+
+    def idle_count(self):
+        with self._lock:
+            return len(self._idle)
+
+    def _take_idle(self, ping):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                entry = self._idle.pop()
+            now = time.monotonic()
+            if self._expired(entry, now):
+                self._discard(entry, 'expired')
+                continue
+            if now - entry.returned_at >= self.ping_after:
+                self._count('pinged')
+                if not ping(entry.connection):
+                    self._discard(entry, 'discarded')
+                    continue
+            return entry
+
+    def _expired(self, entry, now):
+        return self.max_age is not None and now - entry.created_at >= self.max_age
+
+    def _discard(self, entry, reason):
+        self._count(reason)
+        try:
+            entry.connection.close()
+        except Exception:
+            pass
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+
+def get_pool(alias, options):
+    # 以进程号区分：fork 出来的工作进程不能沿用父进程打开的连接
+    key = (os.getpid(), alias)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(**{**DEFAULT_POOL_OPTIONS, **options})
+        return pool
+
+
+def close_pools():
+    """关闭本进程所有池中的空闲连接（借出中的连接归还时照常处理）"""
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [pool for (owner, _), pool in _pools.items() if owner == pid]
+    for pool in pools:
+        pool.clear()
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    放在 Django 后端的 DatabaseWrapper 前面：get_new_connection 改为从池中借出，
+    _close 改为归还。Django 的事务、错误标记等状态仍由父类维护，这里只根据它们判断能否复用。
+    """
+
+    _pool_entry = None
+
+    @cached_property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict['OPTIONS'].get('pool', {}))
+
+    def get_connection_params(self):
+        # pool 不是数据库驱动的连接参数
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connect = partial(super().get_new_connection, conn_params)
+        self._pool_entry = self.pool.acquire(connect, self.ping_connection)
+        return self._pool_entry.connection
+
+    def init_connection_state(self):
+        # 复用的连接第一次借出时已经设置过会话状态
+        if self._pool_entry is not None and self._pool_entry.uses > 1:
+            return
+        super().init_connection_state()
+
+    def ping_connection(self, connection):
+        try:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except Exception:
+            return False
+
+    def _close(self):
+        entry, self._pool_entry = self._pool_entry, None
+        if entry is None:
+            return super()._close()
+        reusable = not (self.errors_occurred or self.in_atomic_block or self.needs_rollback) and self.autocommit
+        self.pool.release(entry, reusable)
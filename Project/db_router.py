@@ -0,0 +1,77 @@
+"""
+读写分离：配置了 replica 别名时，请求中的只读查询（db_utils 的读取函数与 ORM 读取）发往从库，
+写入始终发往主库 default。
+
+从库存在复制延迟，为保证用户能读到自己刚写入的数据：
+- 同一请求内一旦发生写入，之后的读取都改走主库；在事务中的读取也走主库；
+- 发生过写入的请求会在响应中设置 Cookie，此后 REPLICA_PIN_SECONDS 秒内该用户的读取都固定走主库。
+
+只有经过 ReplicaRoutingMiddleware 的请求才会读从库，management command 等其余代码默认读主库。
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = 'replica'
+SHARD_ALIAS_PREFIX = 'shard'
+
+_read_alias = ContextVar('read_alias', default=DEFAULT_DB_ALIAS)
+_wrote = ContextVar('wrote', default=False)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def read_alias():
+    """当前上下文中只读查询应使用的数据库别名"""
+    alias = _read_alias.get()
+    if alias == DEFAULT_DB_ALIAS:
+        return alias
+    if _wrote.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    return alias
+
+
+def mark_write():
+    if not _wrote.get():
+        _wrote.set(True)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    在 with 块内把只读查询发往从库（enabled 为 False 或未配置从库时仍读主库）。
+    产出一个 dict，块结束后其中的 wrote 表示块内是否发生过写入。
+    """
+    alias = REPLICA_DB_ALIAS if enabled and replica_configured() else DEFAULT_DB_ALIAS
+    alias_token = _read_alias.set(alias)
+    wrote_token = _wrote.set(False)
+    state = {'wrote': False}
+    try:
+        yield state
+    finally:
+        state['wrote'] = _wrote.get()
+        _wrote.reset(wrote_token)
+        _read_alias.reset(alias_token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        mark_write()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 主从是同一份数据
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == DEFAULT_DB_ALIAS:
+            return True
+        # 订单分片上只建订单表；从库的表结构随复制同步，不单独迁移
+        return db.startswith(SHARD_ALIAS_PREFIX) and app_label == 'order'
@@ -1,4 +1,17 @@
-from django.db import connection
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta, timezone as dt_timezone
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.utils import timezone
+
+from Project.db_router import mark_write, read_alias
 
 
 def dictfetchall(cursor):
@@ -14,30 +27,259 @@ def dictfetchone(cursor):
     return dict(zip(columns, row))
 
 
-def execute_fetchall(query, params=None):
-    with connection.cursor() as cursor:
+# 读取函数的 using 为 None 时由 db_router.read_alias() 决定读主库还是从库；
+# 写入函数的 using 为 None 时写主库，并让同一请求之后的读取都改走主库。
+
+
+def execute_fetchall(query, params=None, using=None):
+    with connections[using or read_alias()].cursor() as cursor:
         cursor.execute(query, params or [])
         return dictfetchall(cursor)
 
 
-def execute_fetchone(query, params=None):
-    with connection.cursor() as cursor:
+def execute_fetchone(query, params=None, using=None):
+    with connections[using or read_alias()].cursor() as cursor:
         cursor.execute(query, params or [])
         return dictfetchone(cursor)
 
 
-def execute_write(query, params=None):
-    with connection.cursor() as cursor:
+MAX_IN_LIST_SIZE = 500
+
+
+def execute_fetchall_in(query, values, params=None, using=None):
+    """
+    query 中的 {placeholders} 替换为 IN 列表；values 按 MAX_IN_LIST_SIZE 切分成多次查询，
+    避开数据库的参数个数上限（SQLite 为 999）。params 为 IN 列表之前的其他参数。
+    """
+    values = list(values)
+    rows = []
+    for start in range(0, len(values), MAX_IN_LIST_SIZE):
+        chunk = values[start:start + MAX_IN_LIST_SIZE]
+        placeholders = ','.join(['%s'] * len(chunk))
+        rows.extend(execute_fetchall(query.format(placeholders=placeholders), list(params or []) + chunk, using))
+    return rows
+
+
+def attach_names(rows, id_key, table_name, column, name_key, using=None):
+    """
+    按 rows 中的 id_key 批量查询 table_name 的 column，写入每行的 name_key（找不到时为 None）。
+    用于订单表与目录表不在同一个库、不能 JOIN 的查询。
+    """
+    ids = sorted({row[id_key] for row in rows if row[id_key] is not None})
+    names = {}
+    if ids:
+        query = f'SELECT id, {column} FROM {quote_table(table_name)} WHERE id IN ({{placeholders}})'
+        names = {record['id']: record[column] for record in execute_fetchall_in(query, ids, using=using)}
+    for row in rows:
+        row[name_key] = names.get(row[id_key])
+    return rows
+
+
+def execute_write(query, params=None, using=None):
+    mark_write()
+    with connections[using or DEFAULT_DB_ALIAS].cursor() as cursor:
         cursor.execute(query, params or [])
         return cursor.lastrowid
 
 
-def execute_non_query(query, params=None):
-    with connection.cursor() as cursor:
+def execute_non_query(query, params=None, using=None):
+    mark_write()
+    with connections[using or DEFAULT_DB_ALIAS].cursor() as cursor:
         cursor.execute(query, params or [])
         return cursor.rowcount
 
 
+def _insert_statement(table_name, columns, row_count, ignore=False):
+    table = quote_table(table_name)
+    column_list = ', '.join(quote_table(column) for column in columns)
+    row_placeholder = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    values = ', '.join([row_placeholder] * row_count)
+    vendor = connection.vendor
+    if not ignore:
+        return f'INSERT INTO {table} ({column_list}) VALUES {values}'
+    if vendor == 'mysql':
+        return f'INSERT IGNORE INTO {table} ({column_list}) VALUES {values}'
+    if vendor == 'sqlite':
+        return f'INSERT OR IGNORE INTO {table} ({column_list}) VALUES {values}'
+    return f'INSERT INTO {table} ({column_list}) VALUES {values} ON CONFLICT DO NOTHING'
+
+
+def execute_insert_ignore(table_name, columns, values, using=None):
+    """
+    插入一行，遇到唯一键冲突时静默忽略。返回新行 id；被忽略时返回 None。
+    """
+    mark_write()
+    with connections[using or DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(_insert_statement(table_name, columns, 1, ignore=True), list(values))
+        # 被忽略时 SQLite 不会重置 lastrowid，只能依据 rowcount 判断
+        if cursor.rowcount == 0:
+            return None
+        return cursor.lastrowid
+
+
+MAX_ROWS_PER_INSERT = 1000
+
+
+def execute_insert_many(table_name, columns, rows, ignore=False, using=None):
+    """
+    多行 INSERT：按数据库的参数个数上限切分成若干条语句执行，返回写入的行数。
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    mark_write()
+    db = connections[using or DEFAULT_DB_ALIAS]
+    max_params = db.features.max_query_params or len(columns) * MAX_ROWS_PER_INSERT
+    chunk_size = max(1, min(MAX_ROWS_PER_INSERT, max_params // len(columns)))
+    inserted = 0
+    with db.cursor() as cursor:
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            params = [value for row in chunk for value in row]
+            cursor.execute(_insert_statement(table_name, columns, len(chunk), ignore=ignore), params)
+            inserted += cursor.rowcount
+    return inserted
+
+
+def execute_update_many(table_name, key_column, columns, rows, using=None):
+    """
+    按主键逐行 UPDATE 多行：rows 中每行为 (键值, 列1的值, 列2的值, ...)，返回更新的行数。
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    mark_write()
+    assignments = ', '.join(f'{column} = %s' for column in columns)
+    query = f'UPDATE {quote_table(table_name)} SET {assignments} WHERE {key_column} = %s'
+    with connections[using or DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.executemany(query, [[*row[1:], row[0]] for row in rows])
+        return cursor.rowcount
+
+
+def execute_upsert_add(table_name, key_columns, key_values, deltas, using=None):
+    """
+    按唯一键累加计数列：deltas 为 {列: 增量}。行不存在时以增量为初值插入，已存在时把增量加到原值上，
+    一条语句完成，并发执行也不会丢失更新。
+    """
+    mark_write()
+    db = connections[using or DEFAULT_DB_ALIAS]
+    table = quote_table(table_name)
+    columns = [*key_columns, *deltas]
+    column_list = ', '.join(quote_table(column) for column in columns)
+    placeholders = ', '.join(['%s'] * len(columns))
+    if db.vendor == 'mysql':
+        assignments = ', '.join(f'{quote_table(column)} = {quote_table(column)} + VALUES({quote_table(column)})'
+                                for column in deltas)
+        conflict = f'ON DUPLICATE KEY UPDATE {assignments}'
+    else:
+        assignments = ', '.join(f'{quote_table(column)} = {table}.{quote_table(column)} + excluded.{quote_table(column)}'
+                                for column in deltas)
+        conflict = f'ON CONFLICT ({", ".join(quote_table(column) for column in key_columns)}) DO UPDATE SET {assignments}'
+    with db.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {table} ({column_list}) VALUES ({placeholders}) {conflict}',
+                       [*key_values, *deltas.values()])
+        return cursor.rowcount
+
+
+# ---- 变更事件发件箱（outbox_event）----
+# 订单状态变化、餐品与折扣的修改在同一事务中写入所在库的 outbox_event，事件与变更一同提交或回滚；
+# 缓存、汇总等消费方按游标读取新增的事件，不必反复查询整张表。
+
+OUTBOX_TABLE = 'outbox_event'
+OUTBOX_COLUMNS = ['topic', 'event_type', 'entity_id', 'payload', 'created_at']
+
+
+def append_outbox_events(events, using=None):
+    """
+    写入变更事件，须在产生这些变更的同一事务内调用。
+    events 为 [(topic, event_type, entity_id, payload), ...]，payload 为可 JSON 序列化的 dict。
+    """
+    now = timezone.now()
+    return execute_insert_many(OUTBOX_TABLE, OUTBOX_COLUMNS, [
+        (topic, event_type, entity_id, json.dumps(payload or {}, cls=DjangoJSONEncoder, ensure_ascii=False), now)
+        for topic, event_type, entity_id, payload in events
+    ], using=using)
+
+
+def append_outbox_event(topic, event_type, entity_id, payload=None, using=None):
+    return append_outbox_events([(topic, event_type, entity_id, payload)], using=using)
+
+
+def fetch_outbox_events(after_id=0, topics=None, limit=None, using=None):
+    """
+    按 id 升序读取一个库中 id 大于 after_id 的事件，返回 (事件列表, 新的 after_id)。
+
+    自增 ID 按分配顺序而非提交顺序可见：遇到 ID 空缺时，只有空缺之后的事件写入已超过
+    OUTBOX_GAP_SECONDS 秒（空缺来自回滚的事务）才越过，否则停在空缺之前等下次再读，
+    不会跳过尚未提交的事件。topics 过滤在空缺判断之后进行，游标也会越过不关心的事件。
+    """
+    limit = limit or settings.OUTBOX_READ_LIMIT
+    rows = execute_fetchall(
+        f'SELECT id, topic, event_type, entity_id, payload, created_at FROM {quote_table(OUTBOX_TABLE)} '
+        f'WHERE id > %s ORDER BY id LIMIT %s',
+        [after_id, limit],
+        using,
+    )
+    settled_before = timezone.now() - timedelta(seconds=settings.OUTBOX_GAP_SECONDS)
+    events = []
+    for row in rows:
+        # 原生查询返回的时间不带时区（库中存的是 UTC）
+        created_at = row['created_at']
+        if timezone.is_naive(created_at):
+            created_at = created_at.replace(tzinfo=dt_timezone.utc)
+        if row['id'] != after_id + 1 and created_at > settled_before:
+            break
+        after_id = row['id']
+        if topics is None or row['topic'] in topics:
+            row['payload'] = json.loads(row['payload'])
+            events.append(row)
+    return events, after_id
+
+
+def parse_outbox_cursor(cursor):
+    """'default:120,shard1:33' → {'default': 120, 'shard1': 33}；空值或格式错误的部分视为从头读"""
+    positions = {}
+    for part in (cursor or '').split(','):
+        alias, _, last_id = part.partition(':')
+        if alias.strip() and last_id.strip().isdigit():
+            positions[alias.strip()] = int(last_id)
+    return positions
+
+
+def format_outbox_cursor(positions):
+    return ','.join(f'{alias}:{last_id}' for alias, last_id in sorted(positions.items()))
+
+
+def read_outbox(cursor, databases, topics=None, limit=None):
+    """
+    从多个库的发件箱读取游标之后的事件，返回 (事件列表, 新游标)。
+    各库的事件按 id 有序，库与库之间不保证顺序；事件的 database 字段为来源库。
+    """
+    positions = parse_outbox_cursor(cursor)
+    events = []
+    for alias in databases:
+        name = alias or DEFAULT_DB_ALIAS
+        rows, positions[name] = fetch_outbox_events(positions.get(name, 0), topics, limit, using=alias)
+        for row in rows:
+            row['database'] = name
+        events.extend(rows)
+    return events, format_outbox_cursor(positions)
+
+
+def outbox_head(databases):
+    """指向各库当前最后一个事件的游标：从它开始读只会得到之后写入的事件"""
+    positions = {}
+    for alias in databases:
+        row = execute_fetchone(f'SELECT MAX(id) AS last_id FROM {quote_table(OUTBOX_TABLE)}', using=alias)
+        positions[alias or DEFAULT_DB_ALIAS] = row['last_id'] or 0
+    return format_outbox_cursor(positions)
+
+
+def from_dual():
+    """没有 FROM 子句的 SELECT ... WHERE 在 MySQL 中需要写成 FROM DUAL"""
+    return ' FROM DUAL' if connection.vendor == 'mysql' else ''
+
+
 def quote_table(name):
     return connection.ops.quote_name(name)
 
@@ -72,3 +314,175 @@ def get_platform_by_user(user_id):
 
 def get_rider_by_user(user_id):
     return get_entity_by_user('rider', user_id)
+
+
+def get_entity_by_id(table_name, entity_id):
+    if table_name not in ALLOWED_USER_ENTITY_TABLES:
+        raise ValueError(f'Unsupported entity table: {table_name}')
+    table = quote_table(table_name)
+    return execute_fetchone(f'SELECT t.* FROM {table} t WHERE t.id = %s', [entity_id])
+
+
+# 登录时写入 session 的身份信息：{'user_id', 'user_type', 'entity_id'}
+SESSION_IDENTITY_KEY = 'login_identity'
+
+AUTH_USER_COLUMNS = (
+    'id',
+    'password',
+    'last_login',
+    'is_superuser',
+    'username',
+    'first_name',
+    'last_name',
+    'email',
+    'is_staff',
+    'is_active',
+    'date_joined',
+)
+
+
+def get_login_identity(username):
+    """
+    一次查询取出登录所需的全部信息：auth_user 字段、用户类型以及对应角色表的主键。
+    """
+    user_columns = ', '.join(f'u.{column}' for column in AUTH_USER_COLUMNS)
+    platform_table = quote_table('platform')
+    query = f'''
+        SELECT {user_columns},
+               up.id AS profile_id,
+               up.user_type,
+               COALESCE(c.id, m.id, p.id, r.id) AS entity_id
+        FROM auth_user u
+        LEFT JOIN user_profile up ON up.user_id = u.id
+        LEFT JOIN customer c ON up.user_type = 'customer' AND c.user_profile_id = up.id
+        LEFT JOIN merchant m ON up.user_type = 'merchant' AND m.user_profile_id = up.id
+        LEFT JOIN {platform_table} p ON up.user_type = 'platform' AND p.user_profile_id = up.id
+        LEFT JOIN rider r ON up.user_type = 'rider' AND r.user_profile_id = up.id
+        WHERE u.username = %s
+    '''
+    return execute_fetchone(query, [username])
+
+
+# 登录不经过 authenticate()，用户固定记为由 ModelBackend 认证（见 settings.AUTHENTICATION_BACKENDS）
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+def build_user(record):
+    """
+    用原生 SQL 查到的 auth_user 行构造 User 实例，避免再走一次 ORM 查询。
+    """
+    user = get_user_model()(**{column: record[column] for column in AUTH_USER_COLUMNS})
+    user._state.adding = False  # type: ignore[attr-defined]
+    user._state.db = 'default'  # type: ignore[attr-defined]
+    user.backend = MODEL_BACKEND
+    return user
+
+
+def remember_login_identity(request, identity):
+    request.session[SESSION_IDENTITY_KEY] = {
+        'user_id': identity['id'],
+        'user_type': identity['user_type'],
+        'entity_id': identity['entity_id'],
+    }
+
+
+def get_request_entity(request, table_name):
+    """
+    优先使用登录时缓存在 session 中的角色主键，按主键直接取角色记录；
+    session 中没有或与当前用户不符时退回 get_entity_by_user。
+    """
+    return _get_session_entity(getattr(request, 'session', None), request.user.id, table_name)
+
+
+def _get_session_entity(session, user_id, table_name):
+    identity = session.get(SESSION_IDENTITY_KEY) if session is not None else None
+    if (
+        identity
+        and identity.get('user_id') == user_id
+        and identity.get('user_type') == table_name
+        and identity.get('entity_id')
+    ):
+        entity = get_entity_by_id(table_name, identity['entity_id'])
+        if entity:
+            return entity
+    return get_entity_by_user(table_name, user_id)
+
+
+# 协程版本（a 开头）：Django 的数据库层是同步的，这些函数在 DB_ASYNC_THREADS 个线程的线程池中执行同步版本，
+# 事件循环在等待数据库时继续处理其他请求，同一请求中互不依赖的查询可以用 asyncio.gather 并发执行。
+# 上下文中的读写分离设置随调用带入线程，写入标记随返回带回（见 asgiref 的 sync_to_async）。
+_db_executor = ThreadPoolExecutor(max_workers=settings.DB_ASYNC_THREADS, thread_name_prefix='db-async')
+
+
+def _releasing_connections(func):
+    @wraps(func)
+    def inner(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            # 线程池的线程不经过请求结束的信号，用完立即把连接归还到连接池，否则会一直占着池的名额
+            connections.close_all()
+    return inner
+
+
+def db_async(func):
+    """把同步的数据库函数包装为在线程池中执行的协程函数"""
+    return sync_to_async(_releasing_connections(func), thread_sensitive=False, executor=_db_executor)
+
+
+async def run_in_db_thread(func, *args, **kwargs):
+    return await db_async(func)(*args, **kwargs)
+
+
+aexecute_fetchall = db_async(execute_fetchall)
+aexecute_fetchone = db_async(execute_fetchone)
+aexecute_fetchall_in = db_async(execute_fetchall_in)
+aattach_names = db_async(attach_names)
+aexecute_write = db_async(execute_write)
+aexecute_non_query = db_async(execute_non_query)
+
+
+def _close_idle_connections():
+    for conn in connections.all(initialized_only=True):
+        if not conn.in_atomic_block:
+            conn.close()
+
+
+async def release_request_connections():
+    """
+    异步视图完成认证后调用：认证与 session 的查询在请求自己的线程中进行，借出的连接默认到请求结束才归还，
+    之后的查询在数据库线程池中进行，不归还则一个请求同时占着两个连接（推送连接更会一直占着）。
+    """
+    await sync_to_async(_close_idle_connections)()
+
+
+def _all_pooled():
+    return all('pool' in connections.settings[alias].get('OPTIONS', {}) for alias in connections)
+
+
+def run_parallel(*calls):
+    """
+    同步视图中并发执行互不依赖的只读查询：calls 为 (函数, 参数...)，在数据库线程池中各用一个连接池的连接执行，
+    按顺序返回各自的结果，耗时约为最慢的一个而不是各查询之和。读写分离设置随调用带入线程，异常原样抛出。
+    以下情况在当前线程依次执行：DB_PARALLEL_QUERIES 关闭；有库未使用连接池（每个并发查询都要新建连接，
+    请求线程的连接也会被关闭）；调用方处于事务中（其他连接看不到事务中未提交的写入）。
+    不要在数据库线程池的线程中调用。
+    """
+    if not settings.DB_PARALLEL_QUERIES or not _all_pooled() or any(
+        conn.in_atomic_block for conn in connections.all(initialized_only=True)
+    ):
+        return [func(*args) for func, *args in calls]
+    # 等待期间不占着连接：请求线程持有连接再等待线程池借连接，连接池满时会相互等待
+    _close_idle_connections()
+    futures = [
+        _db_executor.submit(contextvars.copy_context().run, _releasing_connections(func), *args)
+        for func, *args in calls
+    ]
+    return [future.result() for future in futures]
+
+
+async def aget_request_entity(request, table_name):
+    """get_request_entity 的协程版本：登录用户取自 request.auser()，不在线程中再加载一次"""
+    user = await request.auser()
+    await release_request_connections()
+    return await run_in_db_thread(_get_session_entity, getattr(request, 'session', None), user.id, table_name)
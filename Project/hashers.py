@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    与 Django 默认 PBKDF2 相同的算法标识（pbkdf2_sha256），迭代次数改由
+    settings.PASSWORD_HASH_ITERATIONS 决定。迭代次数变化后 must_update 返回 True，
+    用户下次登录时会自动按新参数重新哈希。
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
@@ -0,0 +1,114 @@
+"""
+密码哈希卸载：把 PBKDF2 等耗 CPU 的哈希计算放到有界进程池中执行。
+
+- PASSWORD_HASH_POOL_SIZE 为进程数，0 表示在请求线程内直接计算（与原先行为一致）；
+- 同时在途的哈希任务不超过 PASSWORD_HASH_POOL_SIZE * PASSWORD_HASH_QUEUE_FACTOR，
+  排队超过 PASSWORD_HASH_QUEUE_TIMEOUT 秒抛出 HashingBusy，由视图提示稍后重试。
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+class HashingBusy(Exception):
+    pass
+
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+
+    django.setup()
+
+
+def _verify(password, encoded):
+    return hashers.verify_password(password, encoded)
+
+
+def _make(password):
+    return hashers.make_password(password)
+
+
+def pool_size():
+    return max(0, int(getattr(settings, 'PASSWORD_HASH_POOL_SIZE', 0) or 0))
+
+
+def _get_executor():
+    global _executor, _slots
+    size = pool_size()
+    if size == 0:
+        return None, None
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=size,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'Project.settings'),),
+            )
+            factor = max(1, int(getattr(settings, 'PASSWORD_HASH_QUEUE_FACTOR', 4)))
+            _slots = threading.BoundedSemaphore(size * factor)
+        return _executor, _slots
+
+
+def _run(func, *args):
+    executor, slots = _get_executor()
+    if executor is None:
+        return func(*args)
+    timeout = getattr(settings, 'PASSWORD_HASH_QUEUE_TIMEOUT', 10)
+    if not slots.acquire(timeout=timeout):
+        raise HashingBusy('password hashing queue is full')
+    try:
+        # 等待结果时请求线程阻塞在锁上，不占用 GIL
+        return executor.submit(func, *args).result()
+    finally:
+        slots.release()
+
+
+def verify_password(password, encoded):
+    """返回 (is_correct, must_update)，语义同 django.contrib.auth.hashers.verify_password"""
+    if password is None or not encoded:
+        return False, False
+    return _run(_verify, password, encoded)
+
+
+def make_password(password):
+    if password is None:
+        return hashers.make_password(None)
+    return _run(_make, password)
+
+
+def make_passwords(passwords):
+    """批量哈希（批量导入等离线场景），进程池开启时分发到所有进程并行计算"""
+    passwords = list(passwords)
+    executor, _ = _get_executor()
+    if executor is None or len(passwords) < 2:
+        return [make_password(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (pool_size() * 4))
+    return list(executor.map(_make, passwords, chunksize=chunksize))
+
+
+def shutdown():
+    global _executor, _slots
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _slots = None
+
+
+@receiver(setting_changed)
+def _reset_pool(setting, **kwargs):
+    if setting.startswith('PASSWORD_HASH'):
+        shutdown()
@@ -0,0 +1,251 @@
+"""
+进程内的实时推送（Server-Sent Events），需以 ASGI 方式部署（Project/asgi.py）。
+
+每个进程一个后台协程按游标读取发件箱（见 Project/db_utils.py 的 read_outbox），用 LIVE_EVENT_ROUTERS
+中各主题的函数列表把事件转换为 (频道, 事件名, 数据)，再分发给本进程内订阅了该频道的连接：
+无论有多少连接，每个进程每次只读一次发件箱，空闲的连接只占一个协程，不查询数据库。
+本进程内的写入提交后立即唤醒读取（notify），其他进程的写入最迟 LIVE_POLL_SECONDS 秒送达。
+
+背压与连接数限制（均按进程计）：
+- 每个连接的待发送队列长度为 LIVE_QUEUE_SIZE，队列满时向客户端发送 reset 并断开，
+  客户端重新连接并增量同步一次，消费慢的连接不会让进程内积压无限增长；
+- 连接数达到 LIVE_MAX_CONNECTIONS 时拒绝新连接（503），客户端退回定时同步；
+- 同一用户最多 LIVE_MAX_CONNECTIONS_PER_USER 个连接（多个标签页），超出时断开该用户最早的连接并发送 replaced。
+"""
+import asyncio
+import contextvars
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.module_loading import import_string
+
+from Project.db_utils import outbox_head, read_outbox, release_request_connections
+
+logger = logging.getLogger(__name__)
+
+# 连接被服务端关闭时放入队列的结束标记：(CLOSED, 发给客户端的事件名)
+CLOSED = object()
+
+
+class LiveCapacityError(Exception):
+    pass
+
+
+class Subscription:
+    def __init__(self, channels, owner=None):
+        self.channels = frozenset(channels)
+        self.owner = owner
+        self.queue = asyncio.Queue(maxsize=settings.LIVE_QUEUE_SIZE)
+        self.closed = False
+
+    def offer(self, message):
+        """放入一条待发送的事件；队列已满时关闭订阅，返回是否放入"""
+        if self.closed:
+            return False
+        if self.queue.qsize() >= settings.LIVE_QUEUE_SIZE - 1:
+            # 留一个位置放结束标记
+            logger.warning('推送队列已满，断开连接 %s', self.owner)
+            self.close('reset')
+            return False
+        self.queue.put_nowait(message)
+        return True
+
+    def close(self, event):
+        if not self.closed:
+            self.closed = True
+            self.queue.put_nowait((CLOSED, event))
+
+
+class LiveHub:
+    def __init__(self):
+        self._loop = None
+        self._channels = {}
+        self._subscriptions = set()
+        self._owners = {}
+        self._task = None
+        self._wake = None
+        self._routers = None
+        # 读取发件箱固定在一个线程中进行，只占用每个库的一个连接
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='live-outbox')
+
+    def _bind(self):
+        # 一个进程通常只有一个事件循环；测试等场景换了循环时丢弃旧循环上的状态
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._channels = {}
+            self._subscriptions = set()
+            self._owners = {}
+            self._task = None
+            self._wake = asyncio.Event()
+
+    def subscribe(self, channels, owner=None):
+        """
+        订阅 channels，owner 为连接所属的用户（如 'rider:5'）；
+        本进程连接数已达上限时抛出 LiveCapacityError，同一用户的连接超出上限时断开其最早的连接。
+        """
+        self._bind()
+        if len(self._subscriptions) >= settings.LIVE_MAX_CONNECTIONS:
+            raise LiveCapacityError()
+        subscription = Subscription(channels, owner)
+        if owner is not None:
+            connections = self._owners.setdefault(owner, [])
+            while len(connections) >= settings.LIVE_MAX_CONNECTIONS_PER_USER:
+                replaced = connections[0]
+                self.unsubscribe(replaced)
+                replaced.close('replaced')
+            connections.append(subscription)
+        self._subscriptions.add(subscription)
+        for channel in subscription.channels:
+            self._channels.setdefault(channel, set()).add(subscription)
+        if self._task is None or self._task.done():
+            # 不继承发起订阅的请求的上下文（如从库读取的设置）
+            self._task = self._loop.create_task(self._run(), context=contextvars.Context())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self._subscriptions.discard(subscription)
+        connections = self._owners.get(subscription.owner)
+        if connections is not None and subscription in connections:
+            connections.remove(subscription)
+            if not connections:
+                del self._owners[subscription.owner]
+        for channel in subscription.channels:
+            subscribers = self._channels.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[channel]
+
+    def connection_count(self):
+        return len(self._subscriptions)
+
+    def publish(self, channel, event, data):
+        """把事件发给本进程内订阅了该频道的连接，返回送达的连接数；队列已满而被关闭的连接立即退订，不再占用名额"""
+        message = (event, data)
+        delivered = 0
+        for subscription in list(self._channels.get(channel, ())):
+            if subscription.offer(message):
+                delivered += 1
+            else:
+                self.unsubscribe(subscription)
+        return delivered
+
+    def notify(self):
+        """写入提交后调用（可在任意线程）：立即读取发件箱，不等下一次定时读取"""
+        loop, wake = self._loop, self._wake
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    def _get_routers(self):
+        if self._routers is None:
+            self._routers = {
+                topic: [import_string(path) for path in paths]
+                for topic, paths in settings.LIVE_EVENT_ROUTERS.items()
+            }
+        return self._routers
+
+    async def _run(self):
+        # 从当前位置开始读：连接建立之前的变化由页面本身的数据覆盖
+        cursor = await self._loop.run_in_executor(self._executor, _head)
+        while self._subscriptions:
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.LIVE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                cursor = await self._loop.run_in_executor(self._executor, self._dispatch, cursor)
+            except Exception:
+                logger.exception('读取发件箱失败')
+
+    def _dispatch(self, cursor):
+        # 在读取线程中执行：读取发件箱并按主题转换事件，再回到事件循环分发
+        close_old_connections()
+        routers = self._get_routers()
+        while True:
+            events, cursor = read_outbox(cursor, _databases(), topics=list(routers))
+            if not events:
+                return cursor
+            by_topic = {}
+            for event in events:
+                by_topic.setdefault(event['topic'], []).append(event)
+            messages = []
+            for topic, topic_events in by_topic.items():
+                for router in routers[topic]:
+                    messages.extend(router(topic_events))
+            self._loop.call_soon_threadsafe(self._publish_all, messages)
+
+    def _publish_all(self, messages):
+        for channel, event, data in messages:
+            self.publish(channel, event, data)
+
+
+hub = LiveHub()
+
+
+def _databases():
+    # Project.sharding 经 order.events 引用本模块，这里在用到时再导入
+    from Project.sharding import order_databases
+    return order_databases()
+
+
+def _head():
+    close_old_connections()
+    return outbox_head(_databases())
+
+
+def notify():
+    hub.notify()
+
+
+def format_event(event, data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f'event: {event}\ndata: {payload}\n\n'
+
+
+async def _stream(subscription):
+    try:
+        # 连接期间不查询数据库，认证时借出的连接不必占到连接断开
+        await release_request_connections()
+        # 断线后浏览器按 retry 毫秒重连
+        yield 'retry: 3000\n\n'
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), settings.LIVE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # 注释行保持连接，避免被代理按空闲超时断开
+                yield ': keepalive\n\n'
+                continue
+            if message[0] is CLOSED:
+                yield format_event(message[1], {})
+                return
+            yield format_event(*message)
+    finally:
+        hub.unsubscribe(subscription)
+
+
+def event_stream_response(request, channels, owner):
+    """
+    订阅 channels 并返回 SSE 响应，owner 为连接所属的用户；
+    不是以 ASGI 方式运行或本进程连接数已满时返回失败，页面退回刷新或定时同步。
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'success': False, 'message': '实时推送需要以 ASGI 方式部署'}, status=501)
+    try:
+        subscription = hub.subscribe(channels, owner)
+    except LiveCapacityError:
+        response = JsonResponse({'success': False, 'message': '实时推送连接数已满，请稍后重试'}, status=503)
+        response['Retry-After'] = str(settings.LIVE_RETRY_AFTER_SECONDS)
+        return response
+    response = StreamingHttpResponse(_stream(subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # 关闭 nginx 的响应缓冲，事件写出后立即送达
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,7 +1,68 @@
-from django.contrib.auth import get_user_model
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
 from django.utils import timezone
 
-from Project.db_utils import execute_fetchone
+from Project.db_router import replica_configured, replica_reads
+from Project.db_utils import AUTH_USER_COLUMNS, build_user, execute_fetchone
+
+
+class ReplicaRoutingMiddleware:
+    """
+    请求内的只读查询发往从库（见 Project/db_router.py）。
+    请求中发生写入时在响应里设置 Cookie（值为到期时间戳），REPLICA_PIN_SECONDS 秒内
+    该浏览器的请求全部读主库，避免刚下单/接单后因复制延迟看不到自己的数据。
+    需放在 SessionMiddleware 之前，session 与登录用户的读写也按同样规则路由。
+    同时支持同步与异步：以 ASGI 方式部署时异步视图直接在事件循环中执行，不会因本中间件而占用一个线程。
+    """
+
+    COOKIE_NAME = "speedeats_db_pin"
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replica_configured():
+            return self.get_response(request)
+
+        now = time.time()
+        with replica_reads(enabled=not self._pinned(request, now)) as state:
+            response = self.get_response(request)
+        return self._pin(response, state, now)
+
+    async def __acall__(self, request):
+        if not replica_configured():
+            return await self.get_response(request)
+
+        now = time.time()
+        with replica_reads(enabled=not self._pinned(request, now)) as state:
+            response = await self.get_response(request)
+        return self._pin(response, state, now)
+
+    def _pin(self, response, state, now):
+        if state["wrote"]:
+            pin_seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                self.COOKIE_NAME,
+                str(int(now + pin_seconds) + 1),
+                max_age=pin_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def _pinned(self, request, now):
+        try:
+            return float(request.COOKIES.get(self.COOKIE_NAME, 0)) > now
+        except ValueError:
+            return False
 
 
 class MultiSessionTokenMiddleware:
@@ -16,7 +77,6 @@ class MultiSessionTokenMiddleware:
 
     def __init__(self, get_response):
         self.get_response = get_response
-        self.user_model = get_user_model()
 
     def __call__(self, request):
         token = self._extract_token(request)
@@ -57,18 +117,8 @@ class MultiSessionTokenMiddleware:
         if not user_id:
             return None
 
-        query = """
-            SELECT id,
-                   password,
-                   last_login,
-                   is_superuser,
-                   username,
-                   first_name,
-                   last_name,
-                   email,
-                   is_staff,
-                   is_active,
-                   date_joined
+        query = f"""
+            SELECT {', '.join(AUTH_USER_COLUMNS)}
             FROM auth_user
             WHERE id = %s
         """
@@ -76,11 +126,7 @@ class MultiSessionTokenMiddleware:
         if not record:
             return None
 
-        user = self.user_model(**record)
-        user._state.adding = False  # type: ignore[attr-defined]
-        user._state.db = "default"  # type: ignore[attr-defined]
-        user.backend = "django.contrib.auth.backends.ModelBackend"
-        return user
+        return build_user(record)
 
     def _extract_token(self, request):
         if hasattr(request, "multi_session_token"):
@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
@@ -43,10 +47,12 @@ INSTALLED_APPS = [
     "discount.apps.DiscountConfig",
     "order.apps.OrderConfig",
     "home.apps.HomeConfig",
+    "loadtest.apps.LoadtestConfig",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "Project.middleware.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -78,17 +84,168 @@ WSGI_APPLICATION = "Project.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
+# DJANGO_DB_PROFILE 选择数据库：mysql（默认，远程库）或 sqlite（本地离线开发与压测，
+# 路径由 DJANGO_SQLITE_PATH 指定，首次使用前执行 migrate）。
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",  # 读写互不阻塞，压测时多个线程可同时读
+    "synchronous": "NORMAL",  # WAL 模式下 NORMAL 足以保证崩溃后数据库一致
+    "cache_size": "-65536",  # 负数单位为 KiB，即 64 MiB 页缓存
+    "mmap_size": "268435456",  # 256 MiB 内存映射读
+    "temp_store": "MEMORY",
+}
+
+DATABASE_PROFILES = {
+    "mysql": {
         "ENGINE": "django.db.backends.mysql",
         "NAME": "h_db23371357",
         "USER": "u23371357",
         "PASSWORD": "Aa097419",
         "HOST": "124.70.86.207",
         "PORT": "3306",
-    }
+    },
+    "sqlite": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get("DJANGO_SQLITE_PATH", str(BASE_DIR / "local.sqlite3")),
+        "OPTIONS": {
+            "init_command": ";".join(f"PRAGMA {name}={value}" for name, value in SQLITE_PRAGMAS.items()),
+            # 写事务一开始就取得写锁，避免并发时读锁升级失败直接报 database is locked
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
+    },
 }
 
+DATABASE_PROFILE = os.environ.get("DJANGO_DB_PROFILE", "mysql")
+
+DATABASES = {
+    "default": DATABASE_PROFILES[DATABASE_PROFILE],
+}
+
+# 只读从库（见 Project/db_router.py）：mysql 配置下 DJANGO_DB_REPLICA_HOST 指定从库地址，账号与主库相同；
+# sqlite 配置下 DJANGO_SQLITE_REPLICA_PATH 指定从库文件，由 replicate_sqlite 命令定时从主库复制，模拟复制延迟。
+if DATABASE_PROFILE == "mysql" and os.environ.get("DJANGO_DB_REPLICA_HOST"):
+    DATABASES["replica"] = {**DATABASES["default"], "HOST": os.environ["DJANGO_DB_REPLICA_HOST"]}
+elif DATABASE_PROFILE == "sqlite" and os.environ.get("DJANGO_SQLITE_REPLICA_PATH"):
+    DATABASES["replica"] = {**DATABASES["default"], "NAME": os.environ["DJANGO_SQLITE_REPLICA_PATH"]}
+if "replica" in DATABASES:
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+
+# 订单分片（见 Project/sharding.py）：DJANGO_ORDER_SHARDS="平台ID:分片编号,..."，例如 "1:1,2:2,3:1"，
+# 分片编号从 1 开始，分片 N 的数据库别名为 shardN：sqlite 配置下是主库文件旁的 <文件名>.shardN.sqlite3，
+# mysql 配置下是库 <NAME>_shardN，主机由 DJANGO_SHARDN_HOST 指定（默认与主库相同）。
+# 分片库只有订单表，目录表在主库，因此关闭外键检查。新增分片后执行 init_order_shards。
+ORDER_SHARD_MAP = {
+    int(platform_id): int(number)
+    for platform_id, number in (
+        item.split(":") for item in os.environ.get("DJANGO_ORDER_SHARDS", "").split(",") if item.strip()
+    )
+}
+for _number in sorted(set(ORDER_SHARD_MAP.values())):
+    _primary = DATABASES["default"]
+    if DATABASE_PROFILE == "sqlite":
+        _path = Path(_primary["NAME"])
+        DATABASES[f"shard{_number}"] = {
+            **_primary,
+            "NAME": str(_path.with_name(f"{_path.stem}.shard{_number}{_path.suffix}")),
+            "OPTIONS": {
+                **_primary["OPTIONS"],
+                "init_command": _primary["OPTIONS"]["init_command"] + ";PRAGMA foreign_keys=OFF",
+            },
+        }
+    else:
+        DATABASES[f"shard{_number}"] = {
+            **_primary,
+            "NAME": f"{_primary['NAME']}_shard{_number}",
+            "HOST": os.environ.get(f"DJANGO_SHARD{_number}_HOST", _primary["HOST"]),
+            "OPTIONS": {**_primary.get("OPTIONS", {}), "init_command": "SET foreign_key_checks = 0"},
+        }
+
+# 订单冷热分层（见 order/archive.py）：archive_orders 命令把早于 ORDER_ARCHIVE_AFTER_DAYS 天的已完成、已取消订单
+# 按批移入同库的归档表；订单历史接口按页读取，只有页面越过热数据窗口时才查询归档表。
+ORDER_ARCHIVE_AFTER_DAYS = int(os.environ.get("DJANGO_ORDER_ARCHIVE_AFTER_DAYS", 30))
+ORDER_ARCHIVE_BATCH_SIZE = 500
+ORDER_HISTORY_PAGE_SIZE = 50
+ORDER_HISTORY_MAX_PAGE_SIZE = 500
+# 每个库、每一层最多读到的订单数：页码越深 LIMIT 越大，翻页深度到此为止（最后一页 has_more 为 False）
+ORDER_HISTORY_MAX_DEPTH = int(os.environ.get("DJANGO_ORDER_HISTORY_MAX_DEPTH", 5000))
+
+# 订单列表增量同步（见 order/sync.py）：游标往回留 ORDER_SYNC_OVERLAP_SECONDS 秒，覆盖读取时尚未提交的事务；
+# 一次变化超过 ORDER_SYNC_LIMIT 个订单时让客户端整页重读
+ORDER_SYNC_OVERLAP_SECONDS = 5
+ORDER_SYNC_LIMIT = 200
+
+# MySQL 上 order、order_item 按月分区（见 order/partitions.py）；需要在执行迁移前设置 DJANGO_ORDER_PARTITIONING=1，
+# 已迁移的库用 order_partitions --setup 启用。order_partitions 需要定期执行以预建未来的分区。
+ORDER_PARTITIONING = os.environ.get("DJANGO_ORDER_PARTITIONING", "0") == "1"
+ORDER_PARTITION_PREMAKE_MONTHS = 3
+
+# 销售汇总（见 order/rollups.py）：refresh_sales_rollups 命令需要定期执行（例如每 10 分钟），
+# 每次重算高水位之后有新订单、新评价的日期以及最近 SALES_ROLLUP_SETTLE_DAYS 天
+SALES_ROLLUP_SETTLE_DAYS = int(os.environ.get("DJANGO_SALES_ROLLUP_SETTLE_DAYS", 3))
+SALES_ANALYTICS_DEFAULT_DAYS = 30
+SALES_ANALYTICS_MAX_DAYS = 366
+
+# 变更事件发件箱（见 Project/db_utils.py）：读取时 ID 空缺超过 OUTBOX_GAP_SECONDS 秒视为回滚留下的空缺；
+# prune_outbox 命令删除 OUTBOX_RETENTION_DAYS 天前的事件，消费方的游标不应落后这么久
+OUTBOX_READ_LIMIT = 500
+OUTBOX_GAP_SECONDS = int(os.environ.get("DJANGO_OUTBOX_GAP_SECONDS", 10))
+OUTBOX_RETENTION_DAYS = int(os.environ.get("DJANGO_OUTBOX_RETENTION_DAYS", 7))
+
+# 实时推送（见 Project/live.py，需以 ASGI 方式部署）：每个进程一个后台协程读取发件箱，分发给本进程的连接；
+# 本进程的写入提交后立即读取，其他进程的写入最迟 LIVE_POLL_SECONDS 秒送达
+LIVE_POLL_SECONDS = float(os.environ.get("DJANGO_LIVE_POLL_SECONDS", 2))
+LIVE_HEARTBEAT_SECONDS = 25
+LIVE_QUEUE_SIZE = 100
+# 每个进程的连接数上限与每个用户（多个标签页）的连接数上限；连接数已满时客户端在 LIVE_RETRY_AFTER_SECONDS 秒后重试
+LIVE_MAX_CONNECTIONS = int(os.environ.get("DJANGO_LIVE_MAX_CONNECTIONS", 10000))
+LIVE_MAX_CONNECTIONS_PER_USER = 3
+LIVE_RETRY_AFTER_SECONDS = 30
+# 发件箱主题 → 把该主题的一批事件转换为 [(频道, 事件名, 数据), ...] 的函数列表
+LIVE_EVENT_ROUTERS = {
+    "order": [
+        "order.live.route_order_events",
+        "merchant.views.route_order_events",
+        "customer.views.route_order_events",
+    ],
+}
+
+DATABASE_ROUTERS = ["Project.db_router.PrimaryReplicaRouter"]
+
+# 用户写入后多少秒内的读取固定走主库（读到自己的写入）
+REPLICA_PIN_SECONDS = int(os.environ.get("DJANGO_REPLICA_PIN_SECONDS", 5))
+
+# 连接池（见 Project/db_backends）：请求结束时连接归还到本进程的池中，下一个请求直接复用，
+# 不再每个请求都与远程 MySQL 握手。DJANGO_DB_POOL=0 关闭连接池，恢复每个请求新建连接。
+DATABASE_POOL = {
+    "size": int(os.environ.get("DJANGO_DB_POOL_SIZE", 8)),  # 每个工作进程的连接上限
+    "timeout": 10,  # 池满时的等待秒数
+    "max_age": 600,  # 连接最长使用秒数，到期后关闭重建
+    "ping_after": 5,  # 空闲超过该秒数的连接借出前先 ping
+}
+
+# 协程版本的数据库函数（Project/db_utils.py 中 a 开头的函数）所用线程池的大小，即一个进程同时进行的异步查询数
+DB_ASYNC_THREADS = int(os.environ.get("DJANGO_DB_ASYNC_THREADS", DATABASE_POOL["size"]))
+
+# 同步视图中互不依赖的查询是否在上述线程池中并发执行（Project/db_utils.py 的 run_parallel），关闭时依次执行；
+# 默认随连接池开关：没有连接池时每个并发查询都要新建一次连接，握手的开销比省下的等待更大
+DB_PARALLEL_QUERIES = os.environ.get("DJANGO_DB_PARALLEL_QUERIES", os.environ.get("DJANGO_DB_POOL", "1")) != "0"
+
+if os.environ.get("DJANGO_DB_POOL", "1") != "0":
+    for _alias, _database in DATABASES.items():
+        DATABASES[_alias] = {
+            **_database,
+            "ENGINE": "Project.db_backends." + _database["ENGINE"].rsplit(".", 1)[-1],
+            "OPTIONS": {**_database.get("OPTIONS", {}), "pool": DATABASE_POOL},
+            # 连接由池管理；请求结束时必须 close() 才会归还
+            "CONN_MAX_AGE": 0,
+        }
+
+
+# 登录（login/views.py）、注册与会话中间件用原生 SQL 取出用户后直接校验密码，不经过 authenticate()，
+# 因此只支持 ModelBackend；改为其他后端时启动检查报错（见 login/checks.py）
+AUTHENTICATION_BACKENDS = ["django.contrib.auth.backends.ModelBackend"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -109,6 +266,45 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# 首选哈希算法与 PBKDF2 迭代次数可按环境调整；参数变化后用户下次登录时自动重新哈希。
+# PASSWORD_HASH_POOL_SIZE > 0 时在独立进程池中计算哈希，避免登录高峰占满请求线程。
+
+PASSWORD_HASHER_CHOICES = {
+    "pbkdf2_sha256": "Project.hashers.ConfigurablePBKDF2PasswordHasher",
+    "pbkdf2_sha1": "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "argon2": "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "bcrypt_sha256": "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "scrypt": "django.contrib.auth.hashers.ScryptPasswordHasher",
+}
+
+PREFERRED_PASSWORD_HASHER = os.environ.get("DJANGO_PASSWORD_HASHER", "pbkdf2_sha256")
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PREFERRED_PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CHOICES.items() if name != PREFERRED_PASSWORD_HASHER
+]
+
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("DJANGO_PASSWORD_HASH_ITERATIONS", "1000000"))
+
+PASSWORD_HASH_POOL_SIZE = int(os.environ.get("DJANGO_PASSWORD_HASH_POOL_SIZE", "2"))
+
+PASSWORD_HASH_QUEUE_FACTOR = 4
+
+PASSWORD_HASH_QUEUE_TIMEOUT = 10
+
+
+# 实时用户名检查的布隆过滤器（register/bloom.py）
+
+USERNAME_BLOOM_ENABLED = True
+
+USERNAME_BLOOM_REFRESH_SECONDS = 300
+
+# 别处新建的用户名补进本进程过滤器的最长间隔（秒），间隔内的 "可用" 回答不访问数据库
+USERNAME_BLOOM_CATCH_UP_SECONDS = 2
+
+USERNAME_BLOOM_ERROR_RATE = 0.01
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
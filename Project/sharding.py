@@ -0,0 +1,130 @@
+"""
+订单分片：order、order_item、order_rating、order_meal_rating 四张表按平台放到不同的数据库上。
+
+settings.ORDER_SHARD_MAP 为 {平台ID: 分片编号}，分片编号 N 对应数据库别名 shardN；
+未列出的平台（以及未配置分片时的全部平台）仍在 default。
+分片 N 上订单表的自增 ID 从 N * ORDER_ID_SPAN 开始（由 init_order_shards 命令设置），
+因此只凭订单 ID 就能找到订单所在的数据库。
+
+分片上只有订单表，订单查询不能再与商家、顾客、餐品等表 JOIN：顾客名、商家名、餐品名在下单时已写入订单快照，
+其余名称（平台、骑手、折扣）先在订单所在的库取 ID 列，再用 attach_order_names 回主库批量取。
+顾客、商家的订单历史跨平台，用 scatter_fetchall 逐库查询后合并。
+"""
+import asyncio
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from order.counters import record_transition
+from order.events import publish_order_event
+from Project.db_router import SHARD_ALIAS_PREFIX
+from Project.db_utils import aattach_names, attach_names, execute_fetchall, execute_fetchone, execute_non_query, quote_table
+
+ORDER_ID_SPAN = 10 ** 12
+ORDER_TABLES = ('order', 'order_item', 'order_rating', 'order_meal_rating')
+
+
+def shard_alias(number):
+    return f'{SHARD_ALIAS_PREFIX}{number}'
+
+
+def shard_number(alias):
+    if alias in (None, DEFAULT_DB_ALIAS):
+        return 0
+    return int(alias[len(SHARD_ALIAS_PREFIX):])
+
+
+def shard_aliases():
+    """已配置的分片别名（不含 default）"""
+    return [shard_alias(number) for number in sorted(set(settings.ORDER_SHARD_MAP.values()))]
+
+
+def order_databases():
+    """存放订单表的全部数据库；default 用 None 表示，读取时仍走读写分离路由"""
+    return [None, *shard_aliases()]
+
+
+def db_for_platform(platform_id):
+    number = settings.ORDER_SHARD_MAP.get(int(platform_id))
+    return shard_alias(number) if number else None
+
+
+def db_for_order(order_id):
+    # 无效或不属于任何已配置分片的 ID 按 default 处理，查询结果自然为空
+    try:
+        alias = shard_alias(int(order_id) // ORDER_ID_SPAN)
+    except (TypeError, ValueError):
+        return None
+    return alias if alias in settings.DATABASES else None
+
+
+def group_platforms(platform_ids):
+    """按所在数据库分组：{别名或 None: [平台ID, ...]}"""
+    groups = {}
+    for platform_id in platform_ids:
+        groups.setdefault(db_for_platform(platform_id), []).append(platform_id)
+    return groups
+
+
+def delete_order_rows(order_id, using=None):
+    """删除订单及其明细、评分，扣减订单状态计数并写入删除事件。分片上没有外键级联，子表按依赖顺序显式删除"""
+    db = connections[using or DEFAULT_DB_ALIAS]
+    lock = ' FOR UPDATE' if db.features.has_select_for_update else ''
+    with transaction.atomic(using=using):
+        order = execute_fetchone(
+            f'SELECT platform_id, merchant_id, customer_id, rider_id, status FROM {quote_table("order")} '
+            f'WHERE id = %s{lock}',
+            [order_id],
+            using=using,
+        )
+        if not order:
+            return 0
+        for table_name in ('order_meal_rating', 'order_rating', 'order_item'):
+            execute_non_query(f'DELETE FROM {quote_table(table_name)} WHERE order_id = %s', [order_id], using=using)
+        deleted = execute_non_query(f'DELETE FROM {quote_table("order")} WHERE id = %s', [order_id], using=using)
+        record_transition(order, None, using=using)
+        publish_order_event('deleted', order_id, order, using=using)
+        return deleted
+
+
+def order_id_floor(alias):
+    """该库订单表自增 ID 的起点"""
+    return shard_number(alias) * ORDER_ID_SPAN
+
+
+def scatter_fetchall(query, params=None, databases=None):
+    """在每个存放订单表的库上执行同一查询并合并结果（顺序由调用方重新排序）"""
+    rows = []
+    for alias in databases if databases is not None else order_databases():
+        rows.extend(execute_fetchall(query, params, using=alias))
+    return rows
+
+
+def newest_first(rows):
+    """按 created_at、id 倒序，与单库时 ORDER BY created_at DESC 一致"""
+    return sorted(rows, key=lambda row: (row['created_at'], row['id']), reverse=True)
+
+
+# 订单行上的外键列 → 主库中对应的名称列：{结果键: (订单行中的 ID 键, 表, 列)}
+# 顾客名、商家名、餐品名直接读订单与明细上的快照列，不在此列
+ORDER_NAME_SOURCES = {
+    'platform_name': ('platform_id', 'platform', 'platform_name'),
+    'rider_name': ('rider_id', 'rider', 'rider_name'),
+    'discount_rate': ('discount_id', 'discount', 'discount_rate'),
+}
+
+
+def attach_order_names(rows, *name_keys):
+    """为订单行补上名称，每种名称一次 IN 查询"""
+    for name_key in name_keys:
+        id_key, table_name, column = ORDER_NAME_SOURCES[name_key]
+        attach_names(rows, id_key, table_name, column, name_key)
+    return rows
+
+
+async def aattach_order_names(rows, *name_keys):
+    """attach_order_names 的协程版本：各种名称的查询并发进行，各自写入订单行中不同的键"""
+    await asyncio.gather(*(
+        aattach_names(rows, *ORDER_NAME_SOURCES[name_key], name_key) for name_key in name_keys
+    ))
+    return rows
@@ -41,15 +41,18 @@ urlpatterns = [
     path("customer/get-merchant-detail/<int:merchant_id>/<int:platform_id>/", customer_views.get_merchant_detail, name="get_merchant_detail"),
     path("customer/place-order/", customer_views.place_order, name="place_order"),
     path("customer/get-orders/", customer_views.get_orders, name="get_orders"),
+    path("customer/get-order-items/<int:order_id>/", customer_views.get_order_items, name="get_order_items"),
     path("customer/search-merchants/", customer_views.search_merchants, name="search_merchants"),
     path("customer/delete-order/<int:order_id>/", customer_views.delete_order, name="delete_order"),
     path("customer/pickup-order/<int:order_id>/", customer_views.pickup_order, name="pickup_order"),
     path("customer/rate-order/<int:order_id>/", customer_views.rate_order, name="rate_order"),
+    path("customer/events/", customer_views.order_events, name="customer_order_events"),
     path("rider/", rider_views.rider, name="rider"),
     path("rider/apply-platform/", rider_views.apply_platform, name="apply_platform"),
     path("rider/accept-orders/", rider_views.accept_orders, name="accept_orders"),
     path("rider/cancel-orders/", rider_views.cancel_orders, name="cancel_orders"),
     path("rider/complete-orders/", rider_views.complete_orders, name="complete_orders"),
+    path("rider/events/", rider_views.order_events, name="rider_order_events"),
     path("merchant/", merchant_views.merchant, name="merchant"),
     path("merchant/add-meal/", merchant_views.add_meal, name="add_meal"),
     path("merchant/get-meals/", merchant_views.get_meals, name="get_meals"),
@@ -61,7 +64,9 @@ urlpatterns = [
     path('merchant/delete-discount/<int:discount_id>/', merchant_views.delete_discount, name='delete_discount'),
     path('merchant/get-discounts/', merchant_views.get_discounts, name='get_discounts'),
     path('merchant/get-orders/', merchant_views.get_orders, name='get_orders'),
+    path('merchant/get-sales/', merchant_views.get_sales, name='get_sales'),
     path('merchant/delete-order/<int:order_id>/', merchant_views.delete_order, name='delete_order'),
+    path('merchant/events/', merchant_views.order_events, name='merchant_order_events'),
     path("platform/", platform_views.platform, name="platform"),
     path("platform/approve-merchant-request/", platform_views.approve_merchant_request, name="approve_merchant_request"),
     path("platform/reject-merchant-request/", platform_views.reject_merchant_request, name="reject_merchant_request"),
@@ -70,4 +75,7 @@ urlpatterns = [
     path("platform/reject-rider-request/", platform_views.reject_rider_request, name="reject_rider_request"),
     path("platform/remove-rider/", platform_views.remove_rider, name="remove_rider"),
     path("platform/delete-order/", platform_views.delete_order, name="delete_order"),
+    path("platform/get-sales/", platform_views.get_sales, name="get_sales"),
+    path("platform/get-sla/", platform_views.get_sla, name="get_sla"),
+    path("platform/import-onboarding/", platform_views.import_onboarding, name="import_onboarding"),
 ]
@@ -1,19 +1,49 @@
+import asyncio
 import json
 from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from functools import partial
 
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
 from django.db import transaction
-
+from django.utils import timezone
+
+from order.archive import (
+    ARCHIVE_TABLES,
+    HOT_TABLES,
+    afetch_order_history,
+    created_range,
+    fetch_order_history,
+    parse_page,
+)
+from order.counters import record_transition
+from order.events import publish_order_event
+from order.live import customer_channel, latest_order_events, load_event_orders
+from order.sla import record_latency
+from order.summary import format_meal_summary
+from order.sync import afetch_order_changes, parse_since, sync_token
 from Project.db_utils import (
+    aexecute_fetchall,
+    aget_request_entity,
     execute_fetchall,
     execute_fetchone,
     execute_non_query,
     execute_write,
-    get_customer_by_user,
+    get_request_entity,
     quote_table,
+    release_request_connections,
+    run_in_db_thread,
+)
+from Project.live import event_stream_response
+from Project.sharding import (
+    aattach_order_names,
+    attach_order_names,
+    db_for_order,
+    db_for_platform,
+    delete_order_rows,
 )
 
 
@@ -117,93 +147,164 @@ def _get_meals_for_merchant_platform(merchant_id, platform_id):
     return meals
 
 
-def _get_customer(order_user):
-    customer = get_customer_by_user(order_user.id)
+def _get_customer(request):
+    customer = get_request_entity(request, 'customer')
     if not customer:
         raise ValueError('Customer does not exist')
     return customer
 
 
-def _get_customer_order_rows(customer_id):
-    base_query = f'''
+async def _aget_customer(request):
+    customer = await aget_request_entity(request, 'customer')
+    if not customer:
+        raise ValueError('Customer does not exist')
+    return customer
+
+
+def _get_customer_order_rows(customer_id, page=1, page_size=None):
+    """
+    顾客的一页订单：订单分布在各平台所在的库及冷热两层，订单行自带餐品摘要，不再加载明细；
+    最后统一回主库取平台、骑手与折扣。返回 (订单行, 是否还有下一页)
+    """
+    orders, has_more = fetch_order_history(
+        partial(_get_customer_orders_in, customer_id),
+        page, page_size or settings.ORDER_HISTORY_PAGE_SIZE,
+    )
+    return _attach_names(orders), has_more
+
+
+async def _aget_customer_order_rows(customer_id, page, page_size):
+    orders, has_more = await afetch_order_history(partial(_get_customer_orders_in, customer_id), page, page_size)
+    return await _aattach_names(orders), has_more
+
+
+async def _aget_customer_order_changes(customer_id, since):
+    """since 之后新建或变化的订单与删除的订单 ID（见 order/sync.py），需要整页重读时返回 None"""
+    changes = await afetch_order_changes(
+        partial(_get_customer_orders_in, customer_id), 'customer_id', customer_id, since,
+    )
+    if changes is None:
+        return None
+    orders, deleted_ids = changes
+    return await _aattach_names(orders), deleted_ids
+
+
+def _attach_names(orders):
+    attach_order_names(orders, 'platform_name', 'rider_name', 'discount_rate')
+    return _drop_missing_discounts(orders)
+
+
+async def _aattach_names(orders):
+    await aattach_order_names(orders, 'platform_name', 'rider_name', 'discount_rate')
+    return _drop_missing_discounts(orders)
+
+
+def _drop_missing_discounts(orders):
+    for order in orders:
+        if order['discount_rate'] is None:
+            order['discount_id'] = None
+    return orders
+
+
+def _select_customer_orders(tables):
+    # 订单列表、增量同步与实时推送共用的列
+    return f'''
         SELECT o.id,
                o.price,
                o.status,
                o.created_at,
                o.merchant_id,
+               o.merchant_name,
                o.platform_id,
                o.rider_id,
-               m.merchant_name,
-               p.platform_name,
-               d.id AS discount_id,
-               d.discount_rate,
-               r.rider_name,
+               o.discount_id,
+               o.meal_summary,
+               o.item_count,
                rating.id AS rating_id,
                rating.merchant_rating,
                rating.platform_rating,
                rating.rider_rating
-        FROM {ORDER_TABLE} o
-        JOIN merchant m ON o.merchant_id = m.id
-        JOIN {PLATFORM_TABLE} p ON o.platform_id = p.id
-        LEFT JOIN discount d ON o.discount_id = d.id
-        LEFT JOIN rider r ON o.rider_id = r.id
-        LEFT JOIN {ORDER_RATING_TABLE} rating ON rating.order_id = o.id
-        WHERE o.customer_id = %s
-        ORDER BY o.created_at DESC
+        FROM {tables['order']} o
+        LEFT JOIN {tables['order_rating']} rating ON rating.order_id = o.id
     '''
-    orders = execute_fetchall(base_query, [customer_id])
-    if not orders:
-        return []
 
-    order_map = {order['id']: order for order in orders}
-    for order in order_map.values():
-        order['meals'] = []
 
-    order_ids = list(order_map.keys())
-    placeholders = _build_in_clause(order_ids)
+def _get_customer_orders_in(customer_id, alias, tables, limit, since=None, before=None, updated_since=None):
+    if updated_since is None:
+        window, window_params = created_range(since, before)
+    else:
+        window, window_params = created_range(updated_since, column='o.updated_at')
+    query = f'''
+        {_select_customer_orders(tables)}
+        WHERE o.customer_id = %s{window}
+        ORDER BY o.created_at DESC, o.id DESC
+        LIMIT %s
+    '''
+    return execute_fetchall(query, [customer_id, *window_params, limit], using=alias)
+
+
+def route_order_events(events):
+    """
+    把一批订单事件转换为顾客频道的 [(频道, 事件名, 数据), ...]（见 order/live.py）：
+    订单变化推送 order，数据与 get_orders 的订单一致；删除推送 order_deleted。
+    """
+    events = latest_order_events(events)
+    order_rows = load_event_orders(
+        [event for event in events if event['event_type'] != 'deleted'],
+        f'{_select_customer_orders(HOT_TABLES)} WHERE o.id IN ({{placeholders}})',
+    )
+    orders = {order['id']: order for order in _build_order_payload(_attach_names(list(order_rows.values())))}
+
+    messages = []
+    for event in events:
+        channel = customer_channel(event['payload']['customer_id'])
+        if event['event_type'] == 'deleted':
+            messages.append((channel, 'order_deleted', {'id': event['entity_id']}))
+        elif event['entity_id'] in orders:
+            messages.append((channel, 'order', orders[event['entity_id']]))
+    return messages
+
+
+def _get_order_items(customer_id, order_id):
+    """顾客展开或评价某个订单时按需读取明细与餐品评分；订单不存在或不属于该顾客时返回 None"""
+    order_db = db_for_order(order_id)
+    for tables in (HOT_TABLES, ARCHIVE_TABLES):
+        order = execute_fetchone(
+            f'SELECT id, created_at FROM {tables["order"]} WHERE id = %s AND customer_id = %s',
+            [order_id, customer_id],
+            using=order_db,
+        )
+        if order:
+            break
+    else:
+        return None
 
-    items_query = f'''
+    items = execute_fetchall(
+        f'''
         SELECT oi.id,
-               oi.order_id,
                oi.meal_id,
-               meal.name AS meal_name,
+               oi.meal_name,
                oi.quantity,
                oi.unit_price,
-               oi.line_price
-        FROM {ORDER_ITEM_TABLE} oi
-        JOIN meal ON oi.meal_id = meal.id
-        WHERE oi.order_id IN ({placeholders})
-        ORDER BY oi.id
-    '''
-    items = execute_fetchall(items_query, order_ids)
-    item_lookup = {}
-    for item in items:
-        entry = {
-            'item_id': item['id'],
-            'meal_id': item['meal_id'],
-            'meal_name': item['meal_name'],
-            'quantity': item['quantity'],
-            'unit_price': item['unit_price'],
-            'line_price': item['line_price'],
-            'rating': None,
-        }
-        order_map[item['order_id']]['meals'].append(entry)
-        item_lookup[item['id']] = entry
-
-    ratings_query = f'''
-        SELECT omr.order_id,
-               omr.order_item_id,
+               oi.line_price,
                omr.rating
-        FROM {ORDER_MEAL_RATING_TABLE} omr
-        WHERE omr.order_id IN ({placeholders})
-    '''
-    meal_ratings = execute_fetchall(ratings_query, order_ids)
-    for rating in meal_ratings:
-        item_entry = item_lookup.get(rating['order_item_id'])
-        if item_entry is not None:
-            item_entry['rating'] = _format_decimal(rating['rating'])
-
-    return orders
+        FROM {tables['order_item']} oi
+        LEFT JOIN {tables['order_meal_rating']} omr ON omr.order_item_id = oi.id
+        WHERE oi.order_id = %s AND oi.created_at >= %s
+        ORDER BY oi.id
+        ''',
+        [order_id, order['created_at']],
+        using=order_db,
+    )
+    return [{
+        'id': item['id'],
+        'meal_id': item['meal_id'],
+        'name': item['meal_name'],
+        'quantity': item['quantity'],
+        'unit_price': str(item['unit_price']),
+        'line_price': str(item['line_price']),
+        'rating': _format_decimal(item['rating']) if item['rating'] is not None else None,
+    } for item in items]
 
 
 def _extract_order_rating(row):
@@ -216,26 +317,10 @@ def _extract_order_rating(row):
     }
 
 
-def _format_meal_summary(meals):
-    if not meals:
-        return ''
-    return ', '.join(f"{meal['name']} x{meal['quantity']}" for meal in meals)
-
-
 def _build_order_context(order_rows):
     result = []
     for row in order_rows:
         order_rating = _extract_order_rating(row)
-        meals = []
-        for meal in row.get('meals', []):
-            meals.append({
-                'id': meal['item_id'],
-                'name': meal['meal_name'],
-                'quantity': meal['quantity'],
-                'unit_price': meal['unit_price'],
-                'line_price': meal['line_price'],
-                'rating': meal['rating'],
-            })
         result.append({
             'id': row['id'],
             'price': row['price'],
@@ -244,8 +329,8 @@ def _build_order_context(order_rows):
             'created_at': row['created_at'],
             'merchant': {'merchant_name': row['merchant_name']},
             'platform': {'platform_name': row['platform_name']},
-            'meals': meals,
-            'meal_summary': _format_meal_summary(meals),
+            'meal_summary': row['meal_summary'],
+            'item_count': row['item_count'],
             'discount': {'discount_rate': row['discount_rate']} if row['discount_id'] else None,
             'rider': {'rider_name': row['rider_name']} if row['rider_name'] else None,
             'rating': order_rating,
@@ -258,17 +343,6 @@ def _build_order_payload(order_rows):
     result = []
     for row in order_rows:
         order_rating = _extract_order_rating(row)
-        meals_payload = []
-        for meal in row.get('meals', []):
-            meals_payload.append({
-                'id': meal['item_id'],
-                'meal_id': meal['meal_id'],
-                'name': meal['meal_name'],
-                'quantity': meal['quantity'],
-                'unit_price': str(meal['unit_price']),
-                'line_price': str(meal['line_price']),
-                'rating': meal['rating'],
-            })
         result.append({
             'id': row['id'],
             'merchant_name': row['merchant_name'],
@@ -286,8 +360,8 @@ def _build_order_payload(order_rows):
             'platform_id': row['platform_id'],
             'rider_id': row['rider_id'],
             'created_at': row['created_at'].strftime('%Y-%m-%d %H:%M') if row['created_at'] else '',
-            'meals': meals_payload,
-            'meal_summary': _format_meal_summary(meals_payload),
+            'meal_summary': row['meal_summary'],
+            'item_count': row['item_count'],
         })
     return result
 
@@ -349,10 +423,6 @@ def _get_available_meal_ids(merchant_id, platform_id):
     return [row['id'] for row in rows]
 
 
-def _build_in_clause(values):
-    return ','.join(['%s'] * len(values))
-
-
 def _meal_type_filters(meal_type):
     if meal_type == 'breakfast':
         return ['breakfast']
@@ -368,7 +438,7 @@ def _meal_type_filters(meal_type):
 @login_required
 def customer(request):
     try:
-        current_customer = _get_customer(request.user)
+        current_customer = _get_customer(request)
         customer_name = current_customer['customer_name']
 
         platforms = _get_platforms()
@@ -407,7 +477,8 @@ def customer(request):
             })
 
         discounts = execute_fetchall('SELECT id, discount_rate FROM discount ORDER BY discount_rate')
-        orders = _build_order_context(_get_customer_order_rows(current_customer['id']))
+        order_rows, orders_has_more = _get_customer_order_rows(current_customer['id'])
+        orders = _build_order_context(order_rows)
 
     except ValueError:
         customer_name = request.user.username
@@ -415,6 +486,7 @@ def customer(request):
         merchants_with_platforms = []
         discounts = []
         orders = []
+        orders_has_more = False
         current_customer = None
 
     context = {
@@ -423,6 +495,7 @@ def customer(request):
         'merchants_with_platforms': merchants_with_platforms,
         'discounts': discounts,
         'orders': orders,
+        'orders_has_more': orders_has_more,
         'customer': current_customer,
     }
 
@@ -430,15 +503,20 @@ def customer(request):
 
 
 @login_required
-def get_merchant_detail(request, merchant_id, platform_id):
+async def get_merchant_detail(request, merchant_id, platform_id):
+    await release_request_connections()
     try:
-        enter_request = _get_enter_request(merchant_id, platform_id)
+        # 三个查询互不依赖，并发执行
+        enter_request, meals, discounts = await asyncio.gather(
+            run_in_db_thread(_get_enter_request, merchant_id, platform_id),
+            run_in_db_thread(_get_meals_for_merchant_platform, merchant_id, platform_id),
+            run_in_db_thread(_get_available_discounts, merchant_id, platform_id),
+        )
         if not enter_request:
             raise ValueError('商家未入驻该平台')
 
-        meals = _get_meals_for_merchant_platform(merchant_id, platform_id)
         available_discounts = []
-        for discount in _get_available_discounts(merchant_id, platform_id):
+        for discount in discounts:
             rate = Decimal(discount['discount_rate'])
             discount_display = f"{(Decimal('1') - rate) * Decimal('10'):.0f}折"
             available_discounts.append({
@@ -488,7 +566,7 @@ def place_order(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        current_customer = _get_customer(request.user)
+        current_customer = _get_customer(request)
         data = json.loads(request.body)
         merchant_id = data.get('merchant_id')
         platform_id = data.get('platform_id')
@@ -540,32 +618,54 @@ def place_order(request):
             total_price_decimal += line_price
 
         total_price_decimal = total_price_decimal.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        meal_summary, item_count = format_meal_summary([(item['meal_name'], item['quantity']) for item in order_items])
 
-        with transaction.atomic():
+        now = timezone.now()
+        order_db = db_for_platform(platform_id)
+        with transaction.atomic(using=order_db):
             order_query = f'''
-                INSERT INTO {ORDER_TABLE} (customer_id, platform_id, merchant_id, discount_id, rider_id, price, status, created_at)
-                VALUES (%s, %s, %s, %s, NULL, %s, 'unassigned', CURRENT_TIMESTAMP)
+                INSERT INTO {ORDER_TABLE} (customer_id, platform_id, merchant_id, discount_id, rider_id,
+                                           customer_name, merchant_name, meal_summary, item_count,
+                                           price, status, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, NULL, %s, %s, %s, %s, %s, 'unassigned', %s, %s)
             '''
             order_id = execute_write(order_query, [
                 current_customer['id'],
                 platform_id,
                 merchant_id,
                 discount['id'] if discount else None,
+                current_customer['customer_name'],
+                enter_request['merchant_name'],
+                meal_summary,
+                item_count,
                 total_price_decimal,
-            ])
+                now,
+                now,
+            ], using=order_db)
+            created = {
+                'platform_id': platform_id,
+                'merchant_id': merchant_id,
+                'customer_id': current_customer['id'],
+                'rider_id': None,
+                'status': 'unassigned',
+            }
+            record_transition(None, created, using=order_db)
+            publish_order_event('created', order_id, created, using=order_db)
 
             item_query = f'''
-                INSERT INTO {ORDER_ITEM_TABLE} (order_id, meal_id, quantity, unit_price, line_price, created_at)
-                VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+                INSERT INTO {ORDER_ITEM_TABLE} (order_id, meal_id, meal_name, quantity, unit_price, line_price, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
             '''
             for item in order_items:
                 execute_write(item_query, [
                     order_id,
                     item['meal_id'],
+                    item['meal_name'],
                     item['quantity'],
                     item['unit_price'],
                     item['line_price'],
-                ])
+                    now,
+                ], using=order_db)
 
         order_summary = {
             'id': order_id,
@@ -591,11 +691,31 @@ def place_order(request):
 
 
 @login_required
-def get_orders(request):
+async def get_orders(request):
     try:
-        current_customer = _get_customer(request.user)
-        order_rows = _get_customer_order_rows(current_customer['id'])
-        return JsonResponse({'success': True, 'orders': _build_order_payload(order_rows)})
+        current_customer = await _aget_customer(request)
+        # 带 since 时只返回变化的订单；游标过旧或无效时退回整页读取，delta 为 False 时客户端替换整个列表
+        token = sync_token()
+        changes = await _aget_customer_order_changes(current_customer['id'], parse_since(request.GET))
+        if changes is not None:
+            order_rows, deleted_ids = changes
+            return JsonResponse({
+                'success': True,
+                'delta': True,
+                'orders': _build_order_payload(order_rows),
+                'deleted_ids': deleted_ids,
+                'since': token,
+            })
+        page, page_size = parse_page(request.GET)
+        order_rows, has_more = await _aget_customer_order_rows(current_customer['id'], page, page_size)
+        return JsonResponse({
+            'success': True,
+            'delta': False,
+            'orders': _build_order_payload(order_rows),
+            'page': page,
+            'has_more': has_more,
+            'since': token,
+        })
     except ValueError:
         return JsonResponse({'success': False, 'message': '顾客信息不存在'})
     except Exception as exc:
@@ -603,7 +723,81 @@ def get_orders(request):
 
 
 @login_required
-def search_merchants(request):
+async def order_events(request):
+    """
+    本顾客订单的实时推送（SSE，见 Project/live.py）：接单、送达等状态变化推送 order，删除推送 order_deleted，
+    页面按 ID 合并进已加载的列表，不再重读。
+    """
+    try:
+        current_customer = await _aget_customer(request)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': '顾客信息不存在'})
+    return event_stream_response(request, [customer_channel(current_customer['id'])],
+                                 f'customer:{current_customer["id"]}')
+
+
+@login_required
+def get_order_items(request, order_id):
+    try:
+        current_customer = _get_customer(request)
+        items = _get_order_items(current_customer['id'], order_id)
+        if items is None:
+            return JsonResponse({'success': False, 'message': '订单不存在或不属于当前顾客'})
+        return JsonResponse({'success': True, 'items': items})
+    except ValueError:
+        return JsonResponse({'success': False, 'message': '顾客信息不存在'})
+    except Exception as exc:
+        return JsonResponse({'success': False, 'message': f'获取订单明细失败: {str(exc)}'})
+
+
+def _search_merchant_platforms(merchant_id, platform_id, meal_name, meal_type):
+    """搜索结果中一个商家的平台与符合条件的餐品"""
+    platforms_with_meals = []
+    for platform in _get_platforms_for_merchant(merchant_id):
+        if platform_id and str(platform['platform_id']) != str(platform_id):
+            continue
+
+        meal_query = '''
+            SELECT id, name, price, meal_type, rating_score, rating_count
+            FROM meal
+            WHERE merchant_id = %s AND platform_id = %s
+        '''
+        meal_params = [merchant_id, platform['platform_id']]
+
+        if meal_name:
+            meal_query += ' AND name LIKE %s'
+            meal_params.append(f'%{meal_name}%')
+
+        allowed_types = _meal_type_filters(meal_type)
+        if allowed_types:
+            placeholders = ','.join(['%s'] * len(allowed_types))
+            meal_query += f' AND meal_type IN ({placeholders})'
+            meal_params.extend(allowed_types)
+
+        meals = execute_fetchall(meal_query + ' ORDER BY name', meal_params)
+        for meal in meals:
+            meal['get_meal_type_display'] = MEAL_TYPE_DISPLAY.get(meal['meal_type'], meal['meal_type'])
+            meal['rating_score'] = _format_decimal(meal['rating_score'])
+            meal['rating_count'] = meal['rating_count']
+
+        if meals or (not meal_name and not meal_type):
+            platform_info = {
+                'id': platform['platform_id'],
+                'platform_name': platform['platform_name'],
+                'rating_score': _format_decimal(platform['rating_score']),
+                'rating_count': platform['rating_count'],
+            }
+            platforms_with_meals.append({
+                'platform': platform_info,
+                'meals': meals,
+                'meals_count': len(meals),
+            })
+    return platforms_with_meals
+
+
+@login_required
+async def search_merchants(request):
+    await release_request_connections()
     try:
         platform_id = request.GET.get('platform_id')
         merchant_name = request.GET.get('merchant_name')
@@ -635,58 +829,18 @@ def search_merchants(request):
             base_query += ' AND ' + ' AND '.join(conditions)
         base_query += ' ORDER BY m.merchant_name'
 
-        merchants = execute_fetchall(base_query, params)
-
-        result_data = []
-        for merchant in merchants:
-            approved_platforms = _get_platforms_for_merchant(merchant['id'])
-            platforms_with_meals = []
+        merchants = await aexecute_fetchall(base_query, params)
 
-            for platform in approved_platforms:
-                if platform_id and str(platform['platform_id']) != str(platform_id):
-                    continue
-
-                meal_query = '''
-                    SELECT id, name, price, meal_type, rating_score, rating_count
-                    FROM meal
-                    WHERE merchant_id = %s AND platform_id = %s
-                '''
-                meal_params = [merchant['id'], platform['platform_id']]
-
-                if meal_name:
-                    meal_query += ' AND name LIKE %s'
-                    meal_params.append(f'%{meal_name}%')
-
-                allowed_types = _meal_type_filters(meal_type)
-                if allowed_types:
-                    placeholders = ','.join(['%s'] * len(allowed_types))
-                    meal_query += f' AND meal_type IN ({placeholders})'
-                    meal_params.extend(allowed_types)
-
-                meals = execute_fetchall(meal_query + ' ORDER BY name', meal_params)
-                for meal in meals:
-                    meal['get_meal_type_display'] = MEAL_TYPE_DISPLAY.get(meal['meal_type'], meal['meal_type'])
-                    meal['rating_score'] = _format_decimal(meal['rating_score'])
-                    meal['rating_count'] = meal['rating_count']
-
-                if meals or (not meal_name and not meal_type):
-                    platform_info = {
-                        'id': platform['platform_id'],
-                        'platform_name': platform['platform_name'],
-                        'rating_score': _format_decimal(platform['rating_score']),
-                        'rating_count': platform['rating_count'],
-                    }
-                    platforms_with_meals.append({
-                        'platform': platform_info,
-                        'meals': meals,
-                        'meals_count': len(meals),
-                    })
-
-            if platforms_with_meals:
-                result_data.append({
-                    'merchant': merchant,
-                    'platforms_with_meals': platforms_with_meals,
-                })
+        # 各商家的平台与餐品互不依赖，并发查询
+        merchant_platforms = await asyncio.gather(*(
+            run_in_db_thread(_search_merchant_platforms, merchant['id'], platform_id, meal_name, meal_type)
+            for merchant in merchants
+        ))
+        result_data = [
+            {'merchant': merchant, 'platforms_with_meals': platforms_with_meals}
+            for merchant, platforms_with_meals in zip(merchants, merchant_platforms)
+            if platforms_with_meals
+        ]
 
         return JsonResponse({'success': True, 'merchants': result_data})
     except Exception as exc:
@@ -700,20 +854,21 @@ def delete_order(request, order_id):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        current_customer = _get_customer(request.user)
+        current_customer = _get_customer(request)
         order_query = f'''
             SELECT id, status
             FROM {ORDER_TABLE}
             WHERE id = %s AND customer_id = %s
         '''
-        order = execute_fetchone(order_query, [order_id, current_customer['id']])
+        order_db = db_for_order(order_id)
+        order = execute_fetchone(order_query, [order_id, current_customer['id']], using=order_db)
         if not order:
             return JsonResponse({'success': False, 'message': '订单不存在或不属于当前顾客'})
 
         if order['status'] not in ['unassigned', 'cancelled']:
             return JsonResponse({'success': False, 'message': '只能删除未分配骑手或已取消的订单'})
 
-        execute_non_query(f'DELETE FROM {ORDER_TABLE} WHERE id = %s', [order_id])
+        delete_order_rows(order_id, using=order_db)
         return JsonResponse({'success': True, 'message': '订单删除成功'})
     except ValueError:
         return JsonResponse({'success': False, 'message': '顾客信息不存在'})
@@ -728,17 +883,23 @@ def pickup_order(request, order_id):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        current_customer = _get_customer(request.user)
+        current_customer = _get_customer(request)
         order_query = f'''
             SELECT o.id,
                    o.status,
                    o.price,
-                   m.merchant_name
+                   o.platform_id,
+                   o.merchant_id,
+                   o.customer_id,
+                   o.rider_id,
+                   o.merchant_name,
+                   o.meal_summary,
+                   o.ready_at
             FROM {ORDER_TABLE} o
-            JOIN merchant m ON o.merchant_id = m.id
             WHERE o.id = %s AND o.customer_id = %s
         '''
-        order = execute_fetchone(order_query, [order_id, current_customer['id']])
+        order_db = db_for_order(order_id)
+        order = execute_fetchone(order_query, [order_id, current_customer['id']], using=order_db)
         if not order:
             return JsonResponse({'success': False, 'message': '订单不存在或不属于当前顾客'})
 
@@ -747,26 +908,23 @@ def pickup_order(request, order_id):
 
         update_query = f'''
             UPDATE {ORDER_TABLE}
-            SET status = 'completed'
-            WHERE id = %s
+            SET status = 'completed',
+                completed_at = %s,
+                updated_at = %s
+            WHERE id = %s AND status = 'ready'
         '''
-        execute_non_query(update_query, [order_id])
-        meal_rows = execute_fetchall(
-            f'''
-            SELECT meal.name, oi.quantity
-            FROM {ORDER_ITEM_TABLE} oi
-            JOIN meal ON oi.meal_id = meal.id
-            WHERE oi.order_id = %s
-            ORDER BY oi.id
-            ''',
-            [order_id],
-        )
-        meal_summary = ', '.join(f"{row['name']}x{row['quantity']}" for row in meal_rows) if meal_rows else ''
+        now = timezone.now()
+        with transaction.atomic(using=order_db):
+            if not execute_non_query(update_query, [now, now, order_id], using=order_db):
+                return JsonResponse({'success': False, 'message': '只能取餐状态为"待取餐"的订单'})
+            record_transition(order, {**order, 'status': 'completed'}, using=order_db)
+            record_latency(order['platform_id'], 'pickup', order['ready_at'], now, using=order_db)
+            publish_order_event('completed', order_id, {**order, 'status': 'completed'}, using=order_db)
         order_info = {
             'id': order['id'],
             'customer': current_customer['customer_name'],
             'merchant': order['merchant_name'],
-            'meals': meal_summary,
+            'meals': order['meal_summary'],
             'price': str(order['price']),
             'status': 'completed',
         }
@@ -788,7 +946,7 @@ def rate_order(request, order_id):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        current_customer = _get_customer(request.user)
+        current_customer = _get_customer(request)
         data = json.loads(request.body)
         merchant_rating = _normalize_rating(data.get('merchant_rating'))
         platform_rating = _normalize_rating(data.get('platform_rating'))
@@ -796,20 +954,23 @@ def rate_order(request, order_id):
         rider_rating = _normalize_rating(rider_rating_value) if rider_rating_value not in [None, ''] else None
         meal_ratings_payload = data.get('meal_ratings', [])
 
+        order_db = db_for_order(order_id)
         order = execute_fetchone(
             f'''
-            SELECT o.id, o.merchant_id, o.platform_id, o.rider_id, o.status
+            SELECT o.id, o.merchant_id, o.platform_id, o.customer_id, o.rider_id, o.status
             FROM {ORDER_TABLE} o
             WHERE o.id = %s AND o.customer_id = %s
             ''',
             [order_id, current_customer['id']],
+            using=order_db,
         )
         if not order:
             return JsonResponse({'success': False, 'message': '订单不存在或不属于当前顾客'})
         if order['status'] != 'completed':
             return JsonResponse({'success': False, 'message': '仅已完成的订单可以评价'})
 
-        existing_rating = execute_fetchone(f'SELECT id FROM {ORDER_RATING_TABLE} WHERE order_id = %s', [order_id])
+        existing_rating = execute_fetchone(f'SELECT id FROM {ORDER_RATING_TABLE} WHERE order_id = %s', [order_id],
+                                           using=order_db)
         if existing_rating:
             return JsonResponse({'success': False, 'message': '订单已评价'})
 
@@ -820,13 +981,13 @@ def rate_order(request, order_id):
 
         order_items = execute_fetchall(
             f'''
-            SELECT oi.id, oi.meal_id, meal.name AS meal_name
+            SELECT oi.id, oi.meal_id, oi.meal_name
             FROM {ORDER_ITEM_TABLE} oi
-            JOIN meal ON oi.meal_id = meal.id
             WHERE oi.order_id = %s
             ORDER BY oi.id
             ''',
             [order_id],
+            using=order_db,
         )
         if not order_items:
             return JsonResponse({'success': False, 'message': '订单中没有餐品，无法评价'})
@@ -854,22 +1015,29 @@ def rate_order(request, order_id):
         if missing_items:
             return JsonResponse({'success': False, 'message': '请为订单中的每个餐品评分'})
 
-        with transaction.atomic():
+        now = timezone.now()
+        with transaction.atomic(using=order_db):
             execute_write(
                 f'''
                 INSERT INTO {ORDER_RATING_TABLE} (order_id, merchant_rating, platform_rating, rider_rating, created_at)
-                VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+                VALUES (%s, %s, %s, %s, %s)
                 ''',
-                [order_id, merchant_rating, platform_rating, rider_rating],
+                [order_id, merchant_rating, platform_rating, rider_rating, now],
+                using=order_db,
             )
 
             insert_meal_rating_query = f'''
                 INSERT INTO {ORDER_MEAL_RATING_TABLE} (order_id, order_item_id, meal_id, rating, created_at)
-                VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+                VALUES (%s, %s, %s, %s, %s)
             '''
             for item in order_items:
                 rating_value = normalized_meal_ratings[item['id']]
-                execute_write(insert_meal_rating_query, [order_id, item['id'], item['meal_id'], rating_value])
+                execute_write(insert_meal_rating_query, [order_id, item['id'], item['meal_id'], rating_value, now],
+                              using=order_db)
+            # 评价显示在顾客的订单列表中，订单行随之更新以便增量同步带上它
+            execute_non_query(f'UPDATE {ORDER_TABLE} SET updated_at = %s WHERE id = %s', [now, order_id],
+                              using=order_db)
+            publish_order_event('rated', order_id, order, using=order_db)
 
         _update_entity_rating(MERCHANT_TABLE, order['merchant_id'], merchant_rating)
         _update_entity_rating(PLATFORM_TABLE, order['platform_id'], platform_rating)
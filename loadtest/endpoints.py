@@ -0,0 +1,466 @@
+"""
+接口基准：Project/urls.py 中的每个路由至少对应一个用例，在 generate_world 生成的数据集上测量
+单次请求的耗时、SQL 次数与内存分配（tracemalloc），并与基准文件比较。
+
+- 每次请求都在事务中执行并回滚，写接口不会改变数据集，多次运行结果可比；
+- 用例需要的订单、餐品等前置数据在同一事务内、计时开始前插入；
+- 耗时取多次运行的中位数；内存单独运行一次测量，避免 tracemalloc 的开销计入耗时。
+"""
+import gc
+import json
+import re
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.test import Client
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+
+from loadtest.world import LIFECYCLE_STEPS, load_world
+from order.counters import record_transition
+from order.events import publish_order_event
+from order.summary import format_meal_summary
+from Project.db_utils import (
+    execute_fetchall_in,
+    execute_fetchone,
+    execute_insert_ignore,
+    execute_non_query,
+    execute_write,
+    quote_table,
+)
+from Project.bench import count_queries
+from Project.sharding import db_for_order, db_for_platform, shard_aliases
+
+ORDER_TABLE = quote_table('order')
+ORDER_ITEM_TABLE = quote_table('order_item')
+
+# 不在基准范围内的路由
+SKIPPED_ROUTES = {'admin/'}
+
+ROLES = ('customer', 'merchant', 'rider', 'platform')
+
+
+class Case:
+    def __init__(self, route, name=None, method='get', role=None, data=None, json_body=False,
+                 setup=None, kwargs=None, expect_status=None):
+        self.route = route
+        self.name = name or f'{method.upper()} {route or "/"}'
+        self.method = method
+        self.role = role
+        self.data = data
+        self.json_body = json_body
+        self.setup = setup
+        self.kwargs = kwargs
+        self.expect_status = expect_status
+
+    def path(self, fx):
+        values = self.kwargs(fx) if self.kwargs else {}
+        return '/' + re.sub(r'<(?:\w+:)?(\w+)>', lambda match: str(values[match.group(1)]), self.route)
+
+
+# ---- 前置数据 ----
+
+def _insert_order(fx, status, rider_id=None, with_items=True):
+    order_db = db_for_platform(fx['platform_id'])
+    now = timezone.now()
+    steps = LIFECYCLE_STEPS[status]
+    order_id = execute_write(
+        f'''
+        INSERT INTO {ORDER_TABLE} (customer_id, platform_id, merchant_id, discount_id, rider_id,
+                                   customer_name, merchant_name, meal_summary, item_count, price, status, created_at,
+                                   assigned_at, ready_at, completed_at, updated_at)
+        VALUES (%s, %s, %s, NULL, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ''',
+        [fx['customer_id'], fx['platform_id'], fx['merchant_id'], rider_id, fx['customer_name'], fx['merchant_name'],
+         *format_meal_summary([(fx['meal_name'], 1)] if with_items else []), fx['meal_price'], status, now,
+         *(now if step in steps else None for step in ('assigned', 'ready', 'completed')), now],
+        using=order_db,
+    )
+    if with_items:
+        execute_write(
+            f'''
+            INSERT INTO {ORDER_ITEM_TABLE} (order_id, meal_id, meal_name, quantity, unit_price, line_price, created_at)
+            VALUES (%s, %s, %s, 1, %s, %s, %s)
+            ''',
+            [order_id, fx['meal_id'], fx['meal_name'], fx['meal_price'], fx['meal_price'], timezone.now()],
+            using=order_db,
+        )
+    order = {'platform_id': fx['platform_id'], 'merchant_id': fx['merchant_id'], 'customer_id': fx['customer_id'],
+             'rider_id': rider_id, 'status': status}
+    record_transition(None, order, using=order_db)
+    publish_order_event('created', order_id, order, using=order_db)
+    return {'order_id': order_id}
+
+
+def _unassigned_order(fx):
+    return _insert_order(fx, 'unassigned')
+
+
+def _deletable_order(fx):
+    return _insert_order(fx, 'unassigned')
+
+
+def _assigned_order(fx):
+    return _insert_order(fx, 'assigned', fx['rider_id'])
+
+
+def _ready_order(fx):
+    return _insert_order(fx, 'ready', fx['rider_id'])
+
+
+def _completed_order(fx):
+    return _insert_order(fx, 'completed', fx['rider_id'])
+
+
+def _new_meal(fx):
+    meal_id = execute_write(
+        '''
+        INSERT INTO meal (merchant_id, platform_id, name, price, meal_type, created_at, updated_at,
+                          rating_score, rating_count)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, 0, 0)
+        ''',
+        [fx['merchant_id'], fx['platform_id'], '基准测试餐品', '9.90', 'lunch', timezone.now(), timezone.now()],
+    )
+    return {'meal_id': meal_id}
+
+
+def _merchant_discount(fx):
+    execute_insert_ignore(
+        'merchant_platform_discount',
+        ['merchant_id', 'platform_id', 'discount_id', 'created_at', 'updated_at'],
+        [fx['merchant_id'], fx['platform_id'], fx['discount_id'], timezone.now(), timezone.now()],
+    )
+    row = execute_fetchone(
+        'SELECT id FROM merchant_platform_discount WHERE merchant_id = %s AND platform_id = %s',
+        [fx['merchant_id'], fx['platform_id']],
+    )
+    return {'merchant_discount_id': row['id']}
+
+
+def _without_enter_request(fx):
+    execute_non_query('DELETE FROM enter_request WHERE merchant_id = %s AND platform_id = %s',
+                      [fx['merchant_id'], fx['platform_id']])
+
+
+def _without_sign_requests(fx):
+    execute_non_query('DELETE FROM sign_request WHERE rider_id = %s', [fx['rider_id']])
+
+
+def _request_with_status(table_name, owner_column, owner_key, status):
+    def setup(fx):
+        row = execute_fetchone(
+            f'SELECT id FROM {table_name} WHERE {owner_column} = %s AND platform_id = %s',
+            [fx[owner_key], fx['platform_id']],
+        )
+        execute_non_query(f'UPDATE {table_name} SET status = %s WHERE id = %s', [status, row['id']])
+        return {'request_id': row['id']}
+    return setup
+
+
+def _sync_since(fx):
+    """增量同步：取最近一分钟内变化的订单"""
+    return {'since': (timezone.now() - timedelta(minutes=1)).isoformat()}
+
+
+def _rate_payload(fx):
+    items = execute_fetchall_in(f'SELECT id FROM {ORDER_ITEM_TABLE} WHERE order_id IN ({{placeholders}})',
+                                [fx['order_id']], using=db_for_order(fx['order_id']))
+    return {
+        'merchant_rating': 5,
+        'platform_rating': 4,
+        'rider_rating': 5,
+        'meal_ratings': [{'order_item_id': item['id'], 'rating': 5} for item in items],
+    }
+
+
+def _onboarding_file(fx):
+    content = (
+        'type,merchant,platform,name,price,meal_type\n'
+        f'meal,{fx["merchant_username"]},{fx["platform_name"]},基准导入餐品,12.00,lunch\n'
+    )
+    return {'file': SimpleUploadedFile('bench.csv', content.encode('utf-8'), content_type='text/csv')}
+
+
+def _order_kwargs(fx):
+    return {'order_id': fx['order_id']}
+
+
+CASES = [
+    Case('', name='GET / (home)'),
+    Case('info/terms/'),
+    Case('info/privacy/'),
+    Case('info/security/'),
+    Case('info/contact/'),
+    Case('login/'),
+    Case('login/', method='post', role='anonymous', expect_status=302,
+         data=lambda fx: {'username': fx['customer_username'], 'password': fx['password'], 'user_type': 'customer'}),
+    Case('forgot-password/'),
+    Case('register/'),
+    Case('register/check-username/', data=lambda fx: {'username': fx['customer_username']}),
+
+    Case('customer/', role='customer'),
+    Case('customer/get-merchant-detail/<int:merchant_id>/<int:platform_id>/', role='customer',
+         kwargs=lambda fx: {'merchant_id': fx['merchant_id'], 'platform_id': fx['platform_id']}),
+    Case('customer/place-order/', method='post', role='customer', json_body=True,
+         data=lambda fx: {'merchant_id': fx['merchant_id'], 'platform_id': fx['platform_id'],
+                          'meals': [{'meal_id': fx['meal_id'], 'quantity': 2}],
+                          'discount_id': fx['discount_id'], 'total_price': '0'}),
+    Case('customer/get-orders/', role='customer'),
+    Case('customer/get-orders/', name='GET customer/get-orders/?since', role='customer', data=_sync_since),
+    Case('customer/get-order-items/<int:order_id>/', role='customer', setup=_completed_order, kwargs=_order_kwargs),
+    Case('customer/search-merchants/', role='customer',
+         data=lambda fx: {'platform_id': fx['platform_id'], 'meal_name': fx['meal_name'][:2]}),
+    Case('customer/delete-order/<int:order_id>/', method='delete', role='customer',
+         setup=_deletable_order, kwargs=_order_kwargs),
+    Case('customer/pickup-order/<int:order_id>/', method='post', role='customer',
+         setup=_ready_order, kwargs=_order_kwargs),
+    Case('customer/rate-order/<int:order_id>/', method='post', role='customer', json_body=True,
+         setup=_completed_order, kwargs=_order_kwargs, data=_rate_payload),
+    Case('customer/events/', role='customer', expect_status=501),
+
+    Case('rider/', role='rider'),
+    Case('rider/apply-platform/', method='post', role='rider', setup=_without_sign_requests,
+         data=lambda fx: {'platform_id': fx['platform_id']}),
+    Case('rider/accept-orders/', method='post', role='rider', setup=_unassigned_order,
+         data=lambda fx: {'order_id': fx['order_id']}),
+    Case('rider/cancel-orders/', method='post', role='rider', setup=_assigned_order,
+         data=lambda fx: {'order_id': fx['order_id']}),
+    Case('rider/complete-orders/', method='post', role='rider', setup=_assigned_order,
+         data=lambda fx: {'order_id': fx['order_id']}),
+    # 基准客户端不经过 ASGI，只测量建立连接前的查询与退回的响应
+    Case('rider/events/', role='rider', expect_status=501),
+
+    Case('merchant/', role='merchant'),
+    Case('merchant/add-meal/', method='post', role='merchant',
+         data=lambda fx: {'meal-name': '基准新增餐品', 'meal-price': '18.80', 'meal-type': 'lunch',
+                          'platform-id': fx['platform_id']}),
+    Case('merchant/get-meals/', role='merchant'),
+    Case('merchant/edit-meal/<int:meal_id>/', method='post', role='merchant', setup=_new_meal,
+         kwargs=lambda fx: {'meal_id': fx['meal_id']},
+         data=lambda fx: {'meal-name': '基准修改餐品', 'meal-price': '19.90', 'meal-type': 'dinner',
+                          'platform-id': fx['platform_id']}),
+    Case('merchant/delete-meal/<int:meal_id>/', method='post', role='merchant', setup=_new_meal,
+         kwargs=lambda fx: {'meal_id': fx['meal_id']}),
+    Case('merchant/apply-platform/', method='post', role='merchant', setup=_without_enter_request,
+         data=lambda fx: {'platform_id': fx['platform_id']}),
+    Case('merchant/set-discount/', method='post', role='merchant',
+         data=lambda fx: {'platform-id': fx['platform_id'], 'discount-id': fx['discount_id']}),
+    Case('merchant/edit-discount/<int:discount_id>/', method='post', role='merchant', setup=_merchant_discount,
+         kwargs=lambda fx: {'discount_id': fx['merchant_discount_id']},
+         data=lambda fx: {'discount-id': fx['discount_id']}),
+    Case('merchant/delete-discount/<int:discount_id>/', method='post', role='merchant', setup=_merchant_discount,
+         kwargs=lambda fx: {'discount_id': fx['merchant_discount_id']}),
+    Case('merchant/get-discounts/', role='merchant'),
+    Case('merchant/get-orders/', role='merchant'),
+    Case('merchant/get-orders/', name='GET merchant/get-orders/?since', role='merchant', data=_sync_since),
+    Case('merchant/get-sales/', role='merchant'),
+    Case('merchant/delete-order/<int:order_id>/', method='post', role='merchant',
+         setup=_deletable_order, kwargs=_order_kwargs),
+    Case('merchant/events/', role='merchant', expect_status=501),
+
+    Case('platform/', role='platform'),
+    Case('platform/approve-merchant-request/', method='post', role='platform',
+         setup=_request_with_status('enter_request', 'merchant_id', 'merchant_id', 'pending'),
+         data=lambda fx: {'request_id': fx['request_id']}),
+    Case('platform/reject-merchant-request/', method='post', role='platform',
+         setup=_request_with_status('enter_request', 'merchant_id', 'merchant_id', 'pending'),
+         data=lambda fx: {'request_id': fx['request_id']}),
+    Case('platform/remove-merchant/', method='post', role='platform',
+         setup=_request_with_status('enter_request', 'merchant_id', 'merchant_id', 'approved'),
+         data=lambda fx: {'request_id': fx['request_id']}),
+    Case('platform/approve-rider-request/', method='post', role='platform',
+         setup=_request_with_status('sign_request', 'rider_id', 'rider_id', 'pending'),
+         data=lambda fx: {'request_id': fx['request_id']}),
+    Case('platform/reject-rider-request/', method='post', role='platform',
+         setup=_request_with_status('sign_request', 'rider_id', 'rider_id', 'pending'),
+         data=lambda fx: {'request_id': fx['request_id']}),
+    Case('platform/remove-rider/', method='post', role='platform',
+         setup=_request_with_status('sign_request', 'rider_id', 'rider_id', 'approved'),
+         data=lambda fx: {'request_id': fx['request_id']}),
+    Case('platform/delete-order/', method='post', role='platform', setup=_deletable_order,
+         data=lambda fx: {'order_id': fx['order_id']}),
+    Case('platform/get-sales/', role='platform'),
+    Case('platform/get-sla/', role='platform'),
+    Case('platform/import-onboarding/', method='post', role='staff', data=_onboarding_file),
+]
+
+
+def iter_routes(resolver=None, prefix=''):
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            if route in SKIPPED_ROUTES:
+                continue
+            yield from iter_routes(pattern, route)
+        elif isinstance(pattern, URLPattern):
+            yield route
+
+
+def uncovered_routes(cases=CASES):
+    covered = {case.route for case in cases}
+    return sorted(route for route in set(iter_routes()) if route not in covered and route not in SKIPPED_ROUTES)
+
+
+# ---- 执行 ----
+
+def build_fixtures(prefix, world_params):
+    """从数据集中选定基准使用的顾客、商家、平台、骑手与餐品（选择方式固定，多次运行一致）"""
+    world = load_world(prefix, world_params)
+    storefronts = sorted(world['storefronts'], key=lambda pair: (pair not in world['discounts'], pair))
+    merchant_id, platform_id = next(
+        pair for pair in storefronts if world['riders_by_platform'].get(pair[1])
+    )
+    meal = world['menus'][(merchant_id, platform_id)][0]
+    discount = world['discounts'].get((merchant_id, platform_id)) or execute_fetchone(
+        'SELECT id, discount_rate FROM discount ORDER BY id LIMIT 1'
+    )
+    fx = {
+        'password': world_params['password'],
+        'customer_id': world['customers'][0],
+        'customer_name': world['customer_names'][world['customers'][0]],
+        'merchant_id': merchant_id,
+        'merchant_name': world['merchant_names'][merchant_id],
+        'platform_id': platform_id,
+        'rider_id': world['riders_by_platform'][platform_id][0],
+        'meal_id': meal['id'],
+        'meal_name': meal['name'],
+        'meal_price': meal['price'],
+        'discount_id': discount['id'] if discount else None,
+    }
+    for role in ROLES:
+        row = execute_fetchone(
+            f'''
+            SELECT u.username
+            FROM {quote_table(role)} t
+            JOIN user_profile up ON t.user_profile_id = up.id
+            JOIN auth_user u ON up.user_id = u.id
+            WHERE t.id = %s
+            ''',
+            [fx[f'{role}_id']],
+        )
+        fx[f'{role}_username'] = row['username']
+    fx['platform_name'] = execute_fetchone(
+        f'SELECT platform_name FROM {quote_table("platform")} WHERE id = %s', [platform_id]
+    )['platform_name']
+    fx['staff_username'] = f'{prefix}bench_staff'
+    return fx
+
+
+def _ensure_staff(fx):
+    User = get_user_model()
+    if not User.objects.filter(username=fx['staff_username']).exists():
+        User.objects.create_user(fx['staff_username'], password=fx['password'], is_staff=True)
+
+
+def login_clients(fx):
+    _ensure_staff(fx)
+    clients = {None: Client(raise_request_exception=False)}
+    for role in ROLES:
+        client = Client(raise_request_exception=False)
+        response = client.post('/login/', {
+            'username': fx[f'{role}_username'], 'password': fx['password'], 'user_type': role,
+        })
+        if response.status_code != 302:
+            raise RuntimeError(f'{role} 账号登录失败')
+        clients[role] = client
+    # 管理员没有角色资料，无法走登录页，直接建立会话
+    clients['staff'] = Client(raise_request_exception=False)
+    clients['staff'].force_login(get_user_model().objects.get(username=fx['staff_username']))
+    return clients
+
+
+def _send(client, case, path, data):
+    if case.method == 'get':
+        return client.get(path, data)
+    if case.method == 'delete':
+        return client.delete(path)
+    if case.json_body:
+        return client.post(path, json.dumps(data), content_type='application/json')
+    return client.post(path, data)
+
+
+def _check(case, response):
+    if case.expect_status is not None:
+        return None if response.status_code == case.expect_status else f'HTTP {response.status_code}'
+    if response.status_code >= 400:
+        return f'HTTP {response.status_code}'
+    if response.get('Content-Type', '').startswith('application/json'):
+        payload = response.json()
+        if payload.get('success') is False:
+            return payload.get('message') or 'success=false'
+    return None
+
+
+def _run_once(case, clients, fx, trace_memory=False):
+    """执行一次请求并回滚（主库与各订单分片），返回 (seconds, queries, alloc_bytes, failure)"""
+    databases = [DEFAULT_DB_ALIAS, *shard_aliases()]
+    with ExitStack() as stack:
+        for alias in databases:
+            stack.enter_context(transaction.atomic(using=alias))
+        local = dict(fx)
+        if case.setup:
+            local.update(case.setup(local) or {})
+        client = Client(raise_request_exception=False) if case.role == 'anonymous' else clients[case.role]
+        path = case.path(local)
+        data = case.data(local) if case.data else None
+        gc.collect()
+        if trace_memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        # 异步视图的查询在数据库线程池中执行，按所有线程计数
+        with count_queries() as queries:
+            started = time.perf_counter()
+            response = _send(client, case, path, data)
+            seconds = time.perf_counter() - started
+        allocated = 0
+        if trace_memory:
+            allocated = tracemalloc.get_traced_memory()[1] - before
+            tracemalloc.stop()
+        for alias in databases:
+            transaction.set_rollback(True, using=alias)
+    return seconds, queries.count, allocated, _check(case, response)
+
+
+def run_case(case, clients, fx, iterations):
+    _run_once(case, clients, fx)  # 预热：模板编译、连接建立等一次性开销
+    timings, query_counts, failure = [], [], None
+    for _ in range(iterations):
+        seconds, queries, _, failure = _run_once(case, clients, fx)
+        timings.append(seconds)
+        query_counts.append(queries)
+    _, _, allocated, memory_failure = _run_once(case, clients, fx, trace_memory=True)
+    return {
+        'time_ms': round(statistics.median(timings) * 1000, 3),
+        'queries': max(query_counts),
+        'alloc_kb': round(allocated / 1024, 1),
+        'failure': failure or memory_failure,
+    }
+
+
+def compare(results, baseline, threshold, min_time_ms=5.0, min_alloc_kb=64.0):
+    """
+    返回回归列表：SQL 次数只要增加即视为回归；耗时与内存超过阈值且绝对增量超过下限才算，
+    基准中没有记录耗时、内存（随仓库提交的基准）时不比较这两项
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(f'{name}: SQL 次数 {previous["queries"]} → {current["queries"]}')
+        for metric, floor, unit in (('time_ms', min_time_ms, 'ms'), ('alloc_kb', min_alloc_kb, 'KB')):
+            if metric not in previous:
+                continue
+            before, after = previous[metric], current[metric]
+            if after > before * (1 + threshold) and after - before > floor:
+                regressions.append(f'{name}: {metric} {before}{unit} → {after}{unit}')
+    return regressions
@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.db.utils import load_backend
+from django.test import Client
+
+from platforme.onboarding import OnboardingImporter
+from Project import hashing
+from Project.bench import allow_test_host, delete_users_by_prefix, run_concurrently, summarize
+from Project.db_backends.pool import close_pools
+
+MODES = ('direct', 'pooled')
+
+
+def make_wrapper(pooled):
+    """按当前 default 配置构造一个直连或带连接池的 DatabaseWrapper，两者只有 ENGINE 和 pool 选项不同"""
+    settings_dict = dict(connections.settings['default'])
+    vendor = settings_dict['ENGINE'].rsplit('.', 1)[-1]
+    options = dict(settings_dict['OPTIONS'])
+    options.pop('pool', None)
+    if pooled:
+        engine = f'Project.db_backends.{vendor}'
+        options['pool'] = settings.DATABASE_POOL
+    else:
+        engine = f'django.db.backends.{vendor}'
+    settings_dict.update(ENGINE=engine, OPTIONS=options, CONN_MAX_AGE=0)
+    return load_backend(engine).DatabaseWrapper(settings_dict, 'default')
+
+
+class Command(BaseCommand):
+    help = '对比直连与连接池两种模式下，建立连接的耗时和单个请求的延迟，得出每个请求省下的握手开销'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='每种模式的请求次数')
+        parser.add_argument('--connects', type=int, default=50, help='每种模式单独测量 连接 → SELECT 1 → 关闭 的次数')
+        parser.add_argument('--workers', type=int, default=1, help='并发线程数')
+        parser.add_argument('--path', default='/customer/get-orders/', help='压测的页面（以临时顾客身份访问）')
+
+    def handle(self, *args, **options):
+        prefix = f'bench_conn_{uuid.uuid4().hex[:8]}_'
+        username = f'{prefix}customer'
+        OnboardingImporter(default_password=uuid.uuid4().hex).import_records([
+            {'type': 'customer', 'username': username, 'customer_name': username},
+        ])
+        user = get_user_model().objects.get(username=username)
+        connections['default'].close()
+
+        result = {'benchmark': 'connections', 'path': options['path'], 'workers': options['workers']}
+        try:
+            with allow_test_host():
+                for mode in MODES:
+                    result[mode] = self._run_mode(mode == 'pooled', user, options)
+        finally:
+            close_pools()
+            hashing.shutdown()
+            delete_users_by_prefix(prefix)
+
+        direct, pooled = result['direct'], result['pooled']
+        result['handshake_saved_ms'] = round(direct['connect']['mean'] - pooled['connect']['mean'], 3)
+        result['request_p50_saved_ms'] = round(
+            direct['requests']['latency_ms']['p50'] - pooled['requests']['latency_ms']['p50'], 3
+        )
+        self.stdout.write(json.dumps(result, indent=2, ensure_ascii=False))
+
+    def _run_mode(self, pooled, user, options):
+        close_pools()
+        wrapper = make_wrapper(pooled)
+        connect_times = []
+        for _ in range(options['connects']):
+            started = time.perf_counter()
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            wrapper.close()
+            connect_times.append(time.perf_counter() - started)
+        stats_before = dict(wrapper.pool.stats) if pooled else None
+
+        local = threading.local()
+
+        def request_once(index):
+            if not hasattr(local, 'client'):
+                # 替换当前线程的 default 连接；run_concurrently 的线程结束时会 close_all()
+                connections['default'] = make_wrapper(pooled)
+                local.client = Client()
+                local.client.force_login(user)
+                close_old_connections()
+            response = local.client.get(options['path'])
+            # 测试客户端不会在请求结束时关闭连接，这里模拟 WSGI 服务器的 request_finished
+            close_old_connections()
+            if response.status_code != 200:
+                raise RuntimeError(f'{options["path"]} returned {response.status_code}')
+
+        requests = run_concurrently(request_once, options['iterations'], options['workers'])
+        connect = summarize(connect_times, sum(connect_times))['latency_ms']
+        mode_result = {'connect': connect, 'requests': requests}
+        if pooled:
+            mode_result['pool'] = {
+                key: value - stats_before[key] for key, value in wrapper.pool.stats.items()
+            }
+        return mode_result
@@ -0,0 +1,79 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from loadtest.endpoints import build_fixtures, login_clients
+from loadtest.world import WorldParamsMismatch, load_world_params
+from Project import hashing
+from Project.bench import allow_test_host, count_queries, injected_latency, summarize
+
+# 压测的首页：{路径: 登录角色}
+DASHBOARDS = {
+    '/platform/': 'platform',
+    '/merchant/': 'merchant',
+}
+MODES = ('sequential', 'parallel')
+
+
+class Command(BaseCommand):
+    help = '注入数据库网络延迟，对比平台、商家首页的各部分查询依次执行与并发执行（DB_PARALLEL_QUERIES）的延迟'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='lt_', help='generate_world 使用的前缀')
+        parser.add_argument('--iterations', type=int, default=20, help='每个页面、每种方式的请求次数')
+        parser.add_argument('--latency-ms', type=float, default=20, help='每条 SQL 注入的网络往返延迟（毫秒）')
+        parser.add_argument('--output', default=None, help='报告写入的 JSON 文件')
+
+    def handle(self, *args, **options):
+        try:
+            world_params = load_world_params(options['prefix'])
+        except WorldParamsMismatch as exc:
+            raise CommandError(str(exc))
+
+        report = {
+            'benchmark': 'dashboards',
+            'iterations': options['iterations'],
+            'latency_ms': options['latency_ms'],
+            'dashboards': {},
+        }
+        try:
+            with allow_test_host():
+                clients = login_clients(build_fixtures(options['prefix'], world_params))
+                for path, role in DASHBOARDS.items():
+                    result = {
+                        mode: self._run_mode(clients[role], path, mode == 'parallel', options)
+                        for mode in MODES
+                    }
+                    sequential, parallel = (result[mode]['latency_ms']['p50'] for mode in MODES)
+                    result['p50_speedup'] = round(sequential / parallel, 2) if parallel else None
+                    report['dashboards'][path] = result
+        finally:
+            hashing.shutdown()
+
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(output)
+        self.stdout.write(output)
+
+    def _run_mode(self, client, path, parallel, options):
+        latencies = []
+        errors = 0
+        with override_settings(DB_PARALLEL_QUERIES=parallel), injected_latency(options['latency_ms']):
+            # 预热一次：模板编译、连接池建立连接不计入
+            client.get(path)
+            with count_queries() as queries:
+                started = time.perf_counter()
+                for _ in range(options['iterations']):
+                    request_started = time.perf_counter()
+                    response = client.get(path)
+                    if response.status_code != 200:
+                        errors += 1
+                        continue
+                    latencies.append(time.perf_counter() - request_started)
+                elapsed = time.perf_counter() - started
+        result = summarize(latencies, elapsed, errors)
+        result['queries_per_request'] = round(queries.count / options['iterations'], 1)
+        return result
@@ -0,0 +1,114 @@
+import json
+import os
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from loadtest.endpoints import CASES, build_fixtures, compare, login_clients, run_case, uncovered_routes
+from loadtest.world import WorldParamsMismatch, load_world_params
+from Project import hashing
+from Project.bench import allow_test_host
+from Project.sharding import order_databases
+
+# 随仓库提交的基准：SQLite、不分片、generate_world 默认参数的数据集；
+# 其他数据库或数据集请用 --baseline 指定另一个文件，并先以 --update-baseline 生成
+DEFAULT_BASELINE = str(Path(__file__).resolve().parents[2] / 'baselines.json')
+# 提交的基准在不同机器上使用，只记录与机器无关的 SQL 次数；耗时与内存只和在同一台机器上以
+# --update-baseline 生成的基准文件比较
+SHARED_BASELINE_METRICS = ('queries',)
+# 数据集参数中不影响数据形态的项：订单时间相对生成时刻分布，不同日期生成的默认数据集可以共用基准
+VOLATILE_WORLD_PARAMS = ('end',)
+
+
+class Command(BaseCommand):
+    help = ('逐个接口测量耗时、SQL 次数与内存分配，并与基准文件比较，超过阈值时以非零状态退出；'
+            '随仓库提交的默认基准只比较 SQL 次数')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='lt_', help='generate_world 使用的前缀')
+        parser.add_argument('--iterations', type=int, default=5, help='每个接口计时的次数（取中位数）')
+        parser.add_argument('--only', default=None, help='只运行名称中包含该字符串的用例')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基准文件路径')
+        parser.add_argument('--update-baseline', action='store_true', help='用本次结果覆盖基准文件')
+        parser.add_argument('--threshold', type=float, default=0.25, help='耗时与内存允许的相对增幅')
+        parser.add_argument('--min-time-delta', type=float, default=5.0, help='耗时增量低于该值（毫秒）时不算回归')
+        parser.add_argument('--min-alloc-delta', type=float, default=64.0, help='内存增量低于该值（KB）时不算回归')
+        parser.add_argument('--output', default=None, help='本次结果写入的 JSON 文件')
+
+    def handle(self, *args, **options):
+        missing = uncovered_routes()
+        if missing:
+            raise CommandError(f'以下路由没有基准用例，请在 loadtest/endpoints.py 中补充: {", ".join(missing)}')
+        try:
+            world_params = load_world_params(options['prefix'])
+        except WorldParamsMismatch as exc:
+            raise CommandError(str(exc))
+
+        cases = [case for case in CASES if not options['only'] or options['only'] in case.name]
+        results = {}
+        try:
+            with allow_test_host():
+                fixtures = build_fixtures(options['prefix'], world_params)
+                clients = login_clients(fixtures)
+                for case in cases:
+                    results[case.name] = run_case(case, clients, fixtures, options['iterations'])
+                    self.stdout.write(f'{case.name}: {json.dumps(results[case.name], ensure_ascii=False)}')
+        finally:
+            hashing.shutdown()
+
+        meta = {
+            'vendor': connection.vendor,
+            'order_databases': [alias or 'default' for alias in order_databases()],
+            'world': options['prefix'],
+            'world_params': {key: value for key, value in world_params.items() if key not in VOLATILE_WORLD_PARAMS},
+        }
+        failures = [f'{name}: {result["failure"]}' for name, result in results.items() if result['failure']]
+
+        # 基准缺失或来自不同的数据库、数据集时无法比较，直接失败，不把没有比较当作通过；
+        # --update-baseline 时重新生成，不合并旧文件中的用例
+        baseline = {}
+        if os.path.exists(options['baseline']):
+            with open(options['baseline'], encoding='utf-8') as handle:
+                stored = json.load(handle)
+            if stored.get('meta') == meta:
+                baseline = stored.get('cases', {})
+            elif not options['update_baseline']:
+                raise CommandError(
+                    f'基准文件 {options["baseline"]} 来自不同的数据库或数据集，无法比较：\n'
+                    f'基准 {json.dumps(stored.get("meta"), ensure_ascii=False, sort_keys=True)}\n'
+                    f'本次 {json.dumps(meta, ensure_ascii=False, sort_keys=True)}\n'
+                    '请用 --baseline 指定对应的基准文件，或以 --update-baseline 重新生成'
+                )
+        elif not options['update_baseline']:
+            raise CommandError(f'基准文件 {options["baseline"]} 不存在，请先以 --update-baseline 生成')
+        regressions = compare(results, baseline, options['threshold'],
+                              options['min_time_delta'], options['min_alloc_delta'])
+        unbaselined = sorted(name for name in results if name not in baseline)
+        if unbaselined and not options['update_baseline']:
+            self.stderr.write(self.style.WARNING(
+                f'以下 {len(unbaselined)} 个用例没有基准，未参与比较: {", ".join(unbaselined)}'
+            ))
+
+        report = {'meta': meta, 'cases': results, 'failures': failures, 'regressions': regressions}
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(report, handle, indent=2, ensure_ascii=False)
+
+        if options['update_baseline']:
+            if failures:
+                raise CommandError('存在失败的用例，未更新基准: ' + '; '.join(failures))
+            shared = os.path.abspath(options['baseline']) == DEFAULT_BASELINE
+            merged = {**baseline, **{
+                name: {key: value for key, value in result.items()
+                       if key != 'failure' and (not shared or key in SHARED_BASELINE_METRICS)}
+                for name, result in results.items()
+            }}
+            with open(options['baseline'], 'w', encoding='utf-8') as handle:
+                json.dump({'meta': meta, 'cases': merged}, handle, indent=2, ensure_ascii=False, sort_keys=True)
+            self.stdout.write(f'基准已写入 {options["baseline"]}')
+            return
+
+        if failures or regressions:
+            raise CommandError('\n'.join(['接口基准未通过:', *failures, *regressions]))
+        self.stdout.write(f'{len(results) - len(unbaselined)} 个用例均未超过基准')
@@ -0,0 +1,81 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from loadtest.endpoints import build_fixtures, login_clients
+from loadtest.servers import run_asgi, run_wsgi
+from loadtest.world import WorldParamsMismatch, load_world_params
+from Project import hashing
+from Project.bench import allow_test_host, injected_latency
+
+
+def bench_paths(fx):
+    """压测的读接口：{名称: (路径, 查询字符串)}，以基准顾客身份访问"""
+    return {
+        'customer/get-orders/': ('/customer/get-orders/', ''),
+        'customer/get-merchant-detail/': (
+            f'/customer/get-merchant-detail/{fx["merchant_id"]}/{fx["platform_id"]}/', '',
+        ),
+        'customer/search-merchants/': ('/customer/search-merchants/', f'platform_id={fx["platform_id"]}'),
+        'register/check-username/': ('/register/check-username/', f'username={fx["customer_username"]}'),
+    }
+
+
+class Command(BaseCommand):
+    help = '同一组读接口分别以 WSGI（线程池）与 ASGI（事件循环）方式处理，注入数据库网络延迟，对比吞吐量与延迟'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='lt_', help='generate_world 使用的前缀')
+        parser.add_argument('--requests', type=int, default=200, help='每个接口、每种方式的请求数')
+        parser.add_argument('--concurrency', type=int, default=32, help='客户端保持的在途请求数')
+        parser.add_argument('--wsgi-threads', type=int, default=8, help='WSGI 方式处理请求的线程数')
+        parser.add_argument('--latency-ms', type=float, default=20, help='每条 SQL 注入的网络往返延迟（毫秒）')
+        parser.add_argument('--only', default=None, help='只运行名称中包含该字符串的接口')
+        parser.add_argument('--output', default=None, help='报告写入的 JSON 文件')
+
+    def handle(self, *args, **options):
+        try:
+            world_params = load_world_params(options['prefix'])
+        except WorldParamsMismatch as exc:
+            raise CommandError(str(exc))
+
+        from Project.asgi import application as asgi_application
+        from Project.wsgi import application as wsgi_application
+
+        report = {
+            'benchmark': 'servers',
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'wsgi_threads': options['wsgi_threads'],
+            'db_async_threads': settings.DB_ASYNC_THREADS,
+            'latency_ms': options['latency_ms'],
+            'endpoints': {},
+        }
+        try:
+            with allow_test_host():
+                fx = build_fixtures(options['prefix'], world_params)
+                client = login_clients(fx)['customer']
+                cookie = '; '.join(f'{name}={morsel.value}' for name, morsel in client.cookies.items())
+                for name, (path, query) in bench_paths(fx).items():
+                    if options['only'] and options['only'] not in name:
+                        continue
+                    requests = [(path, query, cookie)] * options['requests']
+                    with injected_latency(options['latency_ms']):
+                        wsgi = run_wsgi(wsgi_application, requests, options['concurrency'], options['wsgi_threads'])
+                        asgi = run_asgi(asgi_application, requests, options['concurrency'])
+                    report['endpoints'][name] = {
+                        'wsgi': wsgi,
+                        'asgi': asgi,
+                        'throughput_ratio': round(
+                            asgi['throughput_per_second'] / wsgi['throughput_per_second'], 2
+                        ) if wsgi['throughput_per_second'] else None,
+                    }
+        finally:
+            hashing.shutdown()
+
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(output)
+        self.stdout.write(output)
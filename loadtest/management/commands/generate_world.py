@@ -0,0 +1,28 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from loadtest.world import DEFAULT_PARAMS, WorldParamsMismatch, generate_world
+from Project import hashing
+
+
+class Command(BaseCommand):
+    help = '生成用于压测的合成数据集（平台、商家菜单、折扣、顾客、骑手、历史订单与评价），可中断后续跑'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='lt_', help='账号前缀，同时作为数据集名称与检查点的键')
+        for name, default in DEFAULT_PARAMS.items():
+            option = '--' + name.replace('_', '-')
+            parser.add_argument(option, type=type(default), default=default, dest=name,
+                                help=f'默认 {default}')
+
+    def handle(self, *args, **options):
+        params = {name: options[name] for name in DEFAULT_PARAMS}
+        try:
+            checkpoint = generate_world(options['prefix'], params, log=self.stdout.write)
+        except WorldParamsMismatch as exc:
+            raise CommandError(str(exc))
+        finally:
+            hashing.shutdown()
+        checkpoint['params'] = json.loads(checkpoint['params'])
+        self.stdout.write(json.dumps(checkpoint, indent=2, ensure_ascii=False, default=str))
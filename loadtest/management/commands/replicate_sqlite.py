@@ -0,0 +1,40 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from Project.db_router import REPLICA_DB_ALIAS, replica_configured
+
+
+class Command(BaseCommand):
+    help = '本地模拟主从复制：每隔 --lag 秒把 SQLite 主库整体复制到从库文件，从库数据最多落后 lag 秒'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lag', type=float, default=2.0, help='复制间隔（秒），即人为的复制延迟')
+        parser.add_argument('--once', action='store_true', help='只复制一次后退出（用于初始化从库）')
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError('未配置从库，请设置 DJANGO_DB_PROFILE=sqlite 和 DJANGO_SQLITE_REPLICA_PATH')
+        primary = connections['default'].settings_dict
+        replica = connections[REPLICA_DB_ALIAS].settings_dict
+        if primary['ENGINE'].rsplit('.', 1)[-1] != 'sqlite3':
+            raise CommandError('replicate_sqlite 只适用于 SQLite 配置')
+
+        while True:
+            started = time.perf_counter()
+            self._copy(primary['NAME'], replica['NAME'])
+            self.stdout.write(f'replicated in {(time.perf_counter() - started) * 1000:.1f} ms')
+            if options['once']:
+                return
+            time.sleep(options['lag'])
+
+    def _copy(self, source_path, target_path):
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
@@ -0,0 +1,52 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from loadtest.rush import CURVES, LunchRush
+from loadtest.world import WorldParamsMismatch, load_world_params
+from Project import hashing
+from Project.bench import allow_test_host
+
+
+class Command(BaseCommand):
+    help = '在 generate_world 生成的数据集上模拟午高峰：顾客下单、商家轮询、骑手抢单送餐、顾客取餐评价，输出各接口统计 JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='lt_', help='generate_world 使用的前缀')
+        parser.add_argument('--duration', type=float, default=60, help='顾客到达持续时间（秒）')
+        parser.add_argument('--curve', choices=CURVES, default='lunch', help='到达曲线')
+        parser.add_argument('--peak-rate', type=float, default=5, help='高峰时每秒到达的顾客数')
+        parser.add_argument('--customers', type=int, default=50, help='参与的顾客账号数')
+        parser.add_argument('--merchants', type=int, default=20, help='轮询订单的商家数')
+        parser.add_argument('--riders', type=int, default=20, help='抢单骑手数')
+        parser.add_argument('--workers', type=int, default=16, help='同时进行的顾客会话上限')
+        parser.add_argument('--pickup-workers', type=int, default=4, help='处理取餐与评价的线程数')
+        parser.add_argument('--merchant-poll', type=float, default=5, help='商家轮询间隔（秒）')
+        parser.add_argument('--rider-poll', type=float, default=1, help='骑手无单可接时的等待（秒）')
+        parser.add_argument('--delivery-seconds', type=float, default=3, help='骑手接单到送达的时间（秒）')
+        parser.add_argument('--rating-ratio', type=float, default=0.5, help='取餐后评价的比例')
+        parser.add_argument('--time-scale', type=float, default=1.0, help='所有等待时间的缩放系数')
+        parser.add_argument('--drain-seconds', type=float, default=15, help='到达结束后等待订单履约的最长时间')
+        parser.add_argument('--seed', type=int, default=7, help='随机种子')
+        parser.add_argument('--output', default=None, help='报告写入的 JSON 文件')
+
+    def handle(self, *args, **options):
+        try:
+            world_params = load_world_params(options['prefix'])
+        except WorldParamsMismatch as exc:
+            raise CommandError(str(exc))
+
+        keys = ('duration', 'curve', 'peak_rate', 'customers', 'merchants', 'riders', 'workers',
+                'pickup_workers', 'merchant_poll', 'rider_poll', 'delivery_seconds', 'rating_ratio',
+                'time_scale', 'drain_seconds', 'seed')
+        try:
+            with allow_test_host():
+                report = LunchRush(options['prefix'], world_params, {key: options[key] for key in keys}).run()
+        finally:
+            hashing.shutdown()
+
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(output)
+        self.stdout.write(output)
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('world', models.CharField(max_length=50, unique=True, verbose_name='数据集前缀')),
+                ('params', models.TextField(verbose_name='生成参数')),
+                ('stage', models.CharField(default='accounts', max_length=20, verbose_name='当前阶段')),
+                ('order_id_base', models.BigIntegerField(blank=True, null=True, verbose_name='订单起始ID')),
+                ('batches_done', models.PositiveIntegerField(default=0, verbose_name='已完成批次')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '数据生成检查点',
+                'verbose_name_plural': '数据生成检查点',
+                'db_table': 'loadtest_checkpoint',
+            },
+        ),
+    ]
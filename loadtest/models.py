@@ -0,0 +1,20 @@
+# loadtest/models.py
+from django.db import models
+
+
+class GenerationCheckpoint(models.Model):
+    """generate_world 的进度：每个 world（账号前缀）一行，订单批次与检查点在同一事务中提交"""
+    world = models.CharField(max_length=50, unique=True, verbose_name="数据集前缀")
+    params = models.TextField(verbose_name="生成参数")
+    stage = models.CharField(max_length=20, default='accounts', verbose_name="当前阶段")
+    order_id_base = models.BigIntegerField(null=True, blank=True, verbose_name="订单起始ID")
+    batches_done = models.PositiveIntegerField(default=0, verbose_name="已完成批次")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'loadtest_checkpoint'
+        verbose_name = '数据生成检查点'
+        verbose_name_plural = '数据生成检查点'
+
+    def __str__(self):
+        return f"{self.world} - {self.stage} ({self.batches_done})"
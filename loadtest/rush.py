@@ -0,0 +1,399 @@
+"""
+午高峰端到端压测：在 generate_world 生成的数据集上，用测试客户端并发驱动真实视图。
+
+- 顾客按到达曲线（非齐次泊松过程）到来：浏览首页 → 搜索商家 → 查看商家 → 下单 → 查看订单；
+- 商家定时轮询 merchant/get-orders；
+- 骑手定时刷新骑手首页，从本平台待接订单中抢单（多个骑手可能抢同一单，失败计为冲突）→ 送达；
+- 送达后顾客取餐，并按比例评价（先读取订单明细，再提交评价）。
+
+每个请求都记录耗时与 SQL 次数，最终按接口汇总吞吐量、p50/p95/p99、错误率与冲突率。
+"""
+import itertools
+import json
+import math
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, connections
+from django.test import Client
+
+from loadtest.world import load_world
+from Project.bench import count_queries, summarize
+from Project.db_utils import execute_fetchall_in, quote_table
+
+CURVES = ('lunch', 'ramp', 'spike', 'flat')
+
+# 抢单失败（订单已被其他骑手接走）等业务冲突，不计为错误
+CONFLICT_MESSAGES = {
+    'accept_orders': {'没有找到对应的订单'},
+    'complete_orders': {'没有找到对应的订单'},
+    'pickup_order': {'只能取餐状态为"待取餐"的订单'},
+    'rate_order': {'订单已评价'},
+}
+
+
+def arrival_rate(curve, progress, peak):
+    """progress ∈ [0, 1] 时刻的到达率（人/秒）"""
+    base = peak * 0.15
+    if curve == 'flat':
+        return peak
+    if curve == 'ramp':
+        return peak * progress
+    if curve == 'spike':
+        return peak if 0.45 <= progress <= 0.55 else base
+    # lunch：以 50% 处为中心的钟形曲线
+    return base + (peak - base) * math.exp(-((progress - 0.5) / 0.18) ** 2)
+
+
+def arrival_times(curve, duration, peak, rng):
+    """thinning 算法生成非齐次泊松过程的到达时刻"""
+    times = []
+    now = 0.0
+    while peak > 0:
+        now += rng.expovariate(peak)
+        if now >= duration:
+            break
+        if rng.random() * peak <= arrival_rate(curve, now / duration, peak):
+            times.append(now)
+    return times
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.queries = {}
+        self.errors = {}
+        self.conflicts = {}
+        self.samples = {}
+        self.counters = {}
+
+    def record(self, endpoint, seconds, query_count, outcome, message=None):
+        with self.lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            self.queries.setdefault(endpoint, []).append(query_count)
+            if outcome == 'error':
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+                samples = self.samples.setdefault(endpoint, [])
+                if message and len(samples) < 5:
+                    samples.append(message)
+            elif outcome == 'conflict':
+                self.conflicts[endpoint] = self.conflicts.get(endpoint, 0) + 1
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def report(self, elapsed):
+        endpoints = {}
+        for endpoint in sorted(self.latencies):
+            latencies = self.latencies[endpoint]
+            errors = self.errors.get(endpoint, 0)
+            conflicts = self.conflicts.get(endpoint, 0)
+            summary = summarize(latencies, elapsed, errors)
+            summary['queries'] = {
+                'mean': round(sum(self.queries[endpoint]) / len(latencies), 2),
+                'max': max(self.queries[endpoint]),
+            }
+            summary['error_rate'] = round(errors / len(latencies), 4)
+            summary['conflicts'] = conflicts
+            summary['conflict_rate'] = round(conflicts / len(latencies), 4)
+            if endpoint in self.samples:
+                summary['error_samples'] = self.samples[endpoint]
+            endpoints[endpoint] = summary
+        total = sum(len(latencies) for latencies in self.latencies.values())
+        return {
+            'elapsed_seconds': round(elapsed, 3),
+            'requests': total,
+            'throughput_per_second': round(total / elapsed, 2) if elapsed > 0 else 0.0,
+            'flow': dict(sorted(self.counters.items())),
+            'endpoints': endpoints,
+        }
+
+
+class VirtualUser:
+    """一个已登录的测试客户端；同一用户的请求串行执行"""
+
+    def __init__(self, username, user_type, recorder):
+        self.username = username
+        self.user_type = user_type
+        self.recorder = recorder
+        self.client = Client(raise_request_exception=False)
+        self.lock = threading.Lock()
+
+    def request(self, endpoint, method, path, data=None, json_body=False):
+        with self.lock:
+            started = time.perf_counter()
+            outcome, message, payload = 'ok', None, None
+            # 只计本用户这次请求的查询，包括异步视图、run_parallel 交给数据库线程池执行的查询
+            with count_queries(scoped=True) as queries:
+                try:
+                    if method == 'get':
+                        response = self.client.get(path, data)
+                    elif json_body:
+                        response = self.client.post(path, json.dumps(data), content_type='application/json')
+                    else:
+                        response = self.client.post(path, data)
+                except Exception as exc:
+                    response = None
+                    outcome, message = 'error', f'{type(exc).__name__}: {exc}'
+            seconds = time.perf_counter() - started
+            # 测试客户端不会在请求结束时关闭连接，这里模拟 WSGI 服务器的 request_finished，把连接还给连接池
+            close_old_connections()
+
+        if response is not None:
+            if response.status_code >= 400:
+                outcome, message = 'error', f'HTTP {response.status_code}'
+            elif response.get('Content-Type', '').startswith('application/json'):
+                payload = response.json()
+                if payload.get('success') is False:
+                    message = payload.get('message', '')
+                    outcome = 'conflict' if message in CONFLICT_MESSAGES.get(endpoint, ()) else 'error'
+        self.recorder.record(endpoint, seconds, queries.count, outcome, message)
+        return payload if outcome == 'ok' else None, response
+
+    def login(self, password):
+        _, response = self.request('login', 'post', '/login/', {
+            'username': self.username, 'password': password, 'user_type': self.user_type,
+        })
+        if response is None or response.status_code != 302:
+            raise RuntimeError(f'{self.username} 登录失败')
+
+
+class LunchRush:
+    def __init__(self, prefix, world_params, options):
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.rng_lock = threading.Lock()
+        self.recorder = Recorder()
+        self.world = load_world(prefix, world_params)
+        self.password = world_params['password']
+        self.prefix = prefix
+        self.stopping = threading.Event()
+        self.draining = threading.Event()
+        # platform_id -> 已下单、尚未被接走的订单
+        self.open_orders = {}
+        self.open_lock = threading.Lock()
+        self.ready_orders = queue.Queue()
+        self.placed_by = {}
+
+    # ---- 准备 ----
+
+    def _usernames(self, table_name, entity_ids):
+        rows = execute_fetchall_in(
+            f'''
+            SELECT t.id, u.username
+            FROM {quote_table(table_name)} t
+            JOIN user_profile up ON t.user_profile_id = up.id
+            JOIN auth_user u ON up.user_id = u.id
+            WHERE t.id IN ({{placeholders}})
+            ''',
+            entity_ids,
+        )
+        names = {row['id']: row['username'] for row in rows}
+        return [names[entity_id] for entity_id in entity_ids]
+
+    def _login_all(self, users):
+        with ThreadPoolExecutor(max_workers=self.options['workers']) as executor:
+            list(executor.map(lambda user: user.login(self.password), users))
+        connections.close_all()
+
+    def setup(self):
+        opts = self.options
+        customers = self.rng.sample(self.world['customers'], min(opts['customers'], len(self.world['customers'])))
+        merchant_ids = list(dict.fromkeys(merchant_id for merchant_id, _ in self.world['storefronts']))
+        merchants = self.rng.sample(merchant_ids, min(opts['merchants'], len(merchant_ids)))
+        # 各平台轮流取骑手，保证每个平台都有人接单
+        groups = [self.world['riders_by_platform'][platform_id]
+                  for platform_id in sorted(self.world['riders_by_platform'])]
+        rider_ids = list(dict.fromkeys(
+            rider_id for group in itertools.zip_longest(*groups) for rider_id in group if rider_id
+        ))[:opts['riders']]
+        self.rider_platforms = {}
+        for platform_id, riders in self.world['riders_by_platform'].items():
+            for rider_id in riders:
+                self.rider_platforms.setdefault(rider_id, []).append(platform_id)
+
+        self.customers = [VirtualUser(name, 'customer', self.recorder)
+                          for name in self._usernames('customer', customers)]
+        self.merchants = [VirtualUser(name, 'merchant', self.recorder)
+                          for name in self._usernames('merchant', merchants)]
+        self.riders = [(rider_id, VirtualUser(name, 'rider', self.recorder))
+                       for rider_id, name in zip(rider_ids, self._usernames('rider', rider_ids))]
+        self._login_all(self.customers + self.merchants + [user for _, user in self.riders])
+
+    # ---- 角色行为 ----
+
+    def _choice(self, values):
+        with self.rng_lock:
+            return self.rng.choice(values)
+
+    def _random(self):
+        with self.rng_lock:
+            return self.rng.random()
+
+    def _sleep(self, seconds):
+        self.stopping.wait(seconds * self.options['time_scale'])
+
+    def customer_journey(self):
+        try:
+            user = self._choice(self.customers)
+            merchant_id, platform_id = self._choice(self.world['storefronts'])
+            menu = self.world['menus'][(merchant_id, platform_id)]
+            self.recorder.count('arrivals')
+
+            user.request('customer', 'get', '/customer/')
+            user.request('search_merchants', 'get', '/customer/search-merchants/',
+                         {'platform_id': platform_id, 'meal_name': self._choice(menu)['name'][:2]})
+            user.request('get_merchant_detail', 'get',
+                         f'/customer/get-merchant-detail/{merchant_id}/{platform_id}/')
+            self._sleep(2)
+
+            with self.rng_lock:
+                picked = self.rng.sample(menu, min(len(menu), self.rng.randint(1, 3)))
+                quantities = [self.rng.choice([1, 1, 2]) for _ in picked]
+            discount = self.world['discounts'].get((merchant_id, platform_id))
+            payload, _ = user.request('place_order', 'post', '/customer/place-order/', {
+                'merchant_id': merchant_id,
+                'platform_id': platform_id,
+                'discount_id': discount['id'] if discount else None,
+                'meals': [{'meal_id': meal['id'], 'quantity': quantity}
+                          for meal, quantity in zip(picked, quantities)],
+                'total_price': '0',
+            }, json_body=True)
+            if payload:
+                order_id = payload['orders'][0]['id']
+                self.recorder.count('orders_placed')
+                with self.open_lock:
+                    self.placed_by[order_id] = user
+                    self.open_orders.setdefault(platform_id, []).append(order_id)
+            user.request('customer_get_orders', 'get', '/customer/get-orders/')
+        finally:
+            connections.close_all()
+
+    def merchant_loop(self, user):
+        try:
+            while not self.stopping.is_set():
+                user.request('merchant_get_orders', 'get', '/merchant/get-orders/')
+                self._sleep(self.options['merchant_poll'])
+        finally:
+            connections.close_all()
+
+    def _candidate_order(self, platform_ids):
+        with self.open_lock:
+            pool = [order_id for platform_id in platform_ids for order_id in self.open_orders.get(platform_id, [])]
+            if not pool:
+                return None
+            # 只在最早的几单里随机挑选，模拟多个骑手同时盯着同一批订单
+            return self._choice(sorted(pool)[:5])
+
+    def _discard_open_order(self, order_id):
+        with self.open_lock:
+            for orders in self.open_orders.values():
+                if order_id in orders:
+                    orders.remove(order_id)
+
+    def rider_loop(self, rider_id, user):
+        platform_ids = self.rider_platforms.get(rider_id, [])
+        polls = 0
+        try:
+            while not self.stopping.is_set():
+                if polls % 5 == 0:
+                    user.request('rider', 'get', '/rider/')
+                polls += 1
+                order_id = self._candidate_order(platform_ids)
+                if order_id is None:
+                    if self.draining.is_set():
+                        return
+                    self._sleep(self.options['rider_poll'])
+                    continue
+                payload, _ = user.request('accept_orders', 'post', '/rider/accept-orders/', {'order_id': order_id})
+                self._discard_open_order(order_id)
+                if not payload:
+                    continue
+                self.recorder.count('orders_accepted')
+                self._sleep(self.options['delivery_seconds'])
+                payload, _ = user.request('complete_orders', 'post', '/rider/complete-orders/',
+                                          {'order_id': order_id})
+                if payload:
+                    self.recorder.count('orders_delivered')
+                    self.ready_orders.put(order_id)
+        finally:
+            connections.close_all()
+
+    def pickup_loop(self):
+        try:
+            while True:
+                try:
+                    order_id = self.ready_orders.get(timeout=0.2)
+                except queue.Empty:
+                    if self.stopping.is_set():
+                        return
+                    continue
+                user = self.placed_by[order_id]
+                payload, _ = user.request('pickup_order', 'post', f'/customer/pickup-order/{order_id}/')
+                if not payload:
+                    continue
+                self.recorder.count('orders_picked_up')
+                if self._random() >= self.options['rating_ratio']:
+                    continue
+                # 与页面一致：打开评价弹窗时才按需读取订单明细
+                payload, _ = user.request('order_items', 'get', f'/customer/get-order-items/{order_id}/')
+                if not payload:
+                    continue
+                items = payload['items']
+                payload, _ = user.request('rate_order', 'post', f'/customer/rate-order/{order_id}/', {
+                    'merchant_rating': self._choice([3, 4, 5]),
+                    'platform_rating': self._choice([3, 4, 5]),
+                    'rider_rating': self._choice([3, 4, 5]),
+                    'meal_ratings': [{'order_item_id': item['id'], 'rating': self._choice([3, 4, 5])}
+                                     for item in items],
+                }, json_body=True)
+                if payload:
+                    self.recorder.count('orders_rated')
+        finally:
+            connections.close_all()
+
+    # ---- 执行 ----
+
+    def run(self):
+        opts = self.options
+        self.setup()
+        arrivals = arrival_times(opts['curve'], opts['duration'], opts['peak_rate'], random.Random(opts['seed']))
+        background = []
+        for user in self.merchants:
+            background.append(threading.Thread(target=self.merchant_loop, args=(user,), daemon=True))
+        for rider_id, user in self.riders:
+            background.append(threading.Thread(target=self.rider_loop, args=(rider_id, user), daemon=True))
+        for _ in range(opts['pickup_workers']):
+            background.append(threading.Thread(target=self.pickup_loop, daemon=True))
+
+        started = time.perf_counter()
+        for thread in background:
+            thread.start()
+        with ThreadPoolExecutor(max_workers=opts['workers']) as executor:
+            for arrival in arrivals:
+                delay = arrival - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self.customer_journey)
+        # 到达结束后给骑手和取餐留出收尾时间
+        self.draining.set()
+        deadline = time.perf_counter() + opts['drain_seconds']
+        while time.perf_counter() < deadline and (any(self.open_orders.values()) or not self.ready_orders.empty()):
+            time.sleep(0.1)
+        self.stopping.set()
+        for thread in background:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        report = self.recorder.report(elapsed)
+        report['config'] = {
+            'world': self.prefix,
+            'arrivals_scheduled': len(arrivals),
+            **opts,
+        }
+        return report
@@ -0,0 +1,133 @@
+"""
+在同一进程内分别以 WSGI 与 ASGI 方式调用本项目的 application（Project/wsgi.py、Project/asgi.py），
+对比读接口的吞吐量与延迟，不需要安装 gunicorn、uvicorn 等服务器，也不经过网络：
+- WSGI：threads 个线程处理请求（相当于 gunicorn --threads），多出的请求排队等待空闲线程；
+- ASGI：一个事件循环同时处理全部在途请求，数据库查询在 DB_ASYNC_THREADS 个线程的线程池中执行。
+两种方式都由同一个客户端保持 concurrency 个在途请求，延迟包含排队时间。
+"""
+import asyncio
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Project.bench import summarize
+
+HOST = 'testserver'
+
+
+def _wsgi_environ(path, query, cookie):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_HOST': HOST,
+        'HTTP_COOKIE': cookie,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(b''),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def _wsgi_call(application, path, query, cookie):
+    status = {}
+
+    def start_response(status_line, headers, exc_info=None):
+        status['code'] = int(status_line.split()[0])
+
+    response = application(_wsgi_environ(path, query, cookie), start_response)
+    try:
+        for _ in response:
+            pass
+    finally:
+        # 与 WSGI 服务器一样在响应结束时 close()，触发 request_finished 归还连接
+        response.close()
+    return status['code']
+
+
+async def _asgi_call(application, path, query, cookie):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', HOST.encode()), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 50000),
+        'server': (HOST, 80),
+    }
+    body_sent = False
+    status = {}
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # 客户端不会断开：Django 在响应结束后取消对断开的监听
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status['code'] = message['status']
+
+    await application(scope, receive, send)
+    return status['code']
+
+
+async def _drive(call, requests, concurrency):
+    """保持 concurrency 个在途请求，依次发出 requests 中的 (path, query, cookie)；返回 summarize() 的统计"""
+    pending = iter(requests)
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        for path, query, cookie in pending:
+            started = time.perf_counter()
+            try:
+                code = await call(path, query, cookie)
+            except Exception:
+                errors += 1
+                continue
+            if code != 200:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def run_wsgi(application, requests, concurrency, threads):
+    executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+
+    async def call(path, query, cookie):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, _wsgi_call, application, path, query, cookie)
+
+    try:
+        return asyncio.run(_drive(call, requests, concurrency))
+    finally:
+        executor.shutdown()
+
+
+def run_asgi(application, requests, concurrency):
+    async def call(path, query, cookie):
+        return await _asgi_call(application, path, query, cookie)
+
+    return asyncio.run(_drive(call, requests, concurrency))
@@ -0,0 +1,551 @@
+"""
+合成数据生成：按参数生成一个完整的"世界"——平台、在多个平台上架菜单的商家、折扣、顾客、签约骑手，
+以及大量历史订单 / 明细 / 评价，供各项性能优化在本地压测。
+
+- 随机数全部由 seed 派生，同样的参数总是生成同样的数据；
+- 顾客下单次数、商家订单量、餐品点单量服从 Zipf 分布，下单时间集中在午餐、晚餐高峰；
+- 账号与菜单通过 platforme.onboarding 批量导入；订单使用显式主键按批次多行写入，
+  每批与 loadtest_checkpoint 中的进度在同一事务提交，中断后重新执行同一命令即从下一批继续；
+- 配置了订单分片时，订单按平台写入所在的库，ID 为该库的 ID 起点加上全局序号。
+"""
+import bisect
+import json
+import random
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from order.archive import ARCHIVE_TABLES, HOT_TABLES
+from order.counters import rebuild_status_counts
+from order.sla import rebuild_latency_histograms
+from order.summary import format_meal_summary
+from platforme.onboarding import OnboardingImporter
+from Project.db_utils import (
+    execute_fetchall,
+    execute_fetchall_in,
+    execute_fetchone,
+    execute_insert_many,
+    execute_non_query,
+    execute_update_many,
+    execute_write,
+    quote_table,
+)
+from Project.sharding import db_for_platform, order_databases, order_id_floor, shard_aliases
+
+DEFAULT_PARAMS = {
+    'seed': 42,
+    'platforms': 3,
+    'merchants': 200,
+    'platforms_per_merchant': 2,
+    'meals_per_menu': 15,
+    'discount_ratio': 0.3,
+    'customers': 2000,
+    'riders': 150,
+    'orders': 100000,
+    'max_items': 4,
+    'rating_ratio': 0.3,
+    'days': 90,
+    'skew': 1.1,
+    'batch_size': 5000,
+    'password': 'loadtest-pass',
+}
+
+# 续跑时允许修改的参数（batch_size 决定订单批次的随机源，只能在写入第一批订单前修改）；
+# 其余参数变化都意味着另一个数据集
+RESUMABLE_PARAMS = ('batch_size',)
+
+STAGES = ('accounts', 'orders', 'ratings', 'done')
+
+ORDER_TABLE = quote_table('order')
+ORDER_ITEM_TABLE = quote_table('order_item')
+ORDER_RATING_TABLE = quote_table('order_rating')
+ORDER_MEAL_RATING_TABLE = quote_table('order_meal_rating')
+ORDER_RATING_JOIN = f'{ORDER_RATING_TABLE} r JOIN {ORDER_TABLE} o ON r.order_id = o.id'
+
+ORDER_COLUMNS = ['id', 'customer_id', 'platform_id', 'merchant_id', 'discount_id', 'rider_id',
+                 'price', 'status', 'created_at', 'customer_name', 'merchant_name', 'meal_summary', 'item_count',
+                 'assigned_at', 'ready_at', 'completed_at', 'updated_at']
+ORDER_ITEM_COLUMNS = ['order_id', 'meal_id', 'meal_name', 'quantity', 'unit_price', 'line_price', 'created_at']
+
+SHOP_PREFIXES = ['老王', '川味', '粤式', '兰州', '黄焖', '沙县', '麻辣', '潮汕', '湘味', '东北', '重庆', '西北']
+SHOP_SUFFIXES = ['小馆', '面馆', '烧腊', '快餐', '饺子馆', '米线', '烤肉饭', '煲仔饭', '麻辣烫', '盖浇饭']
+DISHES = ['宫保鸡丁', '鱼香肉丝', '麻婆豆腐', '回锅肉', '红烧牛肉面', '酸菜鱼', '黄焖鸡', '叉烧饭', '煲仔饭',
+          '牛肉拉面', '水饺', '小笼包', '炸酱面', '番茄炒蛋', '土豆牛腩', '咖喱鸡', '卤肉饭', '担担面',
+          '皮蛋瘦肉粥', '豆浆油条', '鸡排饭', '凉皮', '肉夹馍', '螺蛳粉']
+BUILDINGS = ['东区宿舍', '西区宿舍', '南区宿舍', '北区宿舍', '教学楼', '图书馆', '实验楼']
+MEAL_TYPE_WEIGHTS = [('lunch_and_dinner', 5), ('lunch', 2), ('dinner', 2), ('breakfast', 1)]
+DISCOUNT_RATES = ['0.05', '0.10', '0.15', '0.20', '0.30']
+# 每小时下单权重：11-13 点午高峰，17-19 点晚高峰
+HOUR_WEIGHTS = [0, 0, 0, 0, 0, 0, 1, 3, 4, 2, 3, 12, 15, 8, 2, 2, 3, 9, 12, 7, 4, 3, 2, 1]
+RATING_CHOICES = [5, 5, 5, 5, 4, 4, 4, 3, 2, 1]
+CANCEL_RATIO = 0.06
+# 最近一小时内的订单仍在履约中
+ACTIVE_WINDOW = timedelta(hours=1)
+ACTIVE_STATUSES = ['unassigned', 'assigned', 'ready']
+# 各环节耗时的范围（秒）：下单到接单、接单到送达、送达到取餐
+LIFECYCLE_SECONDS = {'assigned': (30, 900), 'ready': (600, 2400), 'completed': (60, 1800)}
+LIFECYCLE_STEPS = {
+    'unassigned': (),
+    'assigned': ('assigned',),
+    'ready': ('assigned', 'ready'),
+    'completed': ('assigned', 'ready', 'completed'),
+    'cancelled': (),
+}
+
+
+class WorldParamsMismatch(ValueError):
+    pass
+
+
+def _rng(seed, *scope):
+    return random.Random(':'.join(str(part) for part in (seed, *scope)))
+
+
+class ZipfSampler:
+    """按 1/rank^skew 加权抽样；rank 与元素的对应关系由 rng 打乱，避免热点总是编号最小的那几个"""
+
+    def __init__(self, items, skew, rng):
+        self.items = list(items)
+        rng.shuffle(self.items)
+        total = 0.0
+        self.cumulative = []
+        for rank in range(1, len(self.items) + 1):
+            total += 1.0 / rank ** skew
+            self.cumulative.append(total)
+        self.total = total
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def sample(self, rng):
+        return self.items[bisect.bisect_left(self.cumulative, rng.random() * self.total)]
+
+
+def _weighted(rng, weighted_choices):
+    values, weights = zip(*weighted_choices)
+    return rng.choices(values, weights)[0]
+
+
+def _money(value):
+    return Decimal(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+# ---- 账号与菜单 ----
+
+def platform_name(prefix, index):
+    return f'{prefix}平台{index}'
+
+
+def iter_account_records(prefix, params):
+    """按固定顺序产出导入记录：平台 → 商家（及菜单、折扣） → 骑手 → 顾客"""
+    seed = params['seed']
+    platform_count = params['platforms']
+    for index in range(platform_count):
+        yield {'type': 'platform', 'username': f'{prefix}p{index}',
+               'platform_name': platform_name(prefix, index), 'phone': f'400{index:07d}'}
+
+    for index in range(params['merchants']):
+        rng = _rng(seed, 'merchant', index)
+        count = max(1, min(platform_count, params['platforms_per_merchant']))
+        platforms = sorted(rng.sample(range(platform_count), count))
+        username = f'{prefix}m{index}'
+        yield {
+            'type': 'merchant',
+            'username': username,
+            'merchant_name': f'{rng.choice(SHOP_PREFIXES)}{rng.choice(SHOP_SUFFIXES)}{index}号店',
+            'phone': f'139{index:08d}',
+            'address': f'{rng.choice(BUILDINGS)}{rng.randint(1, 20)}号',
+            'platforms': '|'.join(platform_name(prefix, platform) for platform in platforms),
+        }
+        dishes = rng.sample(DISHES, min(len(DISHES), params['meals_per_menu']))
+        dishes += [f'招牌套餐{number}' for number in range(params['meals_per_menu'] - len(dishes))]
+        base_prices = {dish: Decimal(rng.randint(800, 3500)) / 100 for dish in dishes}
+        meal_types = {dish: _weighted(rng, MEAL_TYPE_WEIGHTS) for dish in dishes}
+        for platform in platforms:
+            # 同一份菜单在不同平台上价格略有差异
+            markup = Decimal(rng.choice(['1.00', '1.00', '1.05', '1.10']))
+            for dish in dishes:
+                yield {'type': 'meal', 'merchant': username, 'platform': platform_name(prefix, platform),
+                       'name': dish, 'price': str(_money(base_prices[dish] * markup)),
+                       'meal_type': meal_types[dish]}
+            if rng.random() < params['discount_ratio']:
+                yield {'type': 'discount', 'merchant': username, 'platform': platform_name(prefix, platform),
+                       'discount_rate': rng.choice(DISCOUNT_RATES)}
+
+    for index in range(params['riders']):
+        yield {'type': 'rider', 'username': f'{prefix}r{index}', 'phone': f'137{index:08d}',
+               'platform': platform_name(prefix, index % platform_count)}
+
+    for index in range(params['customers']):
+        rng = _rng(seed, 'customer', index)
+        yield {'type': 'customer', 'username': f'{prefix}c{index}', 'phone': f'138{index:08d}',
+               'address': f'{rng.choice(BUILDINGS)}{rng.randint(1, 30)}号楼{rng.randint(101, 699)}'}
+
+
+def _ids_by_username(table_name, usernames):
+    rows = execute_fetchall_in(
+        f'''
+        SELECT t.id, u.username
+        FROM {quote_table(table_name)} t
+        JOIN user_profile up ON t.user_profile_id = up.id
+        JOIN auth_user u ON up.user_id = u.id
+        WHERE u.username IN ({{placeholders}})
+        ''',
+        usernames,
+    )
+    found = {row['username']: row['id'] for row in rows}
+    return [found[username] for username in usernames if username in found]
+
+
+def _names_by_id(table_name, column, ids):
+    rows = execute_fetchall_in(f'SELECT id, {column} FROM {quote_table(table_name)} WHERE id IN ({{placeholders}})', ids)
+    return {row['id']: row[column] for row in rows}
+
+
+def load_world(prefix, params):
+    """读回已生成的实体，按生成顺序排列（与数据库中主键的分配顺序无关，保证续跑时抽样一致）"""
+    merchant_ids = _ids_by_username('merchant', [f'{prefix}m{i}' for i in range(params['merchants'])])
+    customer_ids = _ids_by_username('customer', [f'{prefix}c{i}' for i in range(params['customers'])])
+    rider_ids = _ids_by_username('rider', [f'{prefix}r{i}' for i in range(params['riders'])])
+
+    menus = {}
+    for row in execute_fetchall_in(
+        'SELECT id, merchant_id, platform_id, name, price FROM meal WHERE merchant_id IN ({placeholders})',
+        merchant_ids,
+    ):
+        menus.setdefault((row['merchant_id'], row['platform_id']), []).append(row)
+    for meals in menus.values():
+        meals.sort(key=lambda meal: meal['name'])
+
+    discounts = {
+        (row['merchant_id'], row['platform_id']): row
+        for row in execute_fetchall_in(
+            '''
+            SELECT mpd.merchant_id, mpd.platform_id, d.id, d.discount_rate
+            FROM merchant_platform_discount mpd
+            JOIN discount d ON mpd.discount_id = d.id
+            WHERE mpd.merchant_id IN ({placeholders})
+            ''',
+            merchant_ids,
+        )
+    }
+
+    riders_by_platform = {}
+    rider_order = {rider_id: position for position, rider_id in enumerate(rider_ids)}
+    for row in execute_fetchall_in(
+        "SELECT rider_id, platform_id FROM sign_request WHERE status = 'approved' AND rider_id IN ({placeholders})",
+        rider_ids,
+    ):
+        riders_by_platform.setdefault(row['platform_id'], []).append(row['rider_id'])
+    for riders in riders_by_platform.values():
+        riders.sort(key=rider_order.get)
+
+    merchant_order = {merchant_id: position for position, merchant_id in enumerate(merchant_ids)}
+    storefronts = sorted(menus, key=lambda pair: (merchant_order[pair[0]], pair[1]))
+    return {
+        'customers': customer_ids,
+        'customer_names': _names_by_id('customer', 'customer_name', customer_ids),
+        'merchant_names': _names_by_id('merchant', 'merchant_name', merchant_ids),
+        'storefronts': storefronts,
+        'menus': menus,
+        'discounts': discounts,
+        'riders_by_platform': riders_by_platform,
+    }
+
+
+# ---- 订单 ----
+
+class OrderFactory:
+    def __init__(self, world, params):
+        seed = params['seed']
+        skew = params['skew']
+        self.params = params
+        self.world = world
+        self.customers = ZipfSampler(world['customers'], skew, _rng(seed, 'customers'))
+        self.storefronts = ZipfSampler(world['storefronts'], skew, _rng(seed, 'storefronts'))
+        self.menu_samplers = {
+            pair: ZipfSampler([meal['id'] for meal in meals], skew, _rng(seed, 'menu', *pair))
+            for pair, meals in world['menus'].items()
+        }
+        self.meal_prices = {meal['id']: Decimal(meal['price'])
+                            for meals in world['menus'].values() for meal in meals}
+        self.meal_names = {meal['id']: meal['name'] for meals in world['menus'].values() for meal in meals}
+        self.end = datetime.fromisoformat(params['end'])
+
+    def _created_at(self, rng):
+        day = self.end.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=rng.randrange(self.params['days']))
+        hour = rng.choices(range(24), HOUR_WEIGHTS)[0]
+        created = day + timedelta(hours=hour, seconds=rng.randrange(3600))
+        if created > self.end:
+            created -= timedelta(days=1)
+        return created
+
+    def _lifecycle(self, rng, status, created_at):
+        """该状态的订单的 (接单时间, 送达时间, 取餐时间)，未到的环节为 None"""
+        times = {}
+        at = created_at
+        for step in LIFECYCLE_STEPS[status]:
+            at = min(at + timedelta(seconds=rng.randint(*LIFECYCLE_SECONDS[step])), self.end)
+            times[step] = at
+        return times.get('assigned'), times.get('ready'), times.get('completed')
+
+    def build_batch(self, batch_index, first_id, count):
+        """生成一批订单；返回 (orders, items, ratings)，items / ratings 以订单在批内的下标关联"""
+        rng = _rng(self.params['seed'], 'orders', batch_index)
+        # 状态时间用单独的随机序列，不改变其他数据的生成结果
+        lifecycle_rng = _rng(self.params['seed'], 'lifecycle', batch_index)
+        orders, items, ratings = [], [], []
+        for offset in range(count):
+            merchant_id, platform_id = self.storefronts.sample(rng)
+            customer_id = self.customers.sample(rng)
+            discount = self.world['discounts'].get((merchant_id, platform_id))
+            rate = Decimal(discount['discount_rate']) if discount else None
+            created_at = self._created_at(rng)
+
+            menu = self.menu_samplers[(merchant_id, platform_id)]
+            chosen = {}
+            for _ in range(rng.randint(1, self.params['max_items'])):
+                meal_id = menu.sample(rng)
+                chosen[meal_id] = chosen.get(meal_id, 0) + rng.choice([1, 1, 1, 2, 3])
+            order_items = []
+            total = Decimal('0')
+            for meal_id, quantity in chosen.items():
+                unit_price = self.meal_prices[meal_id]
+                line_price = unit_price * quantity
+                if rate is not None:
+                    line_price = line_price * (Decimal('1') - rate)
+                line_price = _money(line_price)
+                total += line_price
+                order_items.append((meal_id, quantity, unit_price, line_price))
+
+            riders = self.world['riders_by_platform'].get(platform_id) or []
+            if self.end - created_at < ACTIVE_WINDOW:
+                status = rng.choice(ACTIVE_STATUSES)
+            elif rng.random() < CANCEL_RATIO:
+                status = 'cancelled'
+            else:
+                status = 'completed'
+            if not riders and status != 'cancelled':
+                status = 'unassigned'
+            rider_id = riders[rng.randrange(len(riders))] if status in ('assigned', 'ready', 'completed') else None
+            lifecycle = self._lifecycle(lifecycle_rng, status, created_at)
+
+            orders.append([first_id + offset, customer_id, platform_id, merchant_id,
+                           discount['id'] if discount else None, rider_id, _money(total), status, created_at,
+                           self.world['customer_names'][customer_id], self.world['merchant_names'][merchant_id],
+                           *format_meal_summary([(self.meal_names[meal_id], quantity)
+                                                 for meal_id, quantity, _, _ in order_items]),
+                           *lifecycle, max(at for at in (created_at, *lifecycle) if at)])
+            for meal_id, quantity, unit_price, line_price in order_items:
+                items.append((offset, meal_id, self.meal_names[meal_id], quantity, unit_price, line_price, created_at))
+            if status == 'completed' and rng.random() < self.params['rating_ratio']:
+                rated_at = created_at + timedelta(minutes=rng.randint(30, 600))
+                ratings.append((offset, Decimal(rng.choice(RATING_CHOICES)), Decimal(rng.choice(RATING_CHOICES)),
+                                Decimal(rng.choice(RATING_CHOICES)) if rider_id else None,
+                                [Decimal(rng.choice(RATING_CHOICES)) for _ in order_items], rated_at))
+        return orders, items, ratings
+
+
+def next_order_sequence():
+    """各订单库中已用的最大序号（ID 减去该库的 ID 起点）加一"""
+    used = 0
+    for alias in order_databases():
+        floor = order_id_floor(alias)
+        row = execute_fetchone(f'SELECT COALESCE(MAX(id), %s) AS max_id FROM {ORDER_TABLE}', [floor], using=alias)
+        used = max(used, row['max_id'] - floor)
+    return used + 1
+
+
+def _clear_shard_range(alias, first_id, last_id):
+    """分片上的写入不在检查点的事务里，中断后可能残留本批的一部分，续跑前先删掉"""
+    for table_name in ('order_meal_rating', 'order_rating', 'order_item'):
+        execute_non_query(f'DELETE FROM {quote_table(table_name)} WHERE order_id BETWEEN %s AND %s',
+                          [first_id, last_id], using=alias)
+    execute_non_query(f'DELETE FROM {ORDER_TABLE} WHERE id BETWEEN %s AND %s', [first_id, last_id], using=alias)
+
+
+def write_batch(orders, items, ratings):
+    """orders 的 ID 为全局序号；按平台分到各订单库，ID 加上所在库的起点后写入"""
+    batch_aliases = [db_for_platform(order[2]) for order in orders]
+    order_ids = [order_id_floor(alias) + order[0] for alias, order in zip(batch_aliases, orders)]
+    offsets_by_alias = {}
+    for offset, alias in enumerate(batch_aliases):
+        offsets_by_alias.setdefault(alias, []).append(offset)
+    items_by_offset = {}
+    for item in items:
+        items_by_offset.setdefault(item[0], []).append(item)
+    ratings_by_offset = {rating[0]: rating for rating in ratings}
+
+    for alias in shard_aliases():
+        floor = order_id_floor(alias)
+        _clear_shard_range(alias, floor + orders[0][0], floor + orders[-1][0])
+
+    for alias, offsets in offsets_by_alias.items():
+        ids = [order_ids[offset] for offset in offsets]
+        execute_insert_many('order', ORDER_COLUMNS, [
+            [order_ids[offset], *orders[offset][1:]] for offset in offsets
+        ], using=alias)
+        execute_insert_many('order_item', ORDER_ITEM_COLUMNS, [
+            (order_ids[offset], *item[1:])
+            for offset in offsets
+            for item in items_by_offset.get(offset, [])
+        ], using=alias)
+        rated = [ratings_by_offset[offset] for offset in offsets if offset in ratings_by_offset]
+        if not rated:
+            continue
+        item_rows = {}
+        for row in execute_fetchall(
+            f'SELECT id, order_id, meal_id FROM {ORDER_ITEM_TABLE} WHERE order_id BETWEEN %s AND %s ORDER BY id',
+            [ids[0], ids[-1]], using=alias,
+        ):
+            item_rows.setdefault(row['order_id'], []).append(row)
+        order_ratings = []
+        meal_ratings = []
+        for offset, merchant_rating, platform_rating, rider_rating, item_scores, rated_at in rated:
+            order_id = order_ids[offset]
+            order_ratings.append((order_id, merchant_rating, platform_rating, rider_rating, rated_at))
+            for item, score in zip(item_rows.get(order_id, []), item_scores):
+                meal_ratings.append((order_id, item['id'], item['meal_id'], score, rated_at))
+        execute_insert_many('order_rating',
+                            ['order_id', 'merchant_rating', 'platform_rating', 'rider_rating', 'created_at'],
+                            order_ratings, using=alias)
+        execute_insert_many('order_meal_rating', ['order_id', 'order_item_id', 'meal_id', 'rating', 'created_at'],
+                            meal_ratings, using=alias)
+
+
+# ---- 评分汇总 ----
+
+def refresh_ratings(world):
+    """
+    按生成的评价重新计算商家、平台、骑手、餐品的 rating_score / rating_count。
+    评价可能分布在多个订单库，先逐库按对象汇总 SUM / COUNT，合并后再写回主库。
+    """
+    merchant_ids = sorted({merchant_id for merchant_id, _ in world['storefronts']})
+    platform_ids = sorted({platform_id for _, platform_id in world['storefronts']})
+    rider_ids = sorted({rider_id for riders in world['riders_by_platform'].values() for rider_id in riders})
+    meal_ids = sorted({meal['id'] for meals in world['menus'].values() for meal in meals})
+    targets = [
+        ('merchant', merchant_ids, 'o.merchant_id', 'r.merchant_rating', ORDER_RATING_JOIN),
+        ('platform', platform_ids, 'o.platform_id', 'r.platform_rating', ORDER_RATING_JOIN),
+        ('rider', rider_ids, 'o.rider_id', 'r.rider_rating', ORDER_RATING_JOIN),
+        ('meal', meal_ids, 'r.meal_id', 'r.rating', f'{ORDER_MEAL_RATING_TABLE} r'),
+    ]
+    for table_name, ids, key, column, source in targets:
+        totals = {target_id: [Decimal('0'), 0] for target_id in ids}
+        for alias in order_databases():
+            for row in execute_fetchall_in(
+                f'''
+                SELECT {key} AS target_id, SUM({column}) AS total, COUNT({column}) AS rating_count
+                FROM {source}
+                WHERE {key} IN ({{placeholders}}) AND {column} IS NOT NULL
+                GROUP BY {key}
+                ''',
+                ids, using=alias,
+            ):
+                totals[row['target_id']][0] += Decimal(row['total'])
+                totals[row['target_id']][1] += row['rating_count']
+        execute_update_many(table_name, 'id', ['rating_score', 'rating_count'], [
+            (target_id, _money(total / count) if count else Decimal('0'), count)
+            for target_id, (total, count) in totals.items()
+        ])
+
+
+# ---- 检查点 ----
+
+def _load_checkpoint(prefix):
+    return execute_fetchone('SELECT * FROM loadtest_checkpoint WHERE world = %s', [prefix])
+
+
+def _save_checkpoint(prefix, **fields):
+    assignments = ', '.join(f'{column} = %s' for column in fields)
+    execute_non_query(
+        f'UPDATE loadtest_checkpoint SET {assignments}, updated_at = %s WHERE world = %s',
+        [*fields.values(), timezone.now(), prefix],
+    )
+
+
+def _open_checkpoint(prefix, params):
+    checkpoint = _load_checkpoint(prefix)
+    if checkpoint is None:
+        params = {**params, 'end': timezone.now().replace(microsecond=0).isoformat()}
+        execute_write(
+            'INSERT INTO loadtest_checkpoint (world, params, stage, order_id_base, batches_done, updated_at) '
+            'VALUES (%s, %s, %s, NULL, 0, %s)',
+            [prefix, json.dumps(params, sort_keys=True), STAGES[0], timezone.now()],
+        )
+        return _load_checkpoint(prefix), params
+
+    stored = json.loads(checkpoint['params'])
+    changed = sorted(
+        key for key in params
+        if key not in RESUMABLE_PARAMS and stored.get(key) != params[key]
+    )
+    if changed:
+        raise WorldParamsMismatch(
+            f'数据集 {prefix} 已用不同参数生成过（{", ".join(changed)}），请使用相同参数续跑或换一个前缀'
+        )
+    if stored.get('batch_size') != params['batch_size'] and checkpoint['batches_done']:
+        raise WorldParamsMismatch('续跑时不能修改 batch_size')
+    return checkpoint, {**stored, 'batch_size': params['batch_size']}
+
+
+def load_world_params(prefix):
+    """已生成完毕的数据集参数；压测与基准命令据此读回数据集"""
+    checkpoint = _load_checkpoint(prefix)
+    if checkpoint is None or checkpoint['stage'] != 'done':
+        raise WorldParamsMismatch(f'数据集 {prefix} 尚未生成完成，请先执行 generate_world --prefix {prefix}')
+    return json.loads(checkpoint['params'])
+
+
+def generate_world(prefix, params=None, log=print):
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    checkpoint, params = _open_checkpoint(prefix, params)
+    stage = checkpoint['stage']
+
+    if stage == 'accounts':
+        log('生成账号、菜单与折扣 ...')
+        importer = OnboardingImporter(batch_size=params['batch_size'], default_password=params['password'])
+        result = importer.import_records(iter_account_records(prefix, params))
+        if result['skipped']:
+            log(f'跳过 {result["skipped"]} 条记录: {result["errors"][:5]}')
+        stage = 'orders'
+        _save_checkpoint(prefix, stage=stage, order_id_base=next_order_sequence())
+        checkpoint = _load_checkpoint(prefix)
+
+    world = load_world(prefix, params) if stage in ('orders', 'ratings') else None
+
+    if stage == 'orders':
+        factory = OrderFactory(world, params)
+        if not factory.storefronts or not factory.customers:
+            raise ValueError('没有可下单的商家或顾客，请检查生成参数')
+        batch_size = params['batch_size']
+        total_batches = (params['orders'] + batch_size - 1) // batch_size
+        for batch_index in range(checkpoint['batches_done'], total_batches):
+            first = batch_index * batch_size
+            count = min(batch_size, params['orders'] - first)
+            orders, items, ratings = factory.build_batch(batch_index, checkpoint['order_id_base'] + first, count)
+            with ExitStack() as stack:
+                # 分片先于 default 提交；中断在两者之间时，续跑会先清掉分片上本批已写入的部分
+                stack.enter_context(transaction.atomic())
+                for alias in shard_aliases():
+                    stack.enter_context(transaction.atomic(using=alias))
+                write_batch(orders, items, ratings)
+                _save_checkpoint(prefix, batches_done=batch_index + 1)
+            log(f'订单批次 {batch_index + 1}/{total_batches}：{count} 单，{len(items)} 条明细，{len(ratings)} 条评价')
+        stage = 'ratings'
+        _save_checkpoint(prefix, stage=stage)
+
+    if stage == 'ratings':
+        log('汇总评分、订单状态计数与时效分布 ...')
+        # 订单批量写入时不逐单维护计数与时效分布，生成完毕后按订单表重算
+        for alias in order_databases():
+            rebuild_status_counts([HOT_TABLES['order'], ARCHIVE_TABLES['order']], using=alias)
+            rebuild_latency_histograms([HOT_TABLES['order'], ARCHIVE_TABLES['order']], using=alias)
+        with transaction.atomic():
+            refresh_ratings(world)
+            _save_checkpoint(prefix, stage='done')
+
+    return _load_checkpoint(prefix)
@@ -6,4 +6,5 @@ class LoginConfig(AppConfig):
     name = "login"
 
     def ready(self):
+        import login.checks
         import login.models
\ No newline at end of file
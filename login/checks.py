@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from Project.db_utils import MODEL_BACKEND
+
+
+@register()
+def check_authentication_backends(app_configs, **kwargs):
+    # 登录视图不经过 authenticate()，其他认证后端不会生效
+    if list(settings.AUTHENTICATION_BACKENDS) != [MODEL_BACKEND]:
+        return [Error(
+            f'AUTHENTICATION_BACKENDS 只支持 {MODEL_BACKEND}',
+            hint='login/views.py 用原生 SQL 取出用户后直接校验密码，不会调用其他认证后端',
+            id='login.E001',
+        )]
+    return []
@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from Project import hashing
+from Project.bench import allow_test_host, delete_users_by_prefix, run_concurrently
+from Project.db_utils import execute_write
+
+
+class Command(BaseCommand):
+    help = '并发压测 登录 → 跳转顾客首页 的完整流程，输出 logins/sec（总量与每核）、延迟分位数和每次登录的 SQL 次数'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='临时创建的压测账号数量')
+        parser.add_argument('--iterations', type=int, default=200, help='登录总次数')
+        parser.add_argument('--workers', type=int, default=8, help='并发线程数')
+        parser.add_argument('--password', default='bench-login-pass', help='压测账号密码')
+        parser.add_argument('--pool-size', type=int, default=None,
+                            help='覆盖 PASSWORD_HASH_POOL_SIZE，0 表示在请求线程内计算哈希')
+
+    def handle(self, *args, **options):
+        prefix = f'bench_login_{uuid.uuid4().hex[:8]}_'
+        usernames = self._create_users(prefix, options['users'], options['password'])
+        query_counts = []
+        lock = threading.Lock()
+
+        def login_once(index):
+            client = Client()
+            with CaptureQueriesContext(connections['default']) as queries:
+                response = client.post('/login/', {
+                    'username': usernames[index % len(usernames)],
+                    'password': options['password'],
+                    'user_type': 'customer',
+                })
+                if response.status_code != 302:
+                    raise RuntimeError(f'login failed with status {response.status_code}')
+                dashboard = client.get(response['Location'])
+                if dashboard.status_code != 200:
+                    raise RuntimeError(f'dashboard failed with status {dashboard.status_code}')
+            with lock:
+                query_counts.append(len(queries))
+
+        pool_override = {}
+        if options['pool_size'] is not None:
+            pool_override['PASSWORD_HASH_POOL_SIZE'] = options['pool_size']
+
+        try:
+            with allow_test_host(), override_settings(**pool_override):
+                pool_size = hashing.pool_size()
+                result = run_concurrently(login_once, options['iterations'], options['workers'])
+        finally:
+            hashing.shutdown()
+            delete_users_by_prefix(prefix)
+
+        # 哈希开销占绝大部分 CPU：进程池开启时按池大小计算每核吞吐，否则按本机核数
+        cores = pool_size or os.cpu_count() or 1
+        result['benchmark'] = 'login'
+        result['workers'] = options['workers']
+        result['hash_pool_size'] = pool_size
+        result['logins_per_core'] = round(result['throughput_per_second'] / cores, 2)
+        result['queries_per_login'] = round(sum(query_counts) / len(query_counts), 2) if query_counts else 0
+        self.stdout.write(json.dumps(result, indent=2, ensure_ascii=False))
+
+    def _create_users(self, prefix, count, password):
+        # 所有压测账号共用同一个哈希值，避免准备阶段就耗尽 CPU
+        hashed = make_password(password)
+        now = timezone.now()
+        usernames = []
+        for index in range(count):
+            username = f'{prefix}{index}'
+            user_id = execute_write(
+                '''
+                INSERT INTO auth_user (username, password, first_name, last_name, email,
+                                       is_superuser, is_staff, is_active, date_joined)
+                VALUES (%s, %s, '', '', '', %s, %s, %s, %s)
+                ''',
+                [username, hashed, False, False, True, now],
+            )
+            profile_id = execute_write(
+                '''
+                INSERT INTO user_profile (user_id, user_type, phone, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, %s)
+                ''',
+                [user_id, 'customer', '', now, now],
+            )
+            execute_write(
+                '''
+                INSERT INTO customer (user_profile_id, customer_name, phone, address, created_at)
+                VALUES (%s, %s, %s, %s, %s)
+                ''',
+                [profile_id, username, '', '待填写', now],
+            )
+            usernames.append(username)
+        return usernames
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('login', '0005_usersession'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='merchant',
+            name='rating_count',
+            field=models.PositiveIntegerField(db_default=0, default=0),
+        ),
+        migrations.AlterField(
+            model_name='merchant',
+            name='rating_score',
+            field=models.DecimalField(db_default=0, decimal_places=2, default=0, max_digits=3),
+        ),
+        migrations.AlterField(
+            model_name='platform',
+            name='rating_count',
+            field=models.PositiveIntegerField(db_default=0, default=0),
+        ),
+        migrations.AlterField(
+            model_name='platform',
+            name='rating_score',
+            field=models.DecimalField(db_default=0, decimal_places=2, default=0, max_digits=3),
+        ),
+        migrations.AlterField(
+            model_name='rider',
+            name='rating_count',
+            field=models.PositiveIntegerField(db_default=0, default=0),
+        ),
+        migrations.AlterField(
+            model_name='rider',
+            name='rating_score',
+            field=models.DecimalField(db_default=0, decimal_places=2, default=0, max_digits=3),
+        ),
+    ]
@@ -56,8 +56,8 @@ class Merchant(models.Model):
     phone = models.CharField(max_length=15)  # 电话
     address = models.TextField()  # 地址
     created_at = models.DateTimeField(auto_now_add=True)
-    rating_score = models.DecimalField(max_digits=3, decimal_places=2, default=0)
-    rating_count = models.PositiveIntegerField(default=0)
+    rating_score = models.DecimalField(max_digits=3, decimal_places=2, default=0, db_default=0)
+    rating_count = models.PositiveIntegerField(default=0, db_default=0)
 
     class Meta:
         db_table = 'merchant'
@@ -71,8 +71,8 @@ class Platform(models.Model):
     platform_name = models.CharField(max_length=100)  # 平台名
     phone = models.CharField(max_length=15)  # 电话
     created_at = models.DateTimeField(auto_now_add=True)
-    rating_score = models.DecimalField(max_digits=3, decimal_places=2, default=0)
-    rating_count = models.PositiveIntegerField(default=0)
+    rating_score = models.DecimalField(max_digits=3, decimal_places=2, default=0, db_default=0)
+    rating_count = models.PositiveIntegerField(default=0, db_default=0)
 
     class Meta:
         db_table = 'platform'
@@ -94,8 +94,8 @@ class Rider(models.Model):
     phone = models.CharField(max_length=15)  # 电话
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='offline')  # 状态
     created_at = models.DateTimeField(auto_now_add=True)
-    rating_score = models.DecimalField(max_digits=3, decimal_places=2, default=0)
-    rating_count = models.PositiveIntegerField(default=0)
+    rating_score = models.DecimalField(max_digits=3, decimal_places=2, default=0, db_default=0)
+    rating_count = models.PositiveIntegerField(default=0, db_default=0)
 
     class Meta:
         db_table = 'rider'
@@ -292,7 +292,13 @@ def create_user_profile(sender, instance, created, **kwargs):
     if created:
         _ensure_user_profile_record(instance)
 
+# 登录时只更新 last_login（或重新哈希密码），无需再检查 UserProfile
+CREDENTIAL_ONLY_FIELDS = frozenset({'last_login', 'password'})
+
+
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, update_fields=None, **kwargs):
     """保存用户时确保 UserProfile 存在"""
+    if update_fields and set(update_fields) <= CREDENTIAL_ONLY_FIELDS:
+        return
     _ensure_user_profile_record(instance)
@@ -1,10 +1,17 @@
 # login/views.py
 from django.contrib import messages
-from django.contrib.auth import authenticate, login as auth_login
-from django.contrib.auth.hashers import make_password
+from django.contrib.auth import login as auth_login
+from django.contrib.auth.signals import user_login_failed
 from django.shortcuts import render, redirect
 
-from Project.db_utils import execute_fetchone, execute_non_query
+from Project import hashing
+from Project.db_utils import (
+    build_user,
+    execute_fetchone,
+    execute_non_query,
+    get_login_identity,
+    remember_login_identity,
+)
 
 
 USER_TYPE_DISPLAY = {
@@ -15,13 +22,25 @@ USER_TYPE_DISPLAY = {
 }
 
 
-def _get_user_profile(user_id):
-    query = '''
-        SELECT user_type
-        FROM user_profile
-        WHERE user_id = %s
-    '''
-    return execute_fetchone(query, [user_id])
+def _authenticate_identity(request, username, identity, password):
+    """与 ModelBackend 的 authenticate() 相同：密码正确且账号可用时返回用户，否则发送 user_login_failed 并返回 None"""
+    if identity is None:
+        # 与 ModelBackend 保持一致：用户不存在时也计算一次哈希，避免通过响应耗时枚举用户名
+        hashing.make_password(password)
+        user = None
+    else:
+        user = build_user(identity)
+        # 先校验密码再看账号是否停用，停用账号与正常账号的响应耗时相同
+        is_correct, must_update = hashing.verify_password(password, user.password)
+        if not is_correct or not user.is_active:
+            user = None
+        elif must_update:
+            # 哈希算法或迭代次数已调整：借本次登录透明地重新哈希
+            user.password = hashing.make_password(password)
+            execute_non_query('UPDATE auth_user SET password = %s WHERE id = %s', [user.password, user.id])
+    if user is None:
+        user_login_failed.send(sender=__name__, credentials={'username': username}, request=request)
+    return user
 
 
 def login(request):
@@ -41,14 +60,18 @@ def login(request):
         password = request.POST.get('password')
         user_type = request.POST.get('user_type', 'customer')
 
-        user = authenticate(request, username=username, password=password)
+        identity = get_login_identity(username) if username else None
+        try:
+            user = _authenticate_identity(request, username, identity, password)
+        except hashing.HashingBusy:
+            messages.error(request, '当前登录人数较多，请稍后再试')
+            return render(request, "login.html")
         if user is not None:
-            user_profile = _get_user_profile(user.id)
-            if not user_profile:
+            actual_type = identity['user_type']
+            if not actual_type:
                 messages.error(request, '用户资料不存在，请联系管理员')
                 return render(request, "login.html")
 
-            actual_type = user_profile['user_type']
             if actual_type != user_type:
                 display = USER_TYPE_DISPLAY.get(actual_type, actual_type)
                 messages.error(request, f'该账号是{display}账号，请使用正确的身份登录')
@@ -56,6 +79,7 @@ def login(request):
 
             auth_login(request, user)
             request.session['merchant_name'] = username
+            remember_login_identity(request, identity)
 
             if user_type == 'rider':
                 return redirect('rider')
@@ -98,7 +122,11 @@ def forgot_password(request):
             messages.error(request, '未找到匹配的账号，请检查姓名与电话')
             return render(request, "forgot_password.html")
 
-        hashed = make_password(password)
+        try:
+            hashed = hashing.make_password(password)
+        except hashing.HashingBusy:
+            messages.error(request, '系统繁忙，请稍后再试')
+            return render(request, "forgot_password.html")
         execute_non_query('UPDATE auth_user SET password = %s WHERE id = %s', [hashed, user_record['id']])
 
         request.session['password_reset_done'] = True
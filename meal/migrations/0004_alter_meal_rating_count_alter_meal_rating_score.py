@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meal', '0003_meal_rating_count_meal_rating_score'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='meal',
+            name='rating_count',
+            field=models.PositiveIntegerField(db_default=0, default=0),
+        ),
+        migrations.AlterField(
+            model_name='meal',
+            name='rating_score',
+            field=models.DecimalField(db_default=0, decimal_places=2, default=0, max_digits=3),
+        ),
+    ]
@@ -18,8 +18,8 @@ class Meal(models.Model):
     meal_type = models.CharField(max_length=20, choices=MEAL_TYPE_CHOICES, verbose_name="餐品类型")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    rating_score = models.DecimalField(max_digits=3, decimal_places=2, default=0)
-    rating_count = models.PositiveIntegerField(default=0)
+    rating_score = models.DecimalField(max_digits=3, decimal_places=2, default=0, db_default=0)
+    rating_count = models.PositiveIntegerField(default=0, db_default=0)
 
     class Meta:
         db_table = 'meal'
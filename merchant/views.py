@@ -1,17 +1,36 @@
 from decimal import Decimal, InvalidOperation
+from functools import partial
 
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.http import JsonResponse
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
+from django.utils import timezone
 
+from order.archive import HOT_TABLES, afetch_order_history, created_range, fetch_order_history, parse_page
+from order.live import latest_order_events, load_event_orders, merchant_channel
+from order.rollups import fetch_daily_sales, fetch_meal_sales, parse_days
+from order.sync import afetch_order_changes, parse_since, sync_token
 from Project.db_utils import (
+    aget_request_entity,
+    append_outbox_event,
     execute_fetchall,
     execute_fetchone,
     execute_non_query,
     execute_write,
-    get_merchant_by_user,
+    get_request_entity,
     quote_table,
+    run_parallel,
+)
+from Project.live import event_stream_response
+from Project.sharding import (
+    aattach_order_names,
+    attach_order_names,
+    db_for_order,
+    delete_order_rows,
+    order_databases,
 )
 
 
@@ -35,13 +54,15 @@ ORDER_TABLE = quote_table('order')
 ORDER_ITEM_TABLE = quote_table('order_item')
 
 
-def _build_in_clause(values):
-    return ','.join(['%s'] * len(values))
-ORDER_ITEM_TABLE = quote_table('order_item')
+def _get_merchant(request):
+    merchant = get_request_entity(request, 'merchant')
+    if not merchant:
+        raise ValueError('商家信息不存在')
+    return merchant
 
 
-def _get_merchant(user):
-    merchant = get_merchant_by_user(user.id)
+async def _aget_merchant(request):
+    merchant = await aget_request_entity(request, 'merchant')
     if not merchant:
         raise ValueError('商家信息不存在')
     return merchant
@@ -152,67 +173,81 @@ def _get_available_discounts():
     return execute_fetchall('SELECT id, discount_rate FROM discount ORDER BY discount_rate')
 
 
-def _get_orders_for_merchant(merchant_id):
-    query = f'''
+def _get_orders_for_merchant(merchant_id, page=1, page_size=None):
+    """
+    商家的一页订单：商家可入驻多个平台，订单可能分布在多个库及冷热两层；
+    订单行自带餐品摘要，不再加载明细。返回 (订单行, 是否还有下一页)
+    """
+    orders, has_more = fetch_order_history(
+        partial(_get_merchant_orders_in, merchant_id),
+        page, page_size or settings.ORDER_HISTORY_PAGE_SIZE,
+    )
+    return _attach_names(orders), has_more
+
+
+async def _aget_orders_for_merchant(merchant_id, page, page_size):
+    orders, has_more = await afetch_order_history(partial(_get_merchant_orders_in, merchant_id), page, page_size)
+    return await _aattach_names(orders), has_more
+
+
+async def _aget_merchant_order_changes(merchant_id, since):
+    """since 之后新建或变化的订单与删除的订单 ID（见 order/sync.py），需要整页重读时返回 None"""
+    changes = await afetch_order_changes(
+        partial(_get_merchant_orders_in, merchant_id), 'merchant_id', merchant_id, since,
+    )
+    if changes is None:
+        return None
+    orders, deleted_ids = changes
+    return await _aattach_names(orders), deleted_ids
+
+
+def _attach_names(orders):
+    attach_order_names(orders, 'platform_name', 'rider_name', 'discount_rate')
+    return _drop_missing_discounts(orders)
+
+
+async def _aattach_names(orders):
+    await aattach_order_names(orders, 'platform_name', 'rider_name', 'discount_rate')
+    return _drop_missing_discounts(orders)
+
+
+def _drop_missing_discounts(orders):
+    for order in orders:
+        if order['discount_rate'] is None:
+            order['discount_id'] = None
+    return orders
+
+
+def _select_merchant_orders(tables):
+    # 订单列表、增量同步与实时推送共用的列
+    return f'''
         SELECT o.id,
                o.price,
                o.status,
                o.created_at,
                o.customer_id,
-               c.customer_name,
+               o.customer_name,
                o.platform_id,
-               p.platform_name,
                o.rider_id,
-               r.rider_name,
-               d.id AS discount_id,
-               d.discount_rate
-        FROM {ORDER_TABLE} o
-        JOIN customer c ON o.customer_id = c.id
-        JOIN {PLATFORM_TABLE} p ON o.platform_id = p.id
-        LEFT JOIN rider r ON o.rider_id = r.id
-        LEFT JOIN discount d ON o.discount_id = d.id
-        WHERE o.merchant_id = %s
-        ORDER BY o.created_at DESC
+               o.discount_id,
+               o.meal_summary,
+               o.item_count
+        FROM {tables['order']} o
     '''
-    orders = execute_fetchall(query, [merchant_id])
-    if not orders:
-        return []
-
-    order_map = {order['id']: order for order in orders}
-    for order in order_map.values():
-        order['meals'] = []
-
-    order_ids = list(order_map.keys())
-    placeholders = _build_in_clause(order_ids)
-    items_query = f'''
-        SELECT oi.id,
-               oi.order_id,
-               meal.name AS meal_name,
-               oi.quantity,
-               oi.unit_price,
-               oi.line_price
-        FROM {ORDER_ITEM_TABLE} oi
-        JOIN meal ON oi.meal_id = meal.id
-        WHERE oi.order_id IN ({placeholders})
-        ORDER BY oi.id
-    '''
-    items = execute_fetchall(items_query, order_ids)
-    for item in items:
-        order_map[item['order_id']]['meals'].append({
-            'item_id': item['id'],
-            'name': item['meal_name'],
-            'quantity': item['quantity'],
-            'unit_price': item['unit_price'],
-            'line_price': item['line_price'],
-        })
-
-    return orders
 
 
-def _format_meal_summary(meals):
-    if not meals:
-        return ''
-    return ', '.join(f"{meal['name']} x{meal['quantity']}" for meal in meals)
+def _get_merchant_orders_in(merchant_id, alias, tables, limit, since=None, before=None, updated_since=None):
+    if updated_since is None:
+        window, window_params = created_range(since, before)
+    else:
+        window, window_params = created_range(updated_since, column='o.updated_at')
+    query = f'''
+        {_select_merchant_orders(tables)}
+        WHERE o.merchant_id = %s{window}
+        ORDER BY o.created_at DESC, o.id DESC
+        LIMIT %s
+    '''
+    return execute_fetchall(query, [merchant_id, *window_params, limit], using=alias)
 
 
 def _format_orders_for_context(order_rows):
@@ -226,8 +261,8 @@ def _format_orders_for_context(order_rows):
             'created_at': row['created_at'],
             'customer': {'customer_name': row['customer_name']},
             'platform': {'platform_name': row['platform_name']},
-            'meals': row.get('meals', []),
-            'meal_summary': _format_meal_summary(row.get('meals', [])),
+            'meal_summary': row['meal_summary'],
+            'item_count': row['item_count'],
             'rider': {'rider_name': row['rider_name']} if row['rider_name'] else None,
             'discount': {'discount_rate': row['discount_rate']} if row['discount_id'] else None,
         })
@@ -246,17 +281,34 @@ def _format_orders_for_payload(order_rows):
             'status': row['status'],
             'created_at': row['created_at'].strftime('%Y-%m-%d %H:%M') if row['created_at'] else '',
             'discount_rate': str(row['discount_rate']) if row['discount_id'] else None,
-            'meals': [{
-                'name': meal['name'],
-                'quantity': meal['quantity'],
-                'unit_price': str(meal['unit_price']),
-                'line_price': str(meal['line_price']),
-            } for meal in row.get('meals', [])],
-            'meal_summary': _format_meal_summary(row.get('meals', [])),
+            'meal_summary': row['meal_summary'],
+            'item_count': row['item_count'],
         })
     return formatted
 
 
+def route_order_events(events):
+    """
+    把一批订单事件转换为商家频道的 [(频道, 事件名, 数据), ...]（见 order/live.py）：
+    订单变化推送 order，数据与 get_orders 的订单一致；删除推送 order_deleted。
+    """
+    events = latest_order_events(events)
+    order_rows = load_event_orders(
+        [event for event in events if event['event_type'] != 'deleted'],
+        f'{_select_merchant_orders(HOT_TABLES)} WHERE o.id IN ({{placeholders}})',
+    )
+    orders = {order['id']: order for order in _format_orders_for_payload(_attach_names(list(order_rows.values())))}
+
+    messages = []
+    for event in events:
+        channel = merchant_channel(event['payload']['merchant_id'])
+        if event['event_type'] == 'deleted':
+            messages.append((channel, 'order_deleted', {'id': event['entity_id']}))
+        elif event['entity_id'] in orders:
+            messages.append((channel, 'order', orders[event['entity_id']]))
+    return messages
+
+
 def _get_discount(discount_id):
     return execute_fetchone('SELECT id, discount_rate FROM discount WHERE id = %s', [discount_id])
 
@@ -268,7 +320,7 @@ def apply_platform(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        merchant = _get_merchant(request.user)
+        merchant = _get_merchant(request)
         platform_id = request.POST.get('platform_id')
         if not platform_id:
             return JsonResponse({'success': False, 'message': '平台ID不能为空'})
@@ -309,7 +361,7 @@ def add_meal(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        merchant = _get_merchant(request.user)
+        merchant = _get_merchant(request)
         name = request.POST.get('meal-name')
         price = request.POST.get('meal-price')
         meal_type = request.POST.get('meal-type')
@@ -332,9 +384,13 @@ def add_meal(request):
 
         query = '''
             INSERT INTO meal (merchant_id, platform_id, name, price, meal_type, created_at, updated_at)
-            VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
         '''
-        meal_id = execute_write(query, [merchant['id'], platform_id, name, price, meal_type])
+        now = timezone.now()
+        with transaction.atomic():
+            meal_id = execute_write(query, [merchant['id'], platform_id, name, price, meal_type, now, now])
+            append_outbox_event('meal', 'created', meal_id, {'merchant_id': merchant['id'],
+                                                             'platform_id': int(platform_id)})
         return JsonResponse({'success': True, 'message': '餐品添加成功', 'meal_id': meal_id})
     except ValueError:
         return JsonResponse({'success': False, 'message': '商家信息不存在'})
@@ -348,7 +404,7 @@ def edit_meal(request, meal_id):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        merchant = _get_merchant(request.user)
+        merchant = _get_merchant(request)
         meal = _get_meal(merchant['id'], meal_id)
         if not meal:
             return JsonResponse({'success': False, 'message': '餐品不存在'})
@@ -375,10 +431,17 @@ def edit_meal(request, meal_id):
                 price = %s,
                 meal_type = %s,
                 platform_id = %s,
-                updated_at = CURRENT_TIMESTAMP
+                updated_at = %s
             WHERE id = %s AND merchant_id = %s
         '''
-        execute_non_query(query, [name, price, meal_type, platform_id, meal_id, merchant['id']])
+        with transaction.atomic():
+            execute_non_query(query, [name, price, meal_type, platform_id, timezone.now(), meal_id, merchant['id']])
+            # 餐品可能换到另一个平台，两个平台的菜单都要刷新
+            append_outbox_event('meal', 'updated', meal_id, {
+                'merchant_id': merchant['id'],
+                'platform_id': int(platform_id),
+                'previous_platform_id': meal['platform_id'],
+            })
         return JsonResponse({'success': True, 'message': '餐品更新成功', 'meal_id': meal_id})
     except ValueError:
         return JsonResponse({'success': False, 'message': '商家信息不存在'})
@@ -392,12 +455,15 @@ def delete_meal(request, meal_id):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        merchant = _get_merchant(request.user)
+        merchant = _get_merchant(request)
         meal = _get_meal(merchant['id'], meal_id)
         if not meal:
             return JsonResponse({'success': False, 'message': '餐品不存在'})
 
-        execute_non_query('DELETE FROM meal WHERE id = %s AND merchant_id = %s', [meal_id, merchant['id']])
+        with transaction.atomic():
+            execute_non_query('DELETE FROM meal WHERE id = %s AND merchant_id = %s', [meal_id, merchant['id']])
+            append_outbox_event('meal', 'deleted', meal_id, {'merchant_id': merchant['id'],
+                                                             'platform_id': meal['platform_id']})
         return JsonResponse({'success': True, 'message': '餐品删除成功'})
     except ValueError:
         return JsonResponse({'success': False, 'message': '商家信息不存在'})
@@ -411,7 +477,7 @@ def get_meals(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        merchant = _get_merchant(request.user)
+        merchant = _get_merchant(request)
         meals = _get_meals_for_merchant(merchant['id'])
         formatted = []
         for meal in meals:
@@ -438,7 +504,7 @@ def set_discount(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        merchant = _get_merchant(request.user)
+        merchant = _get_merchant(request)
         platform_id = request.POST.get('platform-id')
         discount_id = request.POST.get('discount-id')
 
@@ -457,21 +523,25 @@ def set_discount(request):
             [merchant['id'], platform_id],
         )
 
-        if existing:
-            execute_non_query(
-                'UPDATE merchant_platform_discount SET discount_id = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s',
-                [discount_id, existing['id']],
-            )
-            discount_id = existing['id']
-        else:
-            discount_id = execute_write(
-                '''
-                INSERT INTO merchant_platform_discount
-                (merchant_id, platform_id, discount_id, created_at, updated_at)
-                VALUES (%s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-                ''',
-                [merchant['id'], platform_id, discount_id],
-            )
+        event = {'merchant_id': merchant['id'], 'platform_id': int(platform_id), 'discount_id': int(discount_id)}
+        with transaction.atomic():
+            if existing:
+                execute_non_query(
+                    'UPDATE merchant_platform_discount SET discount_id = %s, updated_at = %s WHERE id = %s',
+                    [discount_id, timezone.now(), existing['id']],
+                )
+                discount_id = existing['id']
+                append_outbox_event('discount', 'updated', discount_id, event)
+            else:
+                discount_id = execute_write(
+                    '''
+                    INSERT INTO merchant_platform_discount
+                    (merchant_id, platform_id, discount_id, created_at, updated_at)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ''',
+                    [merchant['id'], platform_id, discount_id, timezone.now(), timezone.now()],
+                )
+                append_outbox_event('discount', 'created', discount_id, event)
 
         return JsonResponse({'success': True, 'message': '折扣设置成功', 'discount_id': discount_id})
     except ValueError:
@@ -486,10 +556,10 @@ def edit_discount(request, discount_id):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        merchant = _get_merchant(request.user)
+        merchant = _get_merchant(request)
         merchant_discount = execute_fetchone(
             '''
-            SELECT id
+            SELECT id, platform_id
             FROM merchant_platform_discount
             WHERE id = %s AND merchant_id = %s
             ''',
@@ -505,14 +575,20 @@ def edit_discount(request, discount_id):
         if not _get_discount(new_discount_id):
             return JsonResponse({'success': False, 'message': '折扣不存在'})
 
-        execute_non_query(
-            '''
-            UPDATE merchant_platform_discount
-            SET discount_id = %s, updated_at = CURRENT_TIMESTAMP
-            WHERE id = %s
-            ''',
-            [new_discount_id, discount_id],
-        )
+        with transaction.atomic():
+            execute_non_query(
+                '''
+                UPDATE merchant_platform_discount
+                SET discount_id = %s, updated_at = %s
+                WHERE id = %s
+                ''',
+                [new_discount_id, timezone.now(), discount_id],
+            )
+            append_outbox_event('discount', 'updated', discount_id, {
+                'merchant_id': merchant['id'],
+                'platform_id': merchant_discount['platform_id'],
+                'discount_id': int(new_discount_id),
+            })
         return JsonResponse({'success': True, 'message': '折扣更新成功', 'discount_id': discount_id})
     except ValueError:
         return JsonResponse({'success': False, 'message': '商家信息不存在'})
@@ -526,15 +602,18 @@ def delete_discount(request, discount_id):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        merchant = _get_merchant(request.user)
+        merchant = _get_merchant(request)
         merchant_discount = execute_fetchone(
-            'SELECT id FROM merchant_platform_discount WHERE id = %s AND merchant_id = %s',
+            'SELECT id, platform_id FROM merchant_platform_discount WHERE id = %s AND merchant_id = %s',
             [discount_id, merchant['id']],
         )
         if not merchant_discount:
             return JsonResponse({'success': False, 'message': '折扣不存在'})
 
-        execute_non_query('DELETE FROM merchant_platform_discount WHERE id = %s', [discount_id])
+        with transaction.atomic():
+            execute_non_query('DELETE FROM merchant_platform_discount WHERE id = %s', [discount_id])
+            append_outbox_event('discount', 'deleted', discount_id, {'merchant_id': merchant['id'],
+                                                                     'platform_id': merchant_discount['platform_id']})
         return JsonResponse({'success': True, 'message': '折扣删除成功'})
     except ValueError:
         return JsonResponse({'success': False, 'message': '商家信息不存在'})
@@ -548,7 +627,7 @@ def get_discounts(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        merchant = _get_merchant(request.user)
+        merchant = _get_merchant(request)
         discounts = _get_discounts_for_merchant(merchant['id'])
         payload = []
         for discount in discounts:
@@ -568,20 +647,77 @@ def get_discounts(request):
 
 
 @login_required
-def get_orders(request):
+async def get_orders(request):
     if request.method != 'GET':
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        merchant = _get_merchant(request.user)
-        order_rows = _get_orders_for_merchant(merchant['id'])
-        return JsonResponse({'success': True, 'orders': _format_orders_for_payload(order_rows)})
+        merchant = await _aget_merchant(request)
+        # 带 since 时只返回变化的订单；游标过旧或无效时退回整页读取，delta 为 False 时客户端替换整个列表
+        token = sync_token()
+        changes = await _aget_merchant_order_changes(merchant['id'], parse_since(request.GET))
+        if changes is not None:
+            order_rows, deleted_ids = changes
+            return JsonResponse({
+                'success': True,
+                'delta': True,
+                'orders': _format_orders_for_payload(order_rows),
+                'deleted_ids': deleted_ids,
+                'since': token,
+            })
+        page, page_size = parse_page(request.GET)
+        order_rows, has_more = await _aget_orders_for_merchant(merchant['id'], page, page_size)
+        return JsonResponse({
+            'success': True,
+            'delta': False,
+            'orders': _format_orders_for_payload(order_rows),
+            'page': page,
+            'has_more': has_more,
+            'since': token,
+        })
     except ValueError:
         return JsonResponse({'success': False, 'message': '商家信息不存在'})
     except Exception as exc:
         return JsonResponse({'success': False, 'message': f'获取订单失败: {str(exc)}'})
 
 
+@login_required
+async def order_events(request):
+    """
+    本商家订单的实时推送（SSE，见 Project/live.py）：订单变化推送 order，删除推送 order_deleted，
+    页面按 ID 合并进已加载的列表，不再定时重读。
+    """
+    try:
+        merchant = await _aget_merchant(request)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': '商家信息不存在'})
+    return event_stream_response(request, [merchant_channel(merchant['id'])], f'merchant:{merchant["id"]}')
+
+
+@login_required
+def get_sales(request):
+    """最近 days 天的每日销售与各餐品销售，只读汇总表（见 order/rollups.py）"""
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'message': '无效的请求方法'})
+
+    try:
+        merchant = _get_merchant(request)
+        days = parse_days(request.GET)
+        databases = order_databases()
+        daily, totals = fetch_daily_sales('merchant', merchant['id'], days, databases)
+        return JsonResponse({
+            'success': True,
+            'days': days,
+            'daily': daily,
+            'totals': totals,
+            'meals': fetch_meal_sales(merchant['id'], days, databases),
+        })
+    except ValueError:
+        return JsonResponse({'success': False, 'message': '商家信息不存在'})
+    except Exception as exc:
+        return JsonResponse({'success': False, 'message': f'获取销售数据失败: {str(exc)}'})
+
+
 @login_required
 @csrf_exempt
 def delete_order(request, order_id):
@@ -589,16 +725,17 @@ def delete_order(request, order_id):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        merchant = _get_merchant(request.user)
+        merchant = _get_merchant(request)
         order_query = f'SELECT id, status FROM {ORDER_TABLE} WHERE id = %s AND merchant_id = %s'
-        order = execute_fetchone(order_query, [order_id, merchant['id']])
+        order_db = db_for_order(order_id)
+        order = execute_fetchone(order_query, [order_id, merchant['id']], using=order_db)
         if not order:
             return JsonResponse({'success': False, 'message': '订单不存在'})
 
         if order['status'] != 'unassigned':
             return JsonResponse({'success': False, 'message': '只能删除待分配骑手的订单'})
 
-        execute_non_query(f'DELETE FROM {ORDER_TABLE} WHERE id = %s', [order_id])
+        delete_order_rows(order_id, using=order_db)
         return JsonResponse({'success': True, 'message': '订单删除成功'})
     except ValueError:
         return JsonResponse({'success': False, 'message': '商家信息不存在'})
@@ -611,23 +748,30 @@ def merchant(request):
     merchant_name = request.session.get('merchant_name', request.user.username)
 
     try:
-        current_merchant = _get_merchant(request.user)
-        meals = _format_meals_for_context(_get_meals_for_merchant(current_merchant['id']))
-        joined_platforms = _get_platforms_by_status(current_merchant['id'], 'approved')
-        applied_platforms = _get_platforms_by_status(current_merchant['id'], 'pending')
-
-        platform_query = f'SELECT id, platform_name, phone FROM {PLATFORM_TABLE} ORDER BY platform_name'
-        all_platforms = execute_fetchall(platform_query)
+        current_merchant = _get_merchant(request)
+        # 游标取在读取订单之前，读取期间的变化由下一次增量同步补上
+        orders_sync_token = sync_token()
+        # 各部分互不依赖，并发查询（见 Project/db_utils.py 的 run_parallel）
+        (
+            meal_rows, joined_platforms, applied_platforms, all_platforms,
+            platform_discounts, available_discounts, (order_rows, orders_has_more),
+        ) = run_parallel(
+            (_get_meals_for_merchant, current_merchant['id']),
+            (_get_platforms_by_status, current_merchant['id'], 'approved'),
+            (_get_platforms_by_status, current_merchant['id'], 'pending'),
+            (execute_fetchall, f'SELECT id, platform_name, phone FROM {PLATFORM_TABLE} ORDER BY platform_name'),
+            (_get_discounts_for_merchant, current_merchant['id']),
+            (_get_available_discounts,),
+            (_get_orders_for_merchant, current_merchant['id']),
+        )
+        meals = _format_meals_for_context(meal_rows)
         joined_ids = {platform['id'] for platform in joined_platforms}
         applied_ids = {platform['id'] for platform in applied_platforms}
         not_joined_platforms = [
             platform for platform in all_platforms
             if platform['id'] not in joined_ids and platform['id'] not in applied_ids
         ]
-
-        platform_discounts = _get_discounts_for_merchant(current_merchant['id'])
-        available_discounts = _get_available_discounts()
-        orders = _format_orders_for_context(_get_orders_for_merchant(current_merchant['id']))
+        orders = _format_orders_for_context(order_rows)
     except ValueError:
         meals = []
         joined_platforms = []
@@ -636,6 +780,8 @@ def merchant(request):
         platform_discounts = []
         available_discounts = []
         orders = []
+        orders_has_more = False
+        orders_sync_token = ''
         current_merchant = None
 
     context = {
@@ -647,6 +793,8 @@ def merchant(request):
         'platform_discounts': platform_discounts,
         'available_discounts': available_discounts,
         'orders': orders,
+        'orders_has_more': orders_has_more,
+        'orders_sync_token': orders_sync_token,
         'merchant': current_merchant,
     }
     return render(request, 'merchant.html', context)
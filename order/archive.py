@@ -0,0 +1,177 @@
+"""
+订单冷热分层：已完成、已取消且早于 ORDER_ARCHIVE_AFTER_DAYS 天的订单，连同明细与评分，
+由 archive_orders 命令按批移入同一个库中的归档表（order_archive 等），热表只保留近期订单。
+
+订单历史按页读取（fetch_order_history）：先读热表中热数据窗口内的订单，只有本页越过窗口时
+才再读窗口之前的热表数据与归档表并合并，最近几页的查询不会触及归档数据和旧分区。
+协程版本 afetch_order_history 读法相同，各库、各层的查询并发进行。
+"""
+import asyncio
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from Project.db_utils import MAX_IN_LIST_SIZE, execute_fetchall, execute_non_query, quote_table, run_in_db_thread
+from Project.sharding import newest_first, order_databases
+
+HOT_TABLES = {
+    'order': quote_table('order'),
+    'order_item': quote_table('order_item'),
+    'order_rating': quote_table('order_rating'),
+    'order_meal_rating': quote_table('order_meal_rating'),
+}
+ARCHIVE_TABLES = {
+    'order': quote_table('order_archive'),
+    'order_item': quote_table('order_item_archive'),
+    'order_rating': quote_table('order_rating_archive'),
+    'order_meal_rating': quote_table('order_meal_rating_archive'),
+}
+TIERS = {'hot': HOT_TABLES, 'archive': ARCHIVE_TABLES}
+
+ARCHIVABLE_STATUSES = ('completed', 'cancelled')
+
+ORDER_COLUMNS = ('id, customer_id, platform_id, merchant_id, discount_id, rider_id, customer_name, merchant_name, '
+                 'meal_summary, item_count, price, status, created_at, assigned_at, ready_at, completed_at, updated_at')
+CHILD_COLUMNS = {
+    'order_item': 'id, order_id, meal_id, meal_name, quantity, unit_price, line_price, created_at',
+    'order_rating': 'id, order_id, merchant_rating, platform_rating, rider_rating, created_at',
+    'order_meal_rating': 'id, order_id, order_item_id, meal_id, rating, created_at',
+}
+
+
+def archive_cutoff(days=None):
+    """热数据窗口的起点：早于它的已结束订单可以归档（days 默认为 ORDER_ARCHIVE_AFTER_DAYS）"""
+    return timezone.now() - timedelta(days=settings.ORDER_ARCHIVE_AFTER_DAYS if days is None else days)
+
+
+def archive_batch(cutoff, batch_size, using=None):
+    """
+    把一批早于 cutoff 的已结束订单移入归档表，返回本批移动的订单数（0 表示已无可归档订单）。
+    cutoff 之后仍有变化的订单留在热表，增量同步（order/sync.py）因此只需读热表。
+    """
+    db = connections[using or DEFAULT_DB_ALIAS]
+    lock = ' FOR UPDATE' if db.features.has_select_for_update else ''
+    statuses = ','.join(['%s'] * len(ARCHIVABLE_STATUSES))
+    with transaction.atomic(using=using):
+        rows = execute_fetchall(
+            f'''
+            SELECT id FROM {HOT_TABLES['order']}
+            WHERE status IN ({statuses}) AND created_at < %s AND updated_at < %s
+            ORDER BY id
+            LIMIT %s{lock}
+            ''',
+            [*ARCHIVABLE_STATUSES, cutoff, cutoff, min(batch_size, MAX_IN_LIST_SIZE)],
+            using=using,
+        )
+        order_ids = [row['id'] for row in rows]
+        if not order_ids:
+            return 0
+        placeholders = ','.join(['%s'] * len(order_ids))
+
+        execute_non_query(
+            f'''
+            INSERT INTO {ARCHIVE_TABLES['order']} ({ORDER_COLUMNS}, archived_at)
+            SELECT {ORDER_COLUMNS}, %s FROM {HOT_TABLES['order']} WHERE id IN ({placeholders})
+            ''',
+            [timezone.now(), *order_ids],
+            using=using,
+        )
+        for table_name, columns in CHILD_COLUMNS.items():
+            execute_non_query(
+                f'''
+                INSERT INTO {ARCHIVE_TABLES[table_name]} ({columns})
+                SELECT {columns} FROM {HOT_TABLES[table_name]} WHERE order_id IN ({placeholders})
+                ''',
+                order_ids,
+                using=using,
+            )
+        for table_name in ('order_meal_rating', 'order_rating', 'order_item'):
+            execute_non_query(f'DELETE FROM {HOT_TABLES[table_name]} WHERE order_id IN ({placeholders})',
+                              order_ids, using=using)
+        execute_non_query(f'DELETE FROM {HOT_TABLES["order"]} WHERE id IN ({placeholders})', order_ids, using=using)
+    return len(order_ids)
+
+
+def created_range(since=None, before=None, column='o.created_at'):
+    """下单时间范围 [since, before) 的 SQL 条件（以 AND 开头）与参数；带上它 MySQL 才能裁剪按月的分区"""
+    conditions, params = [], []
+    if since is not None:
+        conditions.append(f'{column} >= %s')
+        params.append(since)
+    if before is not None:
+        conditions.append(f'{column} < %s')
+        params.append(before)
+    return ''.join(f' AND {condition}' for condition in conditions), params
+
+
+def fetch_order_history(fetch_orders, page, page_size):
+    """
+    分页读取跨库、跨冷热两层的订单历史，按下单时间倒序。
+
+    fetch_orders(alias, tables, limit, since=None, before=None) 返回该库、该层（tables 为 HOT_TABLES 或
+    ARCHIVE_TABLES）下单时间在 [since, before) 内、按 created_at、id 倒序的前 limit 个订单行。
+    返回 (本页订单行, 是否还有下一页)。订单行自带列表所需的名称与餐品摘要，不必再回到各库、各层加载明细。
+    页码不超过 max_page(page_size)，每次查询的 LIMIT 不超过 ORDER_HISTORY_MAX_DEPTH + 1。
+    """
+    page = min(page, max_page(page_size))
+    needed = page * page_size + 1
+    cutoff = archive_cutoff()
+
+    def read_tier(tier, **window):
+        rows = []
+        for alias in order_databases():
+            rows.extend(fetch_orders(alias, TIERS[tier], needed, **window))
+        return rows
+
+    # 热数据窗口内的订单都比窗口外的新：窗口内够这一页时，不再读热表的旧分区与归档表
+    rows = newest_first(read_tier('hot', since=cutoff))[:needed]
+    if len(rows) < needed:
+        rows = newest_first(rows + read_tier('hot', before=cutoff) + read_tier('archive'))[:needed]
+    return _slice_page(rows, page, page_size)
+
+
+async def afetch_order_history(fetch_orders, page, page_size):
+    """fetch_order_history 的协程版本：fetch_orders 仍是同步函数，各库、各层的调用在数据库线程池中并发执行"""
+    page = min(page, max_page(page_size))
+    needed = page * page_size + 1
+    cutoff = archive_cutoff()
+
+    async def read_tiers(*windows):
+        results = await asyncio.gather(*(
+            run_in_db_thread(fetch_orders, alias, TIERS[tier], needed, **window)
+            for tier, window in windows
+            for alias in order_databases()
+        ))
+        return [row for rows in results for row in rows]
+
+    rows = newest_first(await read_tiers(('hot', {'since': cutoff})))[:needed]
+    if len(rows) < needed:
+        rows = newest_first(rows + await read_tiers(('hot', {'before': cutoff}), ('archive', {})))[:needed]
+    return _slice_page(rows, page, page_size)
+
+
+def max_page(page_size):
+    """能翻到的最后一页：前面各页加上本页不超过 ORDER_HISTORY_MAX_DEPTH 个订单"""
+    return max(1, settings.ORDER_HISTORY_MAX_DEPTH // page_size)
+
+
+def _slice_page(rows, page, page_size):
+    start = (page - 1) * page_size
+    has_more = len(rows) > start + page_size and page < max_page(page_size)
+    return rows[start:start + page_size], has_more
+
+
+def parse_page(params):
+    """从请求参数解析 (page, page_size)，非法值回退为默认值；page_size、page 分别不超过上限与 max_page(page_size)"""
+    try:
+        page = max(1, int(params.get('page', 1)))
+    except (TypeError, ValueError):
+        page = 1
+    try:
+        page_size = int(params.get('page_size', settings.ORDER_HISTORY_PAGE_SIZE))
+    except (TypeError, ValueError):
+        page_size = settings.ORDER_HISTORY_PAGE_SIZE
+    page_size = min(max(1, page_size), settings.ORDER_HISTORY_MAX_PAGE_SIZE)
+    return min(page, max_page(page_size)), page_size
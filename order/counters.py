@@ -0,0 +1,108 @@
+"""
+订单状态计数：按平台、商家、骑手维护各状态的订单数（含已归档的订单），仪表盘的汇总数字按唯一键读一行即可，
+与历史订单的多少无关。
+
+计数行与订单存放在同一个库：平台的订单都在一个库，对应一行；商家、骑手的订单可能分布在多个库，
+每个库各有一行，读取时相加。订单的每次写入（下单、接单、送达、取餐、删除等）在同一事务中调用
+record_transition 更新计数；计数出现偏差时可用 rebuild_order_counts 命令按订单表重算。
+"""
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from Project.db_utils import (
+    execute_fetchall,
+    execute_fetchone,
+    execute_insert_many,
+    execute_non_query,
+    execute_upsert_add,
+    quote_table,
+)
+
+COUNT_TABLE = 'order_status_count'
+COUNTED_STATUSES = ('unassigned', 'assigned', 'ready', 'completed', 'cancelled')
+# 计数范围 → 订单行中对应的 ID 列
+SCOPES = {'platform': 'platform_id', 'merchant': 'merchant_id', 'rider': 'rider_id'}
+
+
+def record_transition(before, after, using=None):
+    """
+    订单从 before 变为 after 时更新计数，须在写订单的同一事务内调用。
+    before、after 为含 platform_id、merchant_id、rider_id、status 的订单行；新下单时 before 为 None，删除时 after 为 None。
+    """
+    deltas = {}
+    for row, step in ((before, -1), (after, 1)):
+        if row is None:
+            continue
+        if row['status'] not in COUNTED_STATUSES:
+            raise ValueError(f'Unknown order status: {row["status"]}')
+        for scope, id_key in SCOPES.items():
+            if row.get(id_key) is None:
+                continue
+            counts = deltas.setdefault((scope, row[id_key]), {})
+            counts[row['status']] = counts.get(row['status'], 0) + step
+
+    for (scope, entity_id), counts in deltas.items():
+        if any(counts.values()):
+            # 首次插入计数行时各列都需要初值，未变化的状态增量为 0
+            counts = {status: counts.get(status, 0) for status in COUNTED_STATUSES}
+            execute_upsert_add(COUNT_TABLE, ['scope', 'entity_id'], [scope, entity_id], counts, using=using)
+
+
+def get_status_counts(scope, entity_id, databases):
+    """读取 databases 中该平台（商家、骑手）的计数并相加，返回 {状态: 订单数, ..., 'total': 总数}"""
+    counts = dict.fromkeys(COUNTED_STATUSES, 0)
+    query = f'''
+        SELECT {", ".join(COUNTED_STATUSES)}
+        FROM {quote_table(COUNT_TABLE)}
+        WHERE scope = %s AND entity_id = %s
+    '''
+    for alias in databases:
+        row = execute_fetchone(query, [scope, entity_id], using=alias)
+        if row:
+            for status in COUNTED_STATUSES:
+                counts[status] += row[status]
+    counts['total'] = sum(counts.values())
+    return counts
+
+
+def rebuild_status_counts(order_tables, using=None):
+    """
+    按该库的订单表（order_tables 为热表与归档表的表名）重算全部计数，返回写入的计数行数。
+
+    先删除全部计数行、再读订单表：删除锁住了计数表，并发的订单写入在更新计数时等到本事务提交，
+    再把增量加在重算结果上；取得锁之前提交的写入都在之后读到的订单中，不会被重复计入或丢失。
+    MySQL 上本事务以可重复读执行，DELETE 对计数表的整个索引加临键锁，新的计数行也要等待；
+    SQLite 的写事务一开始就持有整个库的写锁。
+    """
+    db = connections[using or DEFAULT_DB_ALIAS]
+    outermost = not db.in_atomic_block
+    with transaction.atomic(using=using):
+        if db.vendor == 'mysql' and outermost:
+            # 只对本事务生效；默认的读已提交不加间隙锁，也不保证多条统计语句读到同一快照
+            execute_non_query('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ', using=using)
+        execute_non_query(f'DELETE FROM {quote_table(COUNT_TABLE)}', using=using)
+        counts = _count_orders(order_tables, using)
+        return execute_insert_many(COUNT_TABLE, ['scope', 'entity_id', *COUNTED_STATUSES], [
+            (scope, entity_id, *(entity[status] for status in COUNTED_STATUSES))
+            for (scope, entity_id), entity in sorted(counts.items())
+        ], using=using)
+
+
+def _count_orders(order_tables, using):
+    counts = {}
+    for table_name in order_tables:
+        for scope, id_column in SCOPES.items():
+            rows = execute_fetchall(
+                f'''
+                SELECT {id_column} AS entity_id, status, COUNT(*) AS total
+                FROM {table_name}
+                WHERE {id_column} IS NOT NULL
+                GROUP BY {id_column}, status
+                ''',
+                using=using,
+            )
+            for row in rows:
+                if row['status'] not in COUNTED_STATUSES:
+                    continue
+                entity = counts.setdefault((scope, row['entity_id']), dict.fromkeys(COUNTED_STATUSES, 0))
+                entity[row['status']] += row['total']
+    return counts
@@ -0,0 +1,32 @@
+"""
+订单变更事件：订单的每次状态变化（下单、接单、骑手放弃、送达、取餐、评价、删除）在更新订单的同一事务中
+写入订单所在库的发件箱，消费方用 Project.db_utils.read_outbox 按游标读取；
+事务提交后唤醒本进程的实时推送（Project/live.py），不等下一次定时读取。
+删除事件同时写入 deleted_order（按顾客、商家建有索引），供增量同步按所属账号读取（见 order/sync.py）。
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from Project.db_utils import append_outbox_event, execute_insert_many
+from Project.live import notify
+
+ORDER_TOPIC = 'order'
+ORDER_EVENT_TYPES = ('created', 'assigned', 'released', 'ready', 'completed', 'rated', 'deleted')
+# 事件内容中的订单字段：消费方据此判断要通知哪个平台、商家、顾客与骑手
+ORDER_EVENT_FIELDS = ('platform_id', 'merchant_id', 'customer_id', 'rider_id', 'status')
+
+DELETED_ORDER_TABLE = 'deleted_order'
+DELETED_ORDER_COLUMNS = ['order_id', 'platform_id', 'merchant_id', 'customer_id', 'deleted_at']
+
+
+def publish_order_event(event_type, order_id, order, using=None):
+    """order 为变化之后的订单行（删除时为删除前的订单行），须含 ORDER_EVENT_FIELDS 中的字段"""
+    if event_type not in ORDER_EVENT_TYPES:
+        raise ValueError(f'Unknown order event: {event_type}')
+    append_outbox_event(ORDER_TOPIC, event_type, order_id, {field: order[field] for field in ORDER_EVENT_FIELDS},
+                        using=using)
+    if event_type == 'deleted':
+        execute_insert_many(DELETED_ORDER_TABLE, DELETED_ORDER_COLUMNS, [
+            (order_id, order['platform_id'], order['merchant_id'], order['customer_id'], timezone.now()),
+        ], using=using)
+    transaction.on_commit(notify, using=using)
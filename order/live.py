@@ -0,0 +1,73 @@
+"""
+订单事件的实时推送（见 Project/live.py）：
+- 骑手订阅签约平台的频道 platform:<平台ID>，新订单与骑手放弃的订单推送 available（带待接订单列表所需的字段），
+  被接走或删除的订单推送 taken；
+- 商家订阅 merchant:<商家ID>、顾客订阅 customer:<顾客ID>，订单的每次变化推送 order（与各自 get_orders 的订单一致），
+  删除推送 order_deleted，见 merchant/views.py 与 customer/views.py 的 route_order_events。
+"""
+from Project.db_utils import execute_fetchall_in, quote_table
+
+ORDER_TABLE = quote_table('order')
+
+AVAILABLE_EVENTS = ('created', 'released')
+TAKEN_EVENTS = ('assigned', 'deleted')
+
+
+def platform_channel(platform_id):
+    return f'platform:{platform_id}'
+
+
+def merchant_channel(merchant_id):
+    return f'merchant:{merchant_id}'
+
+
+def customer_channel(customer_id):
+    return f'customer:{customer_id}'
+
+
+def load_event_orders(events, query):
+    """
+    读取事件对应的订单行，返回 {订单ID: 行}；query 以 {placeholders} 表示订单 ID 列表。
+    每批每个库查询一次，与事件数、连接数无关；读取时已不存在的订单不在结果中。
+    """
+    order_ids = {}
+    for event in events:
+        order_ids.setdefault(event['database'], set()).add(event['entity_id'])
+    orders = {}
+    for database, ids in order_ids.items():
+        for row in execute_fetchall_in(query, sorted(ids), using=database):
+            orders[row['id']] = row
+    return orders
+
+
+def latest_order_events(events):
+    """同一批中同一订单只保留最后一个事件：推送的是读取时订单的最新状态，重复推送没有意义"""
+    latest = {}
+    for event in events:
+        latest.pop(event['entity_id'], None)
+        latest[event['entity_id']] = event
+    return list(latest.values())
+
+
+def route_order_events(events):
+    """把一批订单事件转换为骑手频道的 [(频道, 事件名, 数据), ...]"""
+    orders = load_event_orders(
+        [event for event in events if event['event_type'] in AVAILABLE_EVENTS],
+        f'''
+        SELECT id, platform_id, merchant_name, customer_name, meal_summary, item_count, price, status, created_at
+        FROM {ORDER_TABLE}
+        WHERE id IN ({{placeholders}})
+        ''',
+    )
+
+    messages = []
+    for event in events:
+        channel = platform_channel(event['payload']['platform_id'])
+        if event['event_type'] in TAKEN_EVENTS:
+            messages.append((channel, 'taken', {'id': event['entity_id']}))
+        elif event['event_type'] in AVAILABLE_EVENTS:
+            order = orders.get(event['entity_id'])
+            # 读取时已被接走的订单之后还有 taken 事件，不再推送
+            if order and order['status'] == 'unassigned':
+                messages.append((channel, 'available', {**order, 'price': str(order['price'])}))
+    return messages
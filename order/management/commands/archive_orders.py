@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from order.archive import archive_batch, archive_cutoff
+from Project.sharding import order_databases
+
+
+class Command(BaseCommand):
+    help = '把早于热数据窗口的已完成、已取消订单（连同明细与评分）按批移入归档表，每批一个短事务'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ORDER_ARCHIVE_AFTER_DAYS,
+                            help='归档多少天以前的订单（默认 ORDER_ARCHIVE_AFTER_DAYS）')
+        parser.add_argument('--batch-size', type=int, default=settings.ORDER_ARCHIVE_BATCH_SIZE,
+                            help='每批移动的订单数（上限 500）')
+        parser.add_argument('--max-batches', type=int, default=0, help='每个库最多执行的批数，0 表示直到归档完')
+        parser.add_argument('--pause', type=float, default=0.05, help='两批之间的间隔（秒），给在线写入让出锁')
+
+    def handle(self, *args, **options):
+        if options['days'] < settings.ORDER_ARCHIVE_AFTER_DAYS:
+            # 历史接口认为热数据窗口内的订单都在热表里
+            raise CommandError(f'--days 不能小于 ORDER_ARCHIVE_AFTER_DAYS（{settings.ORDER_ARCHIVE_AFTER_DAYS}）')
+        cutoff = archive_cutoff(options['days'])
+
+        total = 0
+        for alias in order_databases():
+            moved = batches = 0
+            while not options['max_batches'] or batches < options['max_batches']:
+                count = archive_batch(cutoff, options['batch_size'], using=alias)
+                if not count:
+                    break
+                moved += count
+                batches += 1
+                time.sleep(options['pause'])
+            total += moved
+            self.stdout.write(f'{alias or "default"}: 归档 {moved} 个订单（{batches} 批）')
+        self.stdout.write(self.style.SUCCESS(f'共归档 {total} 个 {cutoff:%Y-%m-%d %H:%M} 之前的订单'))
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from Project.db_utils import execute_fetchone, execute_non_query, quote_table
+from Project.sharding import ORDER_TABLES, order_id_floor, shard_aliases
+
+
+class Command(BaseCommand):
+    help = '在 ORDER_SHARD_MAP 配置的每个分片上建立订单表，并把自增 ID 起点设为 分片编号 * ORDER_ID_SPAN'
+
+    def handle(self, *args, **options):
+        aliases = shard_aliases()
+        if not aliases:
+            raise CommandError('未配置订单分片，请设置 DJANGO_ORDER_SHARDS，例如 "1:1,2:2"')
+
+        for alias in aliases:
+            call_command('migrate', database=alias, verbosity=0, interactive=False)
+            floor = order_id_floor(alias)
+            for table_name in ORDER_TABLES:
+                self._raise_auto_increment(alias, table_name, floor)
+            self.stdout.write(f'{alias}: 订单表已就绪，订单 ID 从 {floor} 开始')
+
+        # 分片前已写入 default 的订单 ID 仍在 default 的范围内，不会被路由到分片
+        sharded_platforms = sorted(settings.ORDER_SHARD_MAP)
+        placeholders = ','.join(['%s'] * len(sharded_platforms))
+        row = execute_fetchone(
+            f'SELECT COUNT(*) AS total FROM {quote_table("order")} WHERE platform_id IN ({placeholders})',
+            sharded_platforms,
+        )
+        if row['total']:
+            self.stdout.write(self.style.WARNING(
+                f'default 中仍有 {row["total"]} 个已分片平台的订单，平台与骑手页面将看不到这些订单'
+            ))
+
+    def _raise_auto_increment(self, alias, table_name, floor):
+        table = quote_table(table_name)
+        current = execute_fetchone(f'SELECT COALESCE(MAX(id), 0) AS max_id FROM {table}', using=alias)['max_id']
+        if current >= floor:
+            return
+        if connections[alias].vendor == 'sqlite':
+            execute_non_query('DELETE FROM sqlite_sequence WHERE name = %s', [table_name], using=alias)
+            execute_non_query('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)',
+                              [table_name, floor - 1], using=alias)
+        else:
+            execute_non_query(f'ALTER TABLE {table} AUTO_INCREMENT = {int(floor)}', using=alias)
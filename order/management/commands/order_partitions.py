@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.test import Client
+from django.utils import timezone
+
+from order.archive import archive_cutoff
+from order.partitions import (
+    MAX_PARTITION,
+    PARTITIONED_TABLES,
+    create_future_partitions,
+    drop_empty_partitions,
+    explain_partitions,
+    list_partitions,
+    month_start,
+    partition_name,
+    partition_table,
+    supports_partitioning,
+)
+from Project.bench import allow_test_host, count_queries
+from Project.db_router import REPLICA_DB_ALIAS, replica_configured
+from Project.db_utils import execute_fetchall, execute_fetchone, quote_table
+from Project.sharding import order_databases
+
+ORDER_TABLE = quote_table('order')
+
+# 验证分区裁剪的页面：(角色表, 订单表中的列, 页面)；都以该库热数据窗口内订单最多的账号访问
+VERIFY_PAGES = (
+    ('platform', 'platform_id', '/platform/'),
+    ('merchant', 'merchant_id', '/merchant/get-orders/'),
+    ('customer', 'customer_id', '/customer/get-orders/'),
+)
+
+
+class Command(BaseCommand):
+    help = '维护 MySQL 上按月分区的订单表：预建未来的分区、删除已归档清空的旧分区，并可验证订单页面的查询只扫描近期分区'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--setup', action='store_true', help='把尚未分区的订单表改为按月分区（需 ORDER_PARTITIONING）')
+        parser.add_argument('--premake', type=int, default=settings.ORDER_PARTITION_PREMAKE_MONTHS,
+                            help='预建未来多少个月的分区')
+        parser.add_argument('--keep-old', action='store_true', help='不删除热数据窗口之前的空分区')
+        parser.add_argument('--verify', action='store_true', help='EXPLAIN 平台、商家、顾客订单页面的查询，检查分区裁剪')
+
+    def handle(self, *args, **options):
+        aliases = [alias for alias in order_databases() if supports_partitioning(alias)]
+        if not aliases:
+            raise CommandError('订单表分区只支持 MySQL')
+        if options['setup'] and not settings.ORDER_PARTITIONING:
+            raise CommandError('请先设置 DJANGO_ORDER_PARTITIONING=1')
+
+        now = timezone.now()
+        window_start = month_start(archive_cutoff())
+        failures = []
+        for alias in aliases:
+            name = alias or 'default'
+            for table_name in PARTITIONED_TABLES:
+                if options['setup'] and partition_table(table_name, now, options['premake'], using=alias):
+                    self.stdout.write(f'{name}.{table_name}: 已改为按月分区')
+                if not list_partitions(table_name, using=alias):
+                    self.stdout.write(self.style.WARNING(f'{name}.{table_name}: 未分区，跳过'))
+                    continue
+                created = create_future_partitions(table_name, now, options['premake'], using=alias)
+                dropped, kept = [], []
+                if not options['keep_old']:
+                    dropped, kept = drop_empty_partitions(table_name, window_start, using=alias)
+                self.stdout.write(
+                    f'{name}.{table_name}: 新建 {created or "无"}，删除 {dropped or "无"}'
+                    + (f'，仍有未归档数据而保留 {kept}' if kept else '')
+                )
+            if options['verify']:
+                failures.extend(self._verify(alias, partition_name(window_start)))
+
+        if failures:
+            raise CommandError('以下查询扫描了热数据窗口之前的分区：\n' + '\n'.join(failures))
+
+    def _verify(self, alias, oldest_hot_partition):
+        """以热数据窗口内订单最多的账号访问各订单页面，EXPLAIN 其间在该订单库（及其从库）上执行的查询"""
+        name = alias or 'default'
+        cutoff = archive_cutoff()
+        failures = []
+        for table_name, column, path in VERIFY_PAGES:
+            busiest = execute_fetchone(
+                f'''
+                SELECT {column} AS entity_id, COUNT(*) AS total FROM {ORDER_TABLE}
+                WHERE created_at >= %s GROUP BY {column} ORDER BY total DESC LIMIT 1
+                ''',
+                [cutoff],
+                using=alias,
+            )
+            if not busiest:
+                self.stdout.write(f'{name} {path}: 热数据窗口内没有订单，跳过')
+                continue
+            # 订单历史按页读取，窗口内不满一页时读取更早的分区是预期行为
+            falls_through = busiest['total'] <= settings.ORDER_HISTORY_PAGE_SIZE
+            captured = self._capture(table_name, busiest['entity_id'], path, alias)
+
+            scanned = set()
+            for db, query, params in captured:
+                for partitions in explain_partitions(query, params, using=db).values():
+                    scanned.update(partitions)
+            old = sorted(partition for partition in scanned
+                         if partition != MAX_PARTITION and partition < oldest_hot_partition)
+            self.stdout.write(f'{name} {path}: {len(captured)} 条查询，访问分区 {sorted(scanned) or "无"}')
+            if old and not falls_through:
+                failures.append(f'{name} {path}: {old}')
+        return failures
+
+    def _capture(self, table_name, entity_id, path, alias):
+        row = execute_fetchall(
+            f'''
+            SELECT u.username
+            FROM {quote_table(table_name)} t
+            JOIN user_profile up ON t.user_profile_id = up.id
+            JOIN auth_user u ON up.user_id = u.id
+            WHERE t.id = %s
+            ''',
+            [entity_id],
+        )
+        client = Client()
+        client.force_login(get_user_model().objects.get(username=row[0]['username']))
+        # 默认库上的只读查询可能走从库，一并记录；异步页面的查询在数据库线程池中执行，按所有线程记录
+        databases = [alias] if alias else [DEFAULT_DB_ALIAS, *([REPLICA_DB_ALIAS] if replica_configured() else [])]
+        with allow_test_host(), count_queries(record_sql=True) as queries:
+            response = client.get(path)
+        if response.status_code != 200:
+            raise CommandError(f'{path} returned {response.status_code}')
+        return [(db, sql, params) for db, sql, params in queries.queries
+                if db in databases and sql.lstrip().upper().startswith('SELECT')]
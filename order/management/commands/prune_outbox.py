@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from order.events import DELETED_ORDER_TABLE
+from Project.db_utils import OUTBOX_TABLE, execute_fetchall, execute_non_query, quote_table
+from Project.sharding import order_databases
+
+PRUNE_BATCH_SIZE = 5000
+
+# 按保留期清理的表：{表: 时间列}；deleted_order 供增量同步读取，保留期与发件箱一致（见 order/sync.py）
+PRUNED_TABLES = {
+    OUTBOX_TABLE: 'created_at',
+    DELETED_ORDER_TABLE: 'deleted_at',
+}
+
+
+class Command(BaseCommand):
+    help = '删除各库中早于保留期的变更事件（outbox_event）与订单删除记录（deleted_order），需定期执行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.OUTBOX_RETENTION_DAYS,
+                            help='保留最近多少天的事件（默认 OUTBOX_RETENTION_DAYS）')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        for alias in order_databases():
+            for table_name, column in PRUNED_TABLES.items():
+                deleted = self._prune(table_name, column, cutoff, alias)
+                self.stdout.write(f'{alias or "default"}.{table_name}: 删除 {deleted} 行')
+        self.stdout.write(self.style.SUCCESS('过期事件已清理'))
+
+    def _prune(self, table_name, column, cutoff, alias):
+        deleted = 0
+        while True:
+            # 按 id 分批删除，避免一次删除大量行长时间锁表
+            ids = [row['id'] for row in execute_fetchall(
+                f'SELECT id FROM {quote_table(table_name)} WHERE {column} < %s ORDER BY id LIMIT %s',
+                [cutoff, PRUNE_BATCH_SIZE], using=alias,
+            )]
+            if not ids:
+                return deleted
+            deleted += execute_non_query(
+                f'DELETE FROM {quote_table(table_name)} WHERE id IN ({",".join(["%s"] * len(ids))})',
+                ids, using=alias,
+            )
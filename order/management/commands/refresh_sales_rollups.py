@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from order.rollups import refresh_sales_rollups
+from Project.sharding import order_databases
+
+
+class Command(BaseCommand):
+    help = '按高水位增量刷新各订单库的每日销售汇总（daily_sales、meal_daily_sales），需定期执行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='忽略高水位，重算所有有订单或已有汇总的日期')
+        parser.add_argument('--settle-days', type=int, default=settings.SALES_ROLLUP_SETTLE_DAYS,
+                            help='每次都重算的最近天数（默认 SALES_ROLLUP_SETTLE_DAYS）')
+
+    def handle(self, *args, **options):
+        for alias in order_databases():
+            days = refresh_sales_rollups(using=alias, full=options['full'], settle_days=options['settle_days'])
+            span = f'{days[0]} ~ {days[-1]}' if days else '无'
+            self.stdout.write(f'{alias or "default"}: 重算 {len(days)} 天（{span}）')
+        self.stdout.write(self.style.SUCCESS('销售汇总已刷新'))
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0003_remove_order_meal_remove_orderrating_meal_rating_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('customer_id', models.BigIntegerField(verbose_name='顾客')),
+                ('platform_id', models.BigIntegerField(verbose_name='平台')),
+                ('merchant_id', models.BigIntegerField(verbose_name='商家')),
+                ('discount_id', models.BigIntegerField(blank=True, null=True, verbose_name='折扣')),
+                ('rider_id', models.BigIntegerField(blank=True, null=True, verbose_name='骑手')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='价格')),
+                ('status', models.CharField(choices=[('unassigned', '未分配骑手'), ('assigned', '已分配骑手'), ('ready', '顾客待取餐'), ('completed', '已完成'), ('cancelled', '已取消')], max_length=20, verbose_name='订单状态')),
+                ('created_at', models.DateTimeField(verbose_name='创建时间')),
+                ('archived_at', models.DateTimeField(verbose_name='归档时间')),
+            ],
+            options={
+                'verbose_name': '归档订单',
+                'verbose_name_plural': '归档订单',
+                'db_table': 'order_archive',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('order_id', models.BigIntegerField(db_index=True, verbose_name='订单')),
+                ('meal_id', models.BigIntegerField(verbose_name='餐品')),
+                ('quantity', models.PositiveIntegerField(default=1, verbose_name='数量')),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='单价')),
+                ('line_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='小计')),
+                ('created_at', models.DateTimeField(verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '归档订单餐品',
+                'verbose_name_plural': '归档订单餐品',
+                'db_table': 'order_item_archive',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderMealRating',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('order_id', models.BigIntegerField(db_index=True, verbose_name='订单')),
+                ('order_item_id', models.BigIntegerField(verbose_name='订单餐品')),
+                ('meal_id', models.BigIntegerField(verbose_name='餐品')),
+                ('rating', models.DecimalField(decimal_places=2, max_digits=3, verbose_name='餐品评分')),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': '归档餐品评分',
+                'verbose_name_plural': '归档餐品评分',
+                'db_table': 'order_meal_rating_archive',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderRating',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('order_id', models.BigIntegerField(unique=True)),
+                ('merchant_rating', models.DecimalField(decimal_places=2, max_digits=3)),
+                ('platform_rating', models.DecimalField(decimal_places=2, max_digits=3)),
+                ('rider_rating', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': '归档订单评分',
+                'verbose_name_plural': '归档订单评分',
+                'db_table': 'order_rating_archive',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['customer_id', 'created_at'], name='order_archive_customer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['merchant_id', 'created_at'], name='order_archive_merchant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['platform_id', 'created_at'], name='order_archive_platform_idx'),
+        ),
+    ]
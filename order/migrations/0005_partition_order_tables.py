@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def partition_order_tables(apps, schema_editor):
+    # 只在 MySQL 且显式开启时分区；其余配置下本迁移只去掉外键约束
+    from order.partitions import PARTITIONED_TABLES, partition_table, supports_partitioning
+
+    alias = schema_editor.connection.alias
+    if not settings.ORDER_PARTITIONING or not supports_partitioning(alias):
+        return
+    for table_name in PARTITIONED_TABLES:
+        partition_table(table_name, timezone.now(), settings.ORDER_PARTITION_PREMAKE_MONTHS, using=alias)
+
+
+def unpartition_order_tables(apps, schema_editor):
+    from order.partitions import PARTITIONED_TABLES, supports_partitioning, unpartition_table
+
+    alias = schema_editor.connection.alias
+    if not supports_partitioning(alias):
+        return
+    for table_name in PARTITIONED_TABLES:
+        unpartition_table(table_name, using=alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meal', '0004_alter_meal_rating_count_alter_meal_rating_score'),
+        ('order', '0004_order_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='customer',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='login.customer', verbose_name='顾客'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='discount',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='discount.discount', verbose_name='折扣'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='merchant',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='login.merchant', verbose_name='商家'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='platform',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='login.platform', verbose_name='平台'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='rider',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='login.rider', verbose_name='骑手'),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='meal',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='meal.meal', verbose_name='餐品'),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='order',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='order.order', verbose_name='订单'),
+        ),
+        migrations.AlterField(
+            model_name='ordermealrating',
+            name='order',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='meal_ratings', to='order.order', verbose_name='订单'),
+        ),
+        migrations.AlterField(
+            model_name='ordermealrating',
+            name='order_item',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='meal_ratings', to='order.orderitem', verbose_name='订单餐品'),
+        ),
+        migrations.AlterField(
+            model_name='orderrating',
+            name='order',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='rating', to='order.order'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'created_at'], name='order_customer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['merchant', 'created_at'], name='order_merchant_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['platform', 'created_at'], name='order_platform_created_idx'),
+        ),
+        migrations.RunPython(partition_order_tables, unpartition_order_tables),
+    ]
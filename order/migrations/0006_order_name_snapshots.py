@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:43
+
+import django.db.models.deletion
+from django.db import DEFAULT_DB_ALIAS, migrations, models
+
+# (订单库中的表, ID 列, 快照列, 主库中的来源表, 来源列)
+NAME_SNAPSHOTS = [
+    ('order', 'customer_id', 'customer_name', 'customer', 'customer_name'),
+    ('order', 'merchant_id', 'merchant_name', 'merchant', 'merchant_name'),
+    ('order_archive', 'customer_id', 'customer_name', 'customer', 'customer_name'),
+    ('order_archive', 'merchant_id', 'merchant_name', 'merchant', 'merchant_name'),
+    ('order_item', 'meal_id', 'meal_name', 'meal', 'name'),
+    ('order_item_archive', 'meal_id', 'meal_name', 'meal', 'name'),
+]
+
+
+def backfill_name_snapshots(apps, schema_editor):
+    # 分片上没有目录表，名称一律从主库读取；每个被引用的顾客、商家、餐品一条 UPDATE
+    from Project.db_utils import execute_fetchall, execute_fetchall_in, execute_update_many, quote_table
+
+    alias = schema_editor.connection.alias
+    for table_name, id_column, name_column, source_table, source_column in NAME_SNAPSHOTS:
+        ids = [row['id'] for row in execute_fetchall(
+            f"SELECT DISTINCT {id_column} AS id FROM {quote_table(table_name)} WHERE {name_column} = ''",
+            using=alias,
+        )]
+        if not ids:
+            continue
+        names = execute_fetchall_in(
+            f'SELECT id, {source_column} AS name FROM {quote_table(source_table)} WHERE id IN ({{placeholders}})',
+            ids,
+            using=DEFAULT_DB_ALIAS,
+        )
+        execute_update_many(table_name, id_column, [name_column],
+                            [(row['id'], row['name']) for row in names], using=alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meal', '0004_alter_meal_rating_count_alter_meal_rating_score'),
+        ('order', '0005_partition_order_tables'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedorder',
+            name='customer_name',
+            field=models.CharField(default='', max_length=100, verbose_name='顾客名（下单时）'),
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='merchant_name',
+            field=models.CharField(default='', max_length=100, verbose_name='商家名（下单时）'),
+        ),
+        migrations.AddField(
+            model_name='archivedorderitem',
+            name='meal_name',
+            field=models.CharField(default='', max_length=100, verbose_name='餐品名（下单时）'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='customer_name',
+            field=models.CharField(default='', max_length=100, verbose_name='顾客名（下单时）'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='merchant_name',
+            field=models.CharField(default='', max_length=100, verbose_name='商家名（下单时）'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='meal_name',
+            field=models.CharField(default='', max_length=100, verbose_name='餐品名（下单时）'),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='meal',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to='meal.meal', verbose_name='餐品'),
+        ),
+        migrations.AlterField(
+            model_name='ordermealrating',
+            name='meal',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to='meal.meal', verbose_name='餐品'),
+        ),
+        migrations.RunPython(backfill_name_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:46
+
+from django.db import migrations, models
+
+# (订单表, 明细表)
+SUMMARY_TABLES = [('order', 'order_item'), ('order_archive', 'order_item_archive')]
+BATCH_SIZE = 500
+
+
+def backfill_meal_summaries(apps, schema_editor):
+    # 按订单 ID 分批：每批一次 IN 查询读明细，再按主键逐行写回摘要
+    from order.summary import format_meal_summary
+    from Project.db_utils import execute_fetchall, execute_fetchall_in, execute_update_many, quote_table
+
+    alias = schema_editor.connection.alias
+    for order_table, item_table in SUMMARY_TABLES:
+        last_id = -1
+        while True:
+            order_ids = [row['id'] for row in execute_fetchall(
+                f'SELECT id FROM {quote_table(order_table)} WHERE id > %s AND item_count = 0 ORDER BY id LIMIT %s',
+                [last_id, BATCH_SIZE],
+                using=alias,
+            )]
+            if not order_ids:
+                break
+            last_id = order_ids[-1]
+            items = {}
+            for row in execute_fetchall_in(
+                f'SELECT order_id, meal_name, quantity FROM {quote_table(item_table)} '
+                f'WHERE order_id IN ({{placeholders}}) ORDER BY id',
+                order_ids,
+                using=alias,
+            ):
+                items.setdefault(row['order_id'], []).append((row['meal_name'], row['quantity']))
+            execute_update_many(order_table, 'id', ['meal_summary', 'item_count'], [
+                (order_id, *format_meal_summary(order_items)) for order_id, order_items in items.items()
+            ], using=alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0006_order_name_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedorder',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='明细条数'),
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='meal_summary',
+            field=models.CharField(default='', max_length=255, verbose_name='餐品摘要'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='明细条数'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='meal_summary',
+            field=models.CharField(default='', max_length=255, verbose_name='餐品摘要'),
+        ),
+        migrations.RunPython(backfill_meal_summaries, migrations.RunPython.noop),
+    ]
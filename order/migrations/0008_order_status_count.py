@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:53
+
+from django.db import migrations, models
+
+
+def build_status_counts(apps, schema_editor):
+    # 按已有的热表与归档表订单生成初始计数
+    from order.archive import ARCHIVE_TABLES, HOT_TABLES
+    from order.counters import rebuild_status_counts
+
+    rebuild_status_counts([HOT_TABLES['order'], ARCHIVE_TABLES['order']], using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0007_order_meal_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStatusCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('platform', '平台'), ('merchant', '商家'), ('rider', '骑手')], max_length=10, verbose_name='计数范围')),
+                ('entity_id', models.BigIntegerField(verbose_name='平台/商家/骑手')),
+                ('unassigned', models.IntegerField(default=0, verbose_name='未分配骑手')),
+                ('assigned', models.IntegerField(default=0, verbose_name='已分配骑手')),
+                ('ready', models.IntegerField(default=0, verbose_name='顾客待取餐')),
+                ('completed', models.IntegerField(default=0, verbose_name='已完成')),
+                ('cancelled', models.IntegerField(default=0, verbose_name='已取消')),
+            ],
+            options={
+                'verbose_name': '订单状态计数',
+                'verbose_name_plural': '订单状态计数',
+                'db_table': 'order_status_count',
+                'constraints': [models.UniqueConstraint(fields=('scope', 'entity_id'), name='order_status_count_entity_uniq')],
+            },
+        ),
+        migrations.RunPython(build_status_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0008_order_status_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=30, unique=True, verbose_name='来源表')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='已汇总的最大 ID')),
+                ('updated_at', models.DateTimeField(verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '销售汇总高水位',
+                'verbose_name_plural': '销售汇总高水位',
+                'db_table': 'sales_rollup_watermark',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform_id', models.BigIntegerField(verbose_name='平台')),
+                ('merchant_id', models.BigIntegerField(verbose_name='商家')),
+                ('day', models.DateField(verbose_name='日期')),
+                ('order_count', models.PositiveIntegerField(default=0, verbose_name='订单数')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='实收金额')),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='折扣金额')),
+                ('merchant_rating_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='商家评分合计')),
+                ('merchant_rating_count', models.PositiveIntegerField(default=0, verbose_name='商家评分条数')),
+                ('platform_rating_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='平台评分合计')),
+                ('platform_rating_count', models.PositiveIntegerField(default=0, verbose_name='平台评分条数')),
+            ],
+            options={
+                'verbose_name': '每日销售汇总',
+                'verbose_name_plural': '每日销售汇总',
+                'db_table': 'daily_sales',
+                'indexes': [models.Index(fields=['merchant_id', 'day'], name='daily_sales_merchant_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('platform_id', 'day', 'merchant_id'), name='daily_sales_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MealDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform_id', models.BigIntegerField(verbose_name='平台')),
+                ('merchant_id', models.BigIntegerField(verbose_name='商家')),
+                ('meal_id', models.BigIntegerField(verbose_name='餐品')),
+                ('meal_name', models.CharField(default='', max_length=100, verbose_name='餐品名')),
+                ('day', models.DateField(verbose_name='日期')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='份数')),
+                ('order_count', models.PositiveIntegerField(default=0, verbose_name='订单数')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='实收金额')),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='折扣金额')),
+                ('rating_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='评分合计')),
+                ('rating_count', models.PositiveIntegerField(default=0, verbose_name='评分条数')),
+            ],
+            options={
+                'verbose_name': '餐品每日销售汇总',
+                'verbose_name_plural': '餐品每日销售汇总',
+                'db_table': 'meal_daily_sales',
+                'constraints': [models.UniqueConstraint(fields=('merchant_id', 'day', 'platform_id', 'meal_id'), name='meal_daily_sales_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0009_daily_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedorder',
+            name='assigned_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='接单时间'),
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='取餐时间'),
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='ready_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='送达时间'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='assigned_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='接单时间'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='取餐时间'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='ready_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='送达时间'),
+        ),
+        migrations.CreateModel(
+            name='OrderLatencyHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform_id', models.BigIntegerField(verbose_name='平台')),
+                ('metric', models.CharField(max_length=10, verbose_name='指标')),
+                ('day', models.DateField(verbose_name='日期')),
+                ('bucket', models.PositiveSmallIntegerField(verbose_name='分桶')),
+                ('sample_count', models.IntegerField(default=0, verbose_name='次数')),
+            ],
+            options={
+                'verbose_name': '订单时效分布',
+                'verbose_name_plural': '订单时效分布',
+                'db_table': 'order_latency_histogram',
+                'constraints': [models.UniqueConstraint(fields=('platform_id', 'metric', 'day', 'bucket'), name='order_latency_histogram_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0010_order_lifecycle_timestamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=20, verbose_name='主题')),
+                ('event_type', models.CharField(max_length=20, verbose_name='事件类型')),
+                ('entity_id', models.BigIntegerField(blank=True, null=True, verbose_name='对象ID')),
+                ('payload', models.TextField(default='{}', verbose_name='内容（JSON）')),
+                ('created_at', models.DateTimeField(verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '变更事件',
+                'verbose_name_plural': '变更事件',
+                'db_table': 'outbox_event',
+                'indexes': [models.Index(fields=['created_at'], name='outbox_event_created_idx')],
+            },
+        ),
+    ]
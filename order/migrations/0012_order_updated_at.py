@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+UPDATED_TABLES = ['order', 'order_archive']
+
+
+def backfill_updated_at(apps, schema_editor):
+    # 已有订单取最后一次状态变化的时间
+    from Project.db_utils import execute_non_query, quote_table
+
+    for table_name in UPDATED_TABLES:
+        execute_non_query(
+            f'UPDATE {quote_table(table_name)} SET updated_at = COALESCE(completed_at, ready_at, assigned_at, created_at)',
+            using=schema_editor.connection.alias,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0011_outbox_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedorder',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='更新时间'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='更新时间'),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'updated_at'], name='order_customer_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['merchant', 'updated_at'], name='order_merchant_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:47
+
+import json
+
+from django.db import migrations, models
+
+
+def backfill_deleted_orders(apps, schema_editor):
+    # 保留期内已有的订单删除事件
+    from Project.db_utils import OUTBOX_TABLE, execute_fetchall, execute_insert_many, quote_table
+
+    alias = schema_editor.connection.alias
+    rows = execute_fetchall(
+        f"SELECT entity_id, payload, created_at FROM {quote_table(OUTBOX_TABLE)} "
+        f"WHERE topic = 'order' AND event_type = 'deleted'",
+        using=alias,
+    )
+    deleted = []
+    for row in rows:
+        payload = json.loads(row['payload'])
+        deleted.append((row['entity_id'], payload['platform_id'], payload['merchant_id'], payload['customer_id'],
+                        row['created_at']))
+    execute_insert_many(
+        'deleted_order', ['order_id', 'platform_id', 'merchant_id', 'customer_id', 'deleted_at'], deleted, using=alias,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0012_order_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.BigIntegerField(verbose_name='订单ID')),
+                ('platform_id', models.BigIntegerField(verbose_name='平台')),
+                ('merchant_id', models.BigIntegerField(verbose_name='商家')),
+                ('customer_id', models.BigIntegerField(verbose_name='顾客')),
+                ('deleted_at', models.DateTimeField(verbose_name='删除时间')),
+            ],
+            options={
+                'verbose_name': '已删除订单',
+                'verbose_name_plural': '已删除订单',
+                'db_table': 'deleted_order',
+                'indexes': [models.Index(fields=['customer_id', 'deleted_at'], name='deleted_order_customer_idx'), models.Index(fields=['merchant_id', 'deleted_at'], name='deleted_order_merchant_idx'), models.Index(fields=['deleted_at'], name='deleted_order_deleted_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_deleted_orders, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,12 @@ from django.db import models
 from login.models import Customer, Platform, Merchant, Rider
 from meal.models import Meal
 from discount.models import Discount
+from order.summary import MEAL_SUMMARY_MAX_LENGTH
+
+# 订单表可能在分片库上（目录表不在同一个库），MySQL 上还可能按月分区（分区表不支持外键），
+# 因此订单相关的关联都不建数据库外键约束，级联删除由 Project.sharding.delete_order_rows 显式完成。
+# 顾客名、商家名与餐品名在下单时写入订单快照，读取订单不再回目录表查名称，之后改名、删餐品也不影响历史订单；
+# 订单列表所需的餐品摘要同样在下单时写入订单行（见 order/summary.py）
 
 class Order(models.Model):
     ORDER_STATUS_CHOICES = [
@@ -13,27 +19,53 @@ class Order(models.Model):
         ('cancelled', '已取消'),
     ]
 
-    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, verbose_name="顾客")
-    platform = models.ForeignKey(Platform, on_delete=models.CASCADE, verbose_name="平台")
-    merchant = models.ForeignKey(Merchant, on_delete=models.CASCADE, verbose_name="商家")
-    discount = models.ForeignKey(Discount, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="折扣")
-    rider = models.ForeignKey(Rider, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="骑手")
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, db_constraint=False, verbose_name="顾客")
+    platform = models.ForeignKey(Platform, on_delete=models.CASCADE, db_constraint=False, verbose_name="平台")
+    merchant = models.ForeignKey(Merchant, on_delete=models.CASCADE, db_constraint=False, verbose_name="商家")
+    discount = models.ForeignKey(Discount, on_delete=models.SET_NULL, null=True, blank=True, db_constraint=False,
+                                 verbose_name="折扣")
+    rider = models.ForeignKey(Rider, on_delete=models.SET_NULL, null=True, blank=True, db_constraint=False,
+                              verbose_name="骑手")
+    customer_name = models.CharField(max_length=100, default='', verbose_name="顾客名（下单时）")
+    merchant_name = models.CharField(max_length=100, default='', verbose_name="商家名（下单时）")
+    meal_summary = models.CharField(max_length=MEAL_SUMMARY_MAX_LENGTH, default='', verbose_name="餐品摘要")
+    item_count = models.PositiveIntegerField(default=0, verbose_name="明细条数")
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="价格")
     status = models.CharField(max_length=20, choices=ORDER_STATUS_CHOICES, default='pending', verbose_name="订单状态")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+    # 状态变化的时间（见 order/sla.py）；骑手放弃订单时清空接单与送达时间
+    assigned_at = models.DateTimeField(null=True, blank=True, verbose_name="接单时间")
+    ready_at = models.DateTimeField(null=True, blank=True, verbose_name="送达时间")
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name="取餐时间")
+    # 订单行最后一次变化（含评价）的时间，订单列表按它增量同步（见 order/sync.py）；写订单的语句都要一并更新
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
 
     class Meta:
         db_table = 'order'
         verbose_name = '订单'
         verbose_name_plural = '订单'
+        indexes = [
+            # archive_orders 按状态与下单时间挑选待归档的订单
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            # 订单历史与平台订单列表按 created_at 范围读取（分区裁剪）并按时间倒序取前几条
+            models.Index(fields=['customer', 'created_at'], name='order_customer_created_idx'),
+            models.Index(fields=['merchant', 'created_at'], name='order_merchant_created_idx'),
+            models.Index(fields=['platform', 'created_at'], name='order_platform_created_idx'),
+            # 顾客、商家订单列表的增量同步读取 updated_at 晚于游标的订单
+            models.Index(fields=['customer', 'updated_at'], name='order_customer_updated_idx'),
+            models.Index(fields=['merchant', 'updated_at'], name='order_merchant_updated_idx'),
+        ]
 
     def __str__(self):
-        return f"订单 {self.id} - {self.customer.customer_name} - ¥{self.price}"
+        return f"订单 {self.id} - {self.customer_name} - ¥{self.price}"
 
 
 class OrderItem(models.Model):
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items', verbose_name="订单")
-    meal = models.ForeignKey(Meal, on_delete=models.CASCADE, verbose_name="餐品")
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items', db_constraint=False,
+                              verbose_name="订单")
+    # 餐品删除后保留订单明细，名称以 meal_name 为准
+    meal = models.ForeignKey(Meal, on_delete=models.DO_NOTHING, db_constraint=False, verbose_name="餐品")
+    meal_name = models.CharField(max_length=100, default='', verbose_name="餐品名（下单时）")
     quantity = models.PositiveIntegerField(default=1, verbose_name="数量")
     unit_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="单价")
     line_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="小计")
@@ -45,11 +77,11 @@ class OrderItem(models.Model):
         verbose_name_plural = '订单餐品'
 
     def __str__(self):
-        return f"订单{self.order_id} - {self.meal.name} x {self.quantity}"
+        return f"订单{self.order_id} - {self.meal_name} x {self.quantity}"
 
 
 class OrderRating(models.Model):
-    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='rating')
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='rating', db_constraint=False)
     merchant_rating = models.DecimalField(max_digits=3, decimal_places=2)
     platform_rating = models.DecimalField(max_digits=3, decimal_places=2)
     rider_rating = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
@@ -62,9 +94,11 @@ class OrderRating(models.Model):
 
 
 class OrderMealRating(models.Model):
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='meal_ratings', verbose_name="订单")
-    order_item = models.ForeignKey(OrderItem, on_delete=models.CASCADE, related_name='meal_ratings', verbose_name="订单餐品")
-    meal = models.ForeignKey(Meal, on_delete=models.CASCADE, verbose_name="餐品")
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='meal_ratings', db_constraint=False,
+                              verbose_name="订单")
+    order_item = models.ForeignKey(OrderItem, on_delete=models.CASCADE, related_name='meal_ratings',
+                                   db_constraint=False, verbose_name="订单餐品")
+    meal = models.ForeignKey(Meal, on_delete=models.DO_NOTHING, db_constraint=False, verbose_name="餐品")
     rating = models.DecimalField(max_digits=3, decimal_places=2, verbose_name="餐品评分")
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -72,3 +106,235 @@ class OrderMealRating(models.Model):
         db_table = 'order_meal_rating'
         verbose_name = '餐品评分'
         verbose_name_plural = '餐品评分'
+
+
+class OrderStatusCount(models.Model):
+    """各平台、商家、骑手在本库中各状态的订单数，随订单写入在同一事务中更新（见 order/counters.py）"""
+    SCOPE_CHOICES = [
+        ('platform', '平台'),
+        ('merchant', '商家'),
+        ('rider', '骑手'),
+    ]
+
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES, verbose_name="计数范围")
+    entity_id = models.BigIntegerField(verbose_name="平台/商家/骑手")
+    unassigned = models.IntegerField(default=0, verbose_name="未分配骑手")
+    assigned = models.IntegerField(default=0, verbose_name="已分配骑手")
+    ready = models.IntegerField(default=0, verbose_name="顾客待取餐")
+    completed = models.IntegerField(default=0, verbose_name="已完成")
+    cancelled = models.IntegerField(default=0, verbose_name="已取消")
+
+    class Meta:
+        db_table = 'order_status_count'
+        verbose_name = '订单状态计数'
+        verbose_name_plural = '订单状态计数'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'entity_id'], name='order_status_count_entity_uniq'),
+        ]
+
+
+class OrderLatencyHistogram(models.Model):
+    """各平台每天各时效指标的耗时分布：每个分桶一行，订单状态变化时在同一事务中累加（见 order/sla.py）"""
+    platform_id = models.BigIntegerField(verbose_name="平台")
+    metric = models.CharField(max_length=10, verbose_name="指标")
+    day = models.DateField(verbose_name="日期")
+    bucket = models.PositiveSmallIntegerField(verbose_name="分桶")
+    sample_count = models.IntegerField(default=0, verbose_name="次数")
+
+    class Meta:
+        db_table = 'order_latency_histogram'
+        verbose_name = '订单时效分布'
+        verbose_name_plural = '订单时效分布'
+        constraints = [
+            models.UniqueConstraint(fields=['platform_id', 'metric', 'day', 'bucket'],
+                                    name='order_latency_histogram_uniq'),
+        ]
+
+
+class OutboxEvent(models.Model):
+    """
+    变更事件发件箱（见 Project/db_utils.py 的 append_outbox_events / read_outbox）。
+    order 应用的表在主库与每个订单分片上都会建立：订单事件写入订单所在的库，餐品、折扣事件写入主库，
+    都与产生事件的修改处于同一事务。
+    """
+    topic = models.CharField(max_length=20, verbose_name="主题")
+    event_type = models.CharField(max_length=20, verbose_name="事件类型")
+    entity_id = models.BigIntegerField(null=True, blank=True, verbose_name="对象ID")
+    payload = models.TextField(default='{}', verbose_name="内容（JSON）")
+    created_at = models.DateTimeField(verbose_name="创建时间")
+
+    class Meta:
+        db_table = 'outbox_event'
+        verbose_name = '变更事件'
+        verbose_name_plural = '变更事件'
+        indexes = [
+            # prune_outbox 按时间删除旧事件
+            models.Index(fields=['created_at'], name='outbox_event_created_idx'),
+        ]
+
+
+class DeletedOrder(models.Model):
+    """
+    被删除的订单及其所属的平台、商家、顾客，与订单删除事件在同一事务中写入订单所在的库；
+    增量同步按顾客或商家读取 since 之后删除的订单（见 order/sync.py），随发件箱一起按保留期清理。
+    """
+    order_id = models.BigIntegerField(verbose_name="订单ID")
+    platform_id = models.BigIntegerField(verbose_name="平台")
+    merchant_id = models.BigIntegerField(verbose_name="商家")
+    customer_id = models.BigIntegerField(verbose_name="顾客")
+    deleted_at = models.DateTimeField(verbose_name="删除时间")
+
+    class Meta:
+        db_table = 'deleted_order'
+        verbose_name = '已删除订单'
+        verbose_name_plural = '已删除订单'
+        indexes = [
+            models.Index(fields=['customer_id', 'deleted_at'], name='deleted_order_customer_idx'),
+            models.Index(fields=['merchant_id', 'deleted_at'], name='deleted_order_merchant_idx'),
+            # prune_outbox 按时间删除
+            models.Index(fields=['deleted_at'], name='deleted_order_deleted_idx'),
+        ]
+
+
+# ---- 销售汇总（见 order/rollups.py）----
+# 与订单在同一个库，按下单日期汇总已完成订单；评分存合计与条数，跨库、跨天相加后再求平均
+
+class DailySales(models.Model):
+    """各平台上各商家每天的销售汇总"""
+    platform_id = models.BigIntegerField(verbose_name="平台")
+    merchant_id = models.BigIntegerField(verbose_name="商家")
+    day = models.DateField(verbose_name="日期")
+    order_count = models.PositiveIntegerField(default=0, verbose_name="订单数")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="实收金额")
+    discount_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="折扣金额")
+    merchant_rating_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="商家评分合计")
+    merchant_rating_count = models.PositiveIntegerField(default=0, verbose_name="商家评分条数")
+    platform_rating_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="平台评分合计")
+    platform_rating_count = models.PositiveIntegerField(default=0, verbose_name="平台评分条数")
+
+    class Meta:
+        db_table = 'daily_sales'
+        verbose_name = '每日销售汇总'
+        verbose_name_plural = '每日销售汇总'
+        constraints = [
+            # 平台按日期范围读取
+            models.UniqueConstraint(fields=['platform_id', 'day', 'merchant_id'], name='daily_sales_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['merchant_id', 'day'], name='daily_sales_merchant_day_idx'),
+        ]
+
+
+class MealDailySales(models.Model):
+    """各餐品每天的销售汇总"""
+    platform_id = models.BigIntegerField(verbose_name="平台")
+    merchant_id = models.BigIntegerField(verbose_name="商家")
+    meal_id = models.BigIntegerField(verbose_name="餐品")
+    meal_name = models.CharField(max_length=100, default='', verbose_name="餐品名")
+    day = models.DateField(verbose_name="日期")
+    quantity = models.PositiveIntegerField(default=0, verbose_name="份数")
+    order_count = models.PositiveIntegerField(default=0, verbose_name="订单数")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="实收金额")
+    discount_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="折扣金额")
+    rating_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="评分合计")
+    rating_count = models.PositiveIntegerField(default=0, verbose_name="评分条数")
+
+    class Meta:
+        db_table = 'meal_daily_sales'
+        verbose_name = '餐品每日销售汇总'
+        verbose_name_plural = '餐品每日销售汇总'
+        constraints = [
+            # 商家按日期范围读取
+            models.UniqueConstraint(fields=['merchant_id', 'day', 'platform_id', 'meal_id'],
+                                    name='meal_daily_sales_uniq'),
+        ]
+
+
+class SalesRollupWatermark(models.Model):
+    """各来源表已汇总到的最大 ID（高水位），refresh_sales_rollups 只处理其后新增的行"""
+    source = models.CharField(max_length=30, unique=True, verbose_name="来源表")
+    last_id = models.BigIntegerField(default=0, verbose_name="已汇总的最大 ID")
+    updated_at = models.DateTimeField(verbose_name="更新时间")
+
+    class Meta:
+        db_table = 'sales_rollup_watermark'
+        verbose_name = '销售汇总高水位'
+        verbose_name_plural = '销售汇总高水位'
+
+
+# ---- 归档表（见 order/archive.py）----
+# 与热表列相同、保留原 ID；关联列不建外键，归档后目录数据的增删不影响历史订单
+
+class ArchivedOrder(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    customer_id = models.BigIntegerField(verbose_name="顾客")
+    platform_id = models.BigIntegerField(verbose_name="平台")
+    merchant_id = models.BigIntegerField(verbose_name="商家")
+    discount_id = models.BigIntegerField(null=True, blank=True, verbose_name="折扣")
+    rider_id = models.BigIntegerField(null=True, blank=True, verbose_name="骑手")
+    customer_name = models.CharField(max_length=100, default='', verbose_name="顾客名（下单时）")
+    merchant_name = models.CharField(max_length=100, default='', verbose_name="商家名（下单时）")
+    meal_summary = models.CharField(max_length=MEAL_SUMMARY_MAX_LENGTH, default='', verbose_name="餐品摘要")
+    item_count = models.PositiveIntegerField(default=0, verbose_name="明细条数")
+    price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="价格")
+    status = models.CharField(max_length=20, choices=Order.ORDER_STATUS_CHOICES, verbose_name="订单状态")
+    created_at = models.DateTimeField(verbose_name="创建时间")
+    assigned_at = models.DateTimeField(null=True, blank=True, verbose_name="接单时间")
+    ready_at = models.DateTimeField(null=True, blank=True, verbose_name="送达时间")
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name="取餐时间")
+    updated_at = models.DateTimeField(verbose_name="更新时间")
+    archived_at = models.DateTimeField(verbose_name="归档时间")
+
+    class Meta:
+        db_table = 'order_archive'
+        verbose_name = '归档订单'
+        verbose_name_plural = '归档订单'
+        indexes = [
+            models.Index(fields=['customer_id', 'created_at'], name='order_archive_customer_idx'),
+            models.Index(fields=['merchant_id', 'created_at'], name='order_archive_merchant_idx'),
+            models.Index(fields=['platform_id', 'created_at'], name='order_archive_platform_idx'),
+        ]
+
+
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order_id = models.BigIntegerField(db_index=True, verbose_name="订单")
+    meal_id = models.BigIntegerField(verbose_name="餐品")
+    meal_name = models.CharField(max_length=100, default='', verbose_name="餐品名（下单时）")
+    quantity = models.PositiveIntegerField(default=1, verbose_name="数量")
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="单价")
+    line_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="小计")
+    created_at = models.DateTimeField(verbose_name="创建时间")
+
+    class Meta:
+        db_table = 'order_item_archive'
+        verbose_name = '归档订单餐品'
+        verbose_name_plural = '归档订单餐品'
+
+
+class ArchivedOrderRating(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order_id = models.BigIntegerField(unique=True)
+    merchant_rating = models.DecimalField(max_digits=3, decimal_places=2)
+    platform_rating = models.DecimalField(max_digits=3, decimal_places=2)
+    rider_rating = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'order_rating_archive'
+        verbose_name = '归档订单评分'
+        verbose_name_plural = '归档订单评分'
+
+
+class ArchivedOrderMealRating(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order_id = models.BigIntegerField(db_index=True, verbose_name="订单")
+    order_item_id = models.BigIntegerField(verbose_name="订单餐品")
+    meal_id = models.BigIntegerField(verbose_name="餐品")
+    rating = models.DecimalField(max_digits=3, decimal_places=2, verbose_name="餐品评分")
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'order_meal_rating_archive'
+        verbose_name = '归档餐品评分'
+        verbose_name_plural = '归档餐品评分'
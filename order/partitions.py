@@ -0,0 +1,142 @@
+"""
+MySQL 上按月分区的订单表（可选，DJANGO_ORDER_PARTITIONING=1 时由迁移 0005 或 order_partitions --setup 启用）。
+
+order、order_item 按 created_at 做 RANGE COLUMNS 分区，每月一个分区 pYYYYMM，末尾的 pmax 兜底：
+- MySQL 要求主键包含分区列，主键改为 (id, created_at)，id 仍自增且唯一；
+- 分区表不能有外键，订单相关的外键约束已在迁移 0005 中去掉；
+- order_partitions 命令定期预建未来几个月的分区（从 pmax 中拆出），并删除热数据窗口之前已经归档清空的分区。
+
+查询要带上 created_at 的范围条件才能裁剪到近期分区，见 order.archive.fetch_order_history 与平台订单列表。
+"""
+from datetime import datetime
+
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from Project.db_utils import execute_fetchall, execute_fetchone, execute_non_query, quote_table
+
+PARTITIONED_TABLES = ('order', 'order_item')
+MAX_PARTITION = 'pmax'
+
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'p{month:%Y%m}'
+
+
+def _partition_clause(month):
+    # 分区 pYYYYMM 存放该月的订单，上界为下个月 1 日（UTC）
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN ('{add_months(month, 1):%Y-%m-%d %H:%M:%S}')"
+
+
+def supports_partitioning(using=None):
+    return connections[using or DEFAULT_DB_ALIAS].vendor == 'mysql'
+
+
+def list_partitions(table_name, using=None):
+    """按顺序返回分区：[{'name', 'upper'(datetime 或 None 表示 MAXVALUE), 'rows'(估计值)}]；未分区时为空"""
+    rows = execute_fetchall(
+        '''
+        SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS description, TABLE_ROWS AS table_rows
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+        ''',
+        [table_name],
+        using=using,
+    )
+    partitions = []
+    for row in rows:
+        description = row['description'].strip("'")
+        upper = None if description == 'MAXVALUE' else datetime.fromisoformat(description)
+        partitions.append({'name': row['name'], 'upper': upper, 'rows': row['table_rows']})
+    return partitions
+
+
+def partition_table(table_name, now, premake_months, using=None):
+    """把未分区的表改为按月分区：从最早一笔数据所在月份到 now 之后 premake_months 个月，另加 pmax"""
+    if list_partitions(table_name, using=using):
+        return False
+    table = quote_table(table_name)
+    first = execute_fetchone(f'SELECT MIN(created_at) AS first_at FROM {table}', using=using)['first_at']
+    month = month_start(first or now)
+    last = add_months(month_start(now), premake_months)
+    clauses = []
+    while month <= last:
+        clauses.append(_partition_clause(month))
+        month = add_months(month, 1)
+    clauses.append(f'PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)')
+    # 同一条语句里换主键，自增列 id 始终是某个索引的第一列
+    execute_non_query(f'ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)', using=using)
+    execute_non_query(
+        f'ALTER TABLE {table} PARTITION BY RANGE COLUMNS(created_at) ({", ".join(clauses)})',
+        using=using,
+    )
+    return True
+
+
+def unpartition_table(table_name, using=None):
+    if not list_partitions(table_name, using=using):
+        return False
+    table = quote_table(table_name)
+    execute_non_query(f'ALTER TABLE {table} REMOVE PARTITIONING', using=using)
+    execute_non_query(f'ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id)', using=using)
+    return True
+
+
+def create_future_partitions(table_name, now, premake_months, using=None):
+    """保证 now 之后 premake_months 个月的分区都已存在，返回新建的分区名"""
+    partitions = list_partitions(table_name, using=using)
+    bounded = [partition['upper'] for partition in partitions if partition['upper'] is not None]
+    if not bounded:
+        return []
+    month = max(bounded)
+    last = add_months(month_start(now), premake_months)
+    clauses, created = [], []
+    while month <= last:
+        clauses.append(_partition_clause(month))
+        created.append(partition_name(month))
+        month = add_months(month, 1)
+    if clauses:
+        clauses.append(f'PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)')
+        execute_non_query(
+            f'ALTER TABLE {quote_table(table_name)} REORGANIZE PARTITION {MAX_PARTITION} INTO ({", ".join(clauses)})',
+            using=using,
+        )
+    return created
+
+
+def drop_empty_partitions(table_name, before, using=None):
+    """
+    删除上界不晚于 before 的分区，前提是分区内已经没有数据（已被 archive_orders 移走）。
+    返回 (已删除的分区名, 仍有数据而保留的分区名)
+    """
+    table = quote_table(table_name)
+    dropped, kept = [], []
+    for partition in list_partitions(table_name, using=using):
+        if partition['upper'] is None or partition['upper'] > before:
+            continue
+        # information_schema 中的行数只是估计值，删除前精确计数
+        row = execute_fetchone(f'SELECT COUNT(*) AS total FROM {table} PARTITION ({partition["name"]})', using=using)
+        if row['total']:
+            kept.append(partition['name'])
+            continue
+        execute_non_query(f'ALTER TABLE {table} DROP PARTITION {partition["name"]}', using=using)
+        dropped.append(partition['name'])
+    return dropped, kept
+
+
+def explain_partitions(query, params=None, using=None):
+    """EXPLAIN 一条查询（params 为其参数），返回 {表别名: [访问的分区名]}（只含分区表）"""
+    result = {}
+    for row in execute_fetchall(f'EXPLAIN {query}', params, using=using):
+        if row.get('partitions'):
+            result.setdefault(row['table'], []).extend(row['partitions'].split(','))
+    return result
@@ -0,0 +1,354 @@
+"""
+销售汇总：按下单日期把已完成订单汇总到 daily_sales（平台 × 商家 × 天）与 meal_daily_sales（餐品 × 天），
+商家、平台的销售分析接口只读汇总表，不扫描订单历史。
+
+汇总表与订单在同一个库，以天为单位整体重算。refresh_sales_rollups 命令定期执行，只重算"脏"的日期：
+高水位（sales_rollup_watermark 中各来源表已汇总到的最大 ID）之后新增的订单、评价所在的日期，
+以及最近 SALES_ROLLUP_SETTLE_DAYS 天——这些天的订单仍可能被送达、取餐，
+ID 较小的事务也可能晚于高水位提交。更早的订单状态一般不再变化，需要时可用 --full 全部重算。
+
+实收金额为订单实付金额，折扣金额为明细原价合计减去实付金额；
+平均评分存合计与条数，跨库、跨天相加后再求平均。
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from order.archive import TIERS, created_range
+from Project.db_utils import (
+    execute_fetchall,
+    execute_fetchone,
+    execute_insert_many,
+    execute_non_query,
+    execute_update_many,
+    quote_table,
+)
+
+DAILY_SALES_TABLE = 'daily_sales'
+MEAL_DAILY_SALES_TABLE = 'meal_daily_sales'
+WATERMARK_TABLE = 'sales_rollup_watermark'
+
+DAILY_SALES_COLUMNS = ['platform_id', 'merchant_id', 'day', 'order_count', 'revenue', 'discount_amount',
+                       'merchant_rating_total', 'merchant_rating_count', 'platform_rating_total', 'platform_rating_count']
+MEAL_DAILY_SALES_COLUMNS = ['platform_id', 'merchant_id', 'meal_id', 'meal_name', 'day', 'quantity', 'order_count',
+                            'revenue', 'discount_amount', 'rating_total', 'rating_count']
+
+ROLLUP_STATUS = 'completed'
+
+# 高水位的来源表 → 取该表新增行所属订单的 FROM 子句（o 为订单表）
+WATERMARK_SOURCES = {
+    'order': '{order} o',
+    'order_rating': '{order_rating} s JOIN {order} o ON o.id = s.order_id',
+    'order_meal_rating': '{order_meal_rating} s JOIN {order} o ON o.id = s.order_id',
+}
+
+ZERO = Decimal('0')
+
+
+def _money(value):
+    # SQLite 对 DECIMAL 列求和返回浮点数
+    return Decimal(str(value or 0)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def day_bounds(day):
+    """当地日期 day 的起止时间 [start, end)"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+# ---- 刷新 ----
+
+def refresh_sales_rollups(using=None, full=False, settle_days=None):
+    """重算该库的脏日期并推进高水位，返回重算的日期（升序）"""
+    today = timezone.localdate()
+    settle_days = settings.SALES_ROLLUP_SETTLE_DAYS if settle_days is None else settle_days
+    watermarks = _load_watermarks(using)
+    days, new_watermarks = _changed_days(watermarks if not full else {}, using)
+    if full:
+        days |= _rolled_up_days(using)
+    days |= {today - timedelta(days=offset) for offset in range(settle_days)}
+
+    for day in sorted(days):
+        refresh_day(day, using=using)
+    _save_watermarks(watermarks, new_watermarks, using)
+    return sorted(days)
+
+
+def refresh_day(day, using=None):
+    """按订单表（热表与归档表）重算 day 这一天的汇总行"""
+    start, end = day_bounds(day)
+    with transaction.atomic(using=using):
+        sales, meal_sales = _aggregate(start, end, using)
+        for table_name in (DAILY_SALES_TABLE, MEAL_DAILY_SALES_TABLE):
+            execute_non_query(f'DELETE FROM {quote_table(table_name)} WHERE day = %s', [day], using=using)
+        execute_insert_many(DAILY_SALES_TABLE, DAILY_SALES_COLUMNS, [
+            (platform_id, merchant_id, day, row['order_count'], row['revenue'],
+             max(row['list_price'] - row['revenue'], ZERO), row['merchant_rating_total'],
+             row['merchant_rating_count'], row['platform_rating_total'], row['platform_rating_count'])
+            for (platform_id, merchant_id), row in sorted(sales.items())
+            if row['order_count']
+        ], using=using)
+        execute_insert_many(MEAL_DAILY_SALES_TABLE, MEAL_DAILY_SALES_COLUMNS, [
+            (platform_id, merchant_id, meal_id, row['meal_name'], day, row['quantity'], row['order_count'],
+             row['revenue'], max(row['list_price'] - row['revenue'], ZERO), row['rating_total'], row['rating_count'])
+            for (platform_id, merchant_id, meal_id), row in sorted(meal_sales.items())
+            if row['order_count']
+        ], using=using)
+
+
+def _aggregate(start, end, using):
+    """汇总下单时间在 [start, end) 内的已完成订单，返回 ({(平台, 商家): 汇总}, {(平台, 商家, 餐品): 汇总})"""
+    window, window_params = created_range(since=start, before=end)
+    params = [ROLLUP_STATUS, *window_params]
+    sales = {}
+    meal_sales = {}
+
+    def sales_row(key):
+        return sales.setdefault(key, {
+            'order_count': 0, 'revenue': ZERO, 'list_price': ZERO,
+            'merchant_rating_total': ZERO, 'merchant_rating_count': 0,
+            'platform_rating_total': ZERO, 'platform_rating_count': 0,
+        })
+
+    def meal_row(key):
+        return meal_sales.setdefault(key, {
+            'meal_name': '', 'quantity': 0, 'order_count': 0, 'revenue': ZERO, 'list_price': ZERO,
+            'rating_total': ZERO, 'rating_count': 0,
+        })
+
+    for tables in TIERS.values():
+        for row in execute_fetchall(
+            f'''
+            SELECT o.platform_id, o.merchant_id, COUNT(*) AS order_count, SUM(o.price) AS revenue
+            FROM {tables['order']} o
+            WHERE o.status = %s{window}
+            GROUP BY o.platform_id, o.merchant_id
+            ''',
+            params, using=using,
+        ):
+            entry = sales_row((row['platform_id'], row['merchant_id']))
+            entry['order_count'] += row['order_count']
+            entry['revenue'] += _money(row['revenue'])
+
+        for row in execute_fetchall(
+            f'''
+            SELECT o.platform_id, o.merchant_id, i.meal_id, MAX(i.meal_name) AS meal_name,
+                   SUM(i.quantity) AS quantity, COUNT(DISTINCT i.order_id) AS order_count,
+                   SUM(i.line_price) AS revenue, SUM(i.unit_price * i.quantity) AS list_price
+            FROM {tables['order_item']} i
+            JOIN {tables['order']} o ON o.id = i.order_id
+            WHERE o.status = %s{window}
+            GROUP BY o.platform_id, o.merchant_id, i.meal_id
+            ''',
+            params, using=using,
+        ):
+            entry = meal_row((row['platform_id'], row['merchant_id'], row['meal_id']))
+            entry['meal_name'] = max(entry['meal_name'], row['meal_name'] or '')
+            entry['quantity'] += row['quantity']
+            entry['order_count'] += row['order_count']
+            entry['revenue'] += _money(row['revenue'])
+            entry['list_price'] += _money(row['list_price'])
+            sales_row((row['platform_id'], row['merchant_id']))['list_price'] += _money(row['list_price'])
+
+        for row in execute_fetchall(
+            f'''
+            SELECT o.platform_id, o.merchant_id,
+                   SUM(r.merchant_rating) AS merchant_rating_total, COUNT(r.merchant_rating) AS merchant_rating_count,
+                   SUM(r.platform_rating) AS platform_rating_total, COUNT(r.platform_rating) AS platform_rating_count
+            FROM {tables['order_rating']} r
+            JOIN {tables['order']} o ON o.id = r.order_id
+            WHERE o.status = %s{window}
+            GROUP BY o.platform_id, o.merchant_id
+            ''',
+            params, using=using,
+        ):
+            entry = sales_row((row['platform_id'], row['merchant_id']))
+            for scope in ('merchant', 'platform'):
+                entry[f'{scope}_rating_total'] += _money(row[f'{scope}_rating_total'])
+                entry[f'{scope}_rating_count'] += row[f'{scope}_rating_count']
+
+        for row in execute_fetchall(
+            f'''
+            SELECT o.platform_id, o.merchant_id, m.meal_id, SUM(m.rating) AS rating_total, COUNT(*) AS rating_count
+            FROM {tables['order_meal_rating']} m
+            JOIN {tables['order']} o ON o.id = m.order_id
+            WHERE o.status = %s{window}
+            GROUP BY o.platform_id, o.merchant_id, m.meal_id
+            ''',
+            params, using=using,
+        ):
+            entry = meal_row((row['platform_id'], row['merchant_id'], row['meal_id']))
+            entry['rating_total'] += _money(row['rating_total'])
+            entry['rating_count'] += row['rating_count']
+    return sales, meal_sales
+
+
+def _changed_days(watermarks, using):
+    """高水位之后新增的订单、评价所属订单的下单日期；返回 (日期集合, 各来源表新的高水位)"""
+    days = set()
+    new_watermarks = {}
+    for source, from_clause in WATERMARK_SOURCES.items():
+        id_column = 'o.id' if source == 'order' else 's.id'
+        last_id = watermarks.get(source, 0)
+        for tables in TIERS.values():
+            row = execute_fetchone(
+                f'''
+                SELECT MIN(o.created_at) AS first_created, MAX(o.created_at) AS last_created, MAX({id_column}) AS max_id
+                FROM {from_clause.format(**tables)}
+                WHERE {id_column} > %s
+                ''',
+                [last_id], using=using,
+            )
+            if not row or row['max_id'] is None:
+                continue
+            new_watermarks[source] = max(new_watermarks.get(source, last_id), row['max_id'])
+            days |= _days_between(row['first_created'], row['last_created'])
+    return days, new_watermarks
+
+
+def _rolled_up_days(using):
+    row = execute_fetchone(f'SELECT MIN(day) AS first_day, MAX(day) AS last_day FROM {quote_table(DAILY_SALES_TABLE)}',
+                           using=using)
+    if not row or row['first_day'] is None:
+        return set()
+    return _days_between(row['first_day'], row['last_day'])
+
+
+def _days_between(first, last):
+    first, last = _as_local_date(first), _as_local_date(last)
+    return {first + timedelta(days=offset) for offset in range((last - first).days + 1)}
+
+
+def _as_local_date(value):
+    # SQLite 上 MIN/MAX 的结果丢失了列类型，返回的是字符串
+    if isinstance(value, str):
+        value = parse_datetime(value) if len(value) > 10 else parse_date(value)
+    if isinstance(value, datetime):
+        if timezone.is_naive(value):
+            value = value.replace(tzinfo=dt_timezone.utc)
+        return timezone.localdate(value)
+    return value
+
+
+def _load_watermarks(using):
+    rows = execute_fetchall(f'SELECT source, last_id FROM {quote_table(WATERMARK_TABLE)}', using=using)
+    return {row['source']: row['last_id'] for row in rows}
+
+
+def _save_watermarks(watermarks, new_watermarks, using):
+    now = timezone.now()
+    existing = [(source, last_id, now) for source, last_id in new_watermarks.items() if source in watermarks]
+    execute_update_many(WATERMARK_TABLE, 'source', ['last_id', 'updated_at'], existing, using=using)
+    execute_insert_many(WATERMARK_TABLE, ['source', 'last_id', 'updated_at'], [
+        (source, last_id, now) for source, last_id in new_watermarks.items() if source not in watermarks
+    ], using=using)
+
+
+# ---- 读取 ----
+
+def parse_days(params):
+    """从请求参数解析统计的天数，非法值回退为默认值"""
+    try:
+        days = int(params.get('days', settings.SALES_ANALYTICS_DEFAULT_DAYS))
+    except (TypeError, ValueError):
+        days = settings.SALES_ANALYTICS_DEFAULT_DAYS
+    return min(max(1, days), settings.SALES_ANALYTICS_MAX_DAYS)
+
+
+def fetch_daily_sales(scope, entity_id, days, databases):
+    """
+    读取 databases 中该商家（scope='merchant'）或平台（scope='platform'）最近 days 天的汇总，
+    返回 (按日期升序、没有订单的日期补零的每日数据, 合计)；平均评分为该商家（平台）收到的评分。
+    """
+    first_day = timezone.localdate() - timedelta(days=days - 1)
+    by_day = {first_day + timedelta(days=offset): _empty_totals() for offset in range(days)}
+    query = f'''
+        SELECT day, SUM(order_count) AS order_count, SUM(revenue) AS revenue, SUM(discount_amount) AS discount_amount,
+               SUM({scope}_rating_total) AS rating_total, SUM({scope}_rating_count) AS rating_count
+        FROM {quote_table(DAILY_SALES_TABLE)}
+        WHERE {scope}_id = %s AND day >= %s
+        GROUP BY day
+    '''
+    for alias in databases:
+        for row in execute_fetchall(query, [entity_id, first_day], using=alias):
+            if row['day'] in by_day:
+                _add_totals(by_day[row['day']], row)
+
+    totals = _empty_totals()
+    for entry in by_day.values():
+        _add_totals(totals, entry)
+    return [{'date': day.isoformat(), **_format_totals(entry)} for day, entry in sorted(by_day.items())], \
+        _format_totals(totals)
+
+
+def fetch_meal_sales(merchant_id, days, databases):
+    """该商家最近 days 天各餐品的汇总，按实收金额倒序"""
+    first_day = timezone.localdate() - timedelta(days=days - 1)
+    query = f'''
+        SELECT meal_id, MAX(meal_name) AS meal_name, SUM(quantity) AS quantity, SUM(order_count) AS order_count,
+               SUM(revenue) AS revenue, SUM(discount_amount) AS discount_amount,
+               SUM(rating_total) AS rating_total, SUM(rating_count) AS rating_count
+        FROM {quote_table(MEAL_DAILY_SALES_TABLE)}
+        WHERE merchant_id = %s AND day >= %s
+        GROUP BY meal_id
+    '''
+    meals = {}
+    for alias in databases:
+        for row in execute_fetchall(query, [merchant_id, first_day], using=alias):
+            entry = meals.setdefault(row['meal_id'], {'meal_name': '', 'quantity': 0, **_empty_totals()})
+            entry['meal_name'] = max(entry['meal_name'], row['meal_name'] or '')
+            entry['quantity'] += row['quantity']
+            _add_totals(entry, row)
+    return _ranked(meals, 'meal_id', lambda entry: {'meal_name': entry['meal_name'], 'quantity': entry['quantity']})
+
+
+def fetch_merchant_sales(platform_id, days, using=None):
+    """该平台最近 days 天各商家的汇总，按实收金额倒序；平均评分为平台收到的评分"""
+    first_day = timezone.localdate() - timedelta(days=days - 1)
+    rows = execute_fetchall(
+        f'''
+        SELECT merchant_id, SUM(order_count) AS order_count, SUM(revenue) AS revenue,
+               SUM(discount_amount) AS discount_amount,
+               SUM(platform_rating_total) AS rating_total, SUM(platform_rating_count) AS rating_count
+        FROM {quote_table(DAILY_SALES_TABLE)}
+        WHERE platform_id = %s AND day >= %s
+        GROUP BY merchant_id
+        ''',
+        [platform_id, first_day], using=using,
+    )
+    merchants = {}
+    for row in rows:
+        _add_totals(merchants.setdefault(row['merchant_id'], _empty_totals()), row)
+    return _ranked(merchants, 'merchant_id', lambda entry: {})
+
+
+def _empty_totals():
+    return {'order_count': 0, 'revenue': ZERO, 'discount_amount': ZERO, 'rating_total': ZERO, 'rating_count': 0}
+
+
+def _add_totals(totals, row):
+    totals['order_count'] += row['order_count'] or 0
+    totals['revenue'] += _money(row['revenue'])
+    totals['discount_amount'] += _money(row['discount_amount'])
+    totals['rating_total'] += _money(row['rating_total'])
+    totals['rating_count'] += row['rating_count'] or 0
+
+
+def _format_totals(totals):
+    rating_count = totals['rating_count']
+    return {
+        'order_count': totals['order_count'],
+        'revenue': str(totals['revenue']),
+        'discount_amount': str(totals['discount_amount']),
+        'average_rating': str(_money(totals['rating_total'] / rating_count)) if rating_count else None,
+        'rating_count': rating_count,
+    }
+
+
+def _ranked(entries, id_key, extra):
+    ranked = sorted(entries.items(), key=lambda item: (-item[1]['revenue'], item[0]))
+    return [{id_key: entity_id, **extra(entry), **_format_totals(entry)} for entity_id, entry in ranked]
@@ -0,0 +1,127 @@
+"""
+订单时效：订单的接单、送达、取餐时间写在订单行上（assigned_at / ready_at / completed_at），
+每次写入这些时间的同时在 order_latency_histogram 中给对应平台、当天、耗时所在分桶的次数加一
+（与订单更新同一事务；骑手放弃订单、时间被清空时再减回），平台的 p50 / p95 由这些分桶计数算出，不扫描订单表。
+
+分桶按耗时大致成倍增长，百分位在桶内线性插值，误差不超过所在桶的宽度。
+调整 LATENCY_BUCKETS 后已有的计数不再对应新的分桶，需要执行 rebuild_latency_histograms 重算。
+"""
+import bisect
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from Project.db_utils import execute_fetchall, execute_insert_many, execute_non_query, execute_upsert_add, quote_table
+
+HISTOGRAM_TABLE = 'order_latency_histogram'
+
+# 指标 → (起点列, 终点列)
+METRICS = {
+    'assign': ('created_at', 'assigned_at'),     # 下单到骑手接单
+    'ready': ('created_at', 'ready_at'),         # 下单到送达取餐点
+    'pickup': ('ready_at', 'completed_at'),      # 送达到顾客取餐
+}
+PERCENTILES = (50, 95)
+
+# 各分桶的上界（秒）；最后一个分桶为超过最大上界的部分
+LATENCY_BUCKETS = (30, 60, 120, 180, 300, 420, 600, 900, 1200, 1500, 1800, 2400, 3000, 3600,
+                   5400, 7200, 10800, 14400, 21600, 43200, 86400)
+
+REBUILD_BATCH_SIZE = 5000
+
+
+def bucket_for(seconds):
+    return bisect.bisect_right(LATENCY_BUCKETS, max(seconds, 0))
+
+
+def record_latency(platform_id, metric, started_at, finished_at, using=None, delta=1):
+    """
+    记录一次状态变化的耗时，须在更新订单的同一事务内调用；起点或终点未知（早于本功能的订单）时不计。
+    订单的时间列被清空（骑手放弃订单）时以 delta=-1 撤销先前的记录，分布始终与订单行上的时间一致。
+    """
+    if started_at is None or finished_at is None:
+        return
+    seconds = (finished_at - started_at).total_seconds()
+    execute_upsert_add(HISTOGRAM_TABLE, ['platform_id', 'metric', 'day', 'bucket'],
+                       [platform_id, metric, timezone.localdate(finished_at), bucket_for(seconds)],
+                       {'sample_count': delta}, using=using)
+
+
+def get_platform_sla(platform_id, days, using=None):
+    """
+    平台最近 days 天（按状态变化发生的日期）各指标的次数与 p50 / p95（秒），
+    返回 {指标: {'count': 次数, 'p50': 秒, 'p95': 秒}}，没有样本时百分位为 None。
+    """
+    first_day = timezone.localdate() - timedelta(days=days - 1)
+    rows = execute_fetchall(
+        f'''
+        SELECT metric, bucket, SUM(sample_count) AS sample_count
+        FROM {quote_table(HISTOGRAM_TABLE)}
+        WHERE platform_id = %s AND day >= %s
+        GROUP BY metric, bucket
+        ''',
+        [platform_id, first_day], using=using,
+    )
+    histograms = {metric: {} for metric in METRICS}
+    for row in rows:
+        if row['metric'] in histograms:
+            histograms[row['metric']][row['bucket']] = int(row['sample_count'])
+    return {metric: _summarize(counts) for metric, counts in histograms.items()}
+
+
+def _summarize(counts):
+    total = sum(counts.values())
+    summary = {'count': total}
+    for percentile in PERCENTILES:
+        summary[f'p{percentile}'] = _percentile(counts, total, percentile) if total else None
+    return summary
+
+
+def _percentile(counts, total, percentile):
+    target = total * percentile / 100
+    seen = 0
+    for bucket in sorted(counts):
+        count = counts[bucket]
+        if count and seen + count >= target:
+            lower = LATENCY_BUCKETS[bucket - 1] if bucket else 0
+            if bucket >= len(LATENCY_BUCKETS):
+                return lower
+            return round(lower + (LATENCY_BUCKETS[bucket] - lower) * (target - seen) / count, 1)
+        seen += count
+    return LATENCY_BUCKETS[-1]
+
+
+def rebuild_latency_histograms(order_tables, using=None):
+    """按该库订单表（热表与归档表）上的时间列重算全部分布，返回写入的行数"""
+    columns = sorted({column for pair in METRICS.values() for column in pair})
+    histograms = {}
+    for table_name in order_tables:
+        last_id = 0
+        while True:
+            rows = execute_fetchall(
+                f'''
+                SELECT id, platform_id, {", ".join(columns)}
+                FROM {table_name}
+                WHERE id > %s AND assigned_at IS NOT NULL
+                ORDER BY id
+                LIMIT %s
+                ''',
+                [last_id, REBUILD_BATCH_SIZE], using=using,
+            )
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            for row in rows:
+                for metric, (start_column, end_column) in METRICS.items():
+                    if row[start_column] is None or row[end_column] is None:
+                        continue
+                    key = (row['platform_id'], metric, timezone.localdate(row[end_column]),
+                           bucket_for((row[end_column] - row[start_column]).total_seconds()))
+                    histograms[key] = histograms.get(key, 0) + 1
+
+    with transaction.atomic(using=using):
+        execute_non_query(f'DELETE FROM {quote_table(HISTOGRAM_TABLE)}', using=using)
+        return execute_insert_many(HISTOGRAM_TABLE, ['platform_id', 'metric', 'day', 'bucket', 'sample_count'], [
+            (*key, count) for key, count in sorted(histograms.items())
+        ], using=using)
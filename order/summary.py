@@ -0,0 +1,14 @@
+"""
+订单的餐品摘要：下单时写入 order.meal_summary（"餐品名 x数量, ..."）与 item_count（明细条数），
+订单列表直接从订单行渲染，不再逐单加载 order_item；明细只在顾客展开、评价某个订单时按需读取。
+"""
+
+MEAL_SUMMARY_MAX_LENGTH = 255
+
+
+def format_meal_summary(items):
+    """items 为 [(餐品名, 数量), ...]，返回 (摘要, 明细条数)；摘要过长时截断并以省略号结尾"""
+    summary = ', '.join(f'{name} x{quantity}' for name, quantity in items)
+    if len(summary) > MEAL_SUMMARY_MAX_LENGTH:
+        summary = summary[:MEAL_SUMMARY_MAX_LENGTH - 1] + '…'
+    return summary, len(items)
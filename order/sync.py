@@ -0,0 +1,105 @@
+"""
+订单列表的增量同步：客户端整页读取订单时拿到同步游标，之后带上 since=游标，只取这之后新建或变化的订单
+以及被删除的订单 ID，按 ID 合并进已加载的列表，不再每次操作后重读整个列表。
+
+- 订单的每次变化（含评价）都更新 updated_at，删除则读 deleted_order 中该顾客或商家的记录（见 order/events.py）；
+- updated_at 在事务提交前写入，读取时仍未提交的变化可能早于游标，因此游标往回留 ORDER_SYNC_OVERLAP_SECONDS 秒，
+  重叠部分的订单会重复返回，客户端按 ID 覆盖即可；
+- 只读热表：在热数据窗口内有变化的订单不会被归档（见 order/archive.py 的 archive_batch）。
+  游标早于热数据窗口或发件箱保留期、或变化的订单超过 ORDER_SYNC_LIMIT 个时，客户端需要整页重读。
+
+协程版本 afetch_order_changes 读法相同，各库的查询并发进行。
+"""
+import asyncio
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from order.archive import HOT_TABLES, archive_cutoff
+from order.events import DELETED_ORDER_TABLE
+from Project.db_router import replica_reads
+from Project.db_utils import execute_fetchall, quote_table, run_in_db_thread
+from Project.sharding import newest_first, order_databases
+
+
+def sync_token():
+    """本次读取之后客户端应携带的游标"""
+    return (timezone.now() - timedelta(seconds=settings.ORDER_SYNC_OVERLAP_SECONDS)).isoformat()
+
+
+def parse_since(params):
+    """从请求参数解析 since 游标；未提供或无法解析时为 None（客户端整页重读）"""
+    try:
+        since = parse_datetime(params.get('since') or '')
+    except ValueError:
+        return None
+    if since is None:
+        return None
+    return timezone.make_aware(since) if timezone.is_naive(since) else since
+
+
+def fetch_order_changes(fetch_orders, owner_key, owner_id, since):
+    """
+    读取 since 之后新建或变化的订单与删除的订单 ID，返回 (订单行, 删除的订单 ID)；
+    since 为 None 或需要整页重读时返回 None。
+
+    fetch_orders(alias, tables, limit, updated_since=...) 返回该库热表中 updated_at 不早于 updated_since 的前 limit 个订单行；
+    owner_key 为订单事件中归属的字段（customer_id、merchant_id），用来挑出该用户的订单被删除的事件。
+    """
+    if not _within_retention(since):
+        return None
+
+    # 读主库：从库的复制延迟可能超过游标的重叠时间
+    with replica_reads(enabled=False):
+        rows = []
+        for alias in order_databases():
+            rows.extend(fetch_orders(alias, HOT_TABLES, settings.ORDER_SYNC_LIMIT + 1, updated_since=since))
+        if len(rows) > settings.ORDER_SYNC_LIMIT:
+            return None
+        order_ids = []
+        for alias in order_databases():
+            order_ids.extend(_deleted_order_ids(owner_key, owner_id, since, alias))
+        return newest_first(rows), order_ids
+
+
+async def afetch_order_changes(fetch_orders, owner_key, owner_id, since):
+    """fetch_order_changes 的协程版本：fetch_orders 仍是同步函数，各库的变化与删除在数据库线程池中并发读取"""
+    if not _within_retention(since):
+        return None
+
+    with replica_reads(enabled=False):
+        databases = order_databases()
+        results = await asyncio.gather(
+            *(run_in_db_thread(fetch_orders, alias, HOT_TABLES, settings.ORDER_SYNC_LIMIT + 1, updated_since=since)
+              for alias in databases),
+            *(run_in_db_thread(_deleted_order_ids, owner_key, owner_id, since, alias) for alias in databases),
+        )
+    rows = [row for changed in results[:len(databases)] for row in changed]
+    if len(rows) > settings.ORDER_SYNC_LIMIT:
+        return None
+    return newest_first(rows), [order_id for deleted in results[len(databases):] for order_id in deleted]
+
+
+def _within_retention(since):
+    oldest = max(archive_cutoff(), timezone.now() - timedelta(days=settings.OUTBOX_RETENTION_DAYS))
+    return since is not None and since >= oldest
+
+
+# 增量同步可按哪些列读取删除的订单，deleted_order 上都有 (列, deleted_at) 索引
+DELETED_ORDER_OWNER_KEYS = ('customer_id', 'merchant_id')
+
+
+def _deleted_order_ids(owner_key, owner_id, since, alias):
+    if owner_key not in DELETED_ORDER_OWNER_KEYS:
+        raise ValueError(f'Unknown owner key: {owner_key}')
+    return [row['order_id'] for row in execute_fetchall(
+        f'''
+        SELECT order_id
+        FROM {quote_table(DELETED_ORDER_TABLE)}
+        WHERE {owner_key} = %s AND deleted_at >= %s
+        ''',
+        [owner_id, since],
+        using=alias,
+    )]
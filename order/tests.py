@@ -1,3 +1,172 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import skipUnless
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from order.archive import ARCHIVE_TABLES, HOT_TABLES, fetch_order_history, parse_page
+from order.counters import get_status_counts, rebuild_status_counts, record_transition
+from order.models import Order, OutboxEvent
+from Project.db_utils import append_outbox_event, fetch_outbox_events, outbox_head, parse_outbox_cursor, read_outbox
+from Project.sharding import shard_aliases
+
+
+def _order(status, rider_id=None, **fields):
+    return {'platform_id': 1, 'merchant_id': 2, 'customer_id': 3, 'rider_id': rider_id, 'status': status, **fields}
+
+
+class StatusCountTests(TestCase):
+    def counts(self, scope, entity_id):
+        counts = get_status_counts(scope, entity_id, [None])
+        return {status: total for status, total in counts.items() if total}
+
+    def test_new_order_counts_for_platform_and_merchant(self):
+        record_transition(None, _order('unassigned'))
+        self.assertEqual(self.counts('platform', 1), {'unassigned': 1, 'total': 1})
+        self.assertEqual(self.counts('merchant', 2), {'unassigned': 1, 'total': 1})
+        self.assertEqual(self.counts('rider', 5), {})
+
+    def test_each_transition_moves_one_order(self):
+        record_transition(None, _order('unassigned'))
+        record_transition(_order('unassigned'), _order('assigned', rider_id=5))
+        self.assertEqual(self.counts('platform', 1), {'assigned': 1, 'total': 1})
+        self.assertEqual(self.counts('rider', 5), {'assigned': 1, 'total': 1})
+
+        # 骑手放弃：订单回到未分配，骑手的计数清零
+        record_transition(_order('assigned', rider_id=5), _order('unassigned'))
+        self.assertEqual(self.counts('platform', 1), {'unassigned': 1, 'total': 1})
+        self.assertEqual(self.counts('rider', 5), {})
+
+        record_transition(_order('unassigned'), _order('assigned', rider_id=6))
+        record_transition(_order('assigned', rider_id=6), _order('ready', rider_id=6))
+        record_transition(_order('ready', rider_id=6), _order('completed', rider_id=6))
+        self.assertEqual(self.counts('platform', 1), {'completed': 1, 'total': 1})
+        self.assertEqual(self.counts('merchant', 2), {'completed': 1, 'total': 1})
+        self.assertEqual(self.counts('rider', 6), {'completed': 1, 'total': 1})
+
+    def test_delete_decrements(self):
+        record_transition(None, _order('unassigned'))
+        record_transition(None, _order('unassigned'))
+        record_transition(_order('unassigned'), None)
+        self.assertEqual(self.counts('platform', 1), {'unassigned': 1, 'total': 1})
+
+    def test_unknown_status_is_rejected(self):
+        with self.assertRaises(ValueError):
+            record_transition(None, _order('pending'))
+
+    def test_rebuild_matches_orders_and_later_transitions_add_on_top(self):
+        for status, rider_id in (('unassigned', None), ('assigned', 5), ('completed', 5)):
+            Order.objects.create(platform_id=1, merchant_id=2, customer_id=3, rider_id=rider_id, price=10,
+                                 status=status)
+        # 与订单不一致的旧计数被整体替换
+        record_transition(None, _order('ready', platform_id=9))
+
+        rebuild_status_counts([HOT_TABLES['order'], ARCHIVE_TABLES['order']])
+        self.assertEqual(self.counts('platform', 1), {'unassigned': 1, 'assigned': 1, 'completed': 1, 'total': 3})
+        self.assertEqual(self.counts('rider', 5), {'assigned': 1, 'completed': 1, 'total': 2})
+        self.assertEqual(self.counts('platform', 9), {})
+
+        record_transition(_order('unassigned'), _order('assigned', rider_id=5))
+        self.assertEqual(self.counts('platform', 1), {'assigned': 2, 'completed': 1, 'total': 3})
+        self.assertEqual(self.counts('rider', 5), {'assigned': 2, 'completed': 1, 'total': 3})
+
+
+@override_settings(ORDER_HISTORY_MAX_DEPTH=100)
+class OrderHistoryPageTests(TestCase):
+    def test_page_is_capped_by_depth(self):
+        self.assertEqual(parse_page({'page': '1000000', 'page_size': '500'}), (1, 500))
+        self.assertEqual(parse_page({'page': '7', 'page_size': '50'}), (2, 50))
+        self.assertEqual(parse_page({'page': 'x', 'page_size': '0'}), (1, 1))
+
+    def test_deep_page_limit_is_bounded_and_last_page_has_no_more(self):
+        now = timezone.now()
+        limits = []
+
+        def fetch_orders(alias, tables, limit, since=None, before=None):
+            limits.append(limit)
+            # 配置了分片时订单只放在主库
+            if alias is not None:
+                return []
+            return [{'id': order_id, 'created_at': now} for order_id in range(1000, 1000 - limit, -1)]
+
+        rows, has_more = fetch_order_history(fetch_orders, 1000000, 50)
+        self.assertEqual(max(limits), 101)
+        self.assertEqual([row['id'] for row in rows], list(range(950, 900, -1)))
+        self.assertFalse(has_more)
+
+        rows, has_more = fetch_order_history(fetch_orders, 1, 50)
+        self.assertEqual(len(rows), 50)
+        self.assertTrue(has_more)
+
+
+@override_settings(OUTBOX_GAP_SECONDS=10)
+class OutboxReadTests(TestCase):
+    def event(self, event_id, topic='order', age_seconds=0):
+        OutboxEvent.objects.create(id=event_id, topic=topic, event_type='updated', entity_id=event_id,
+                                   created_at=timezone.now() - timedelta(seconds=age_seconds))
+
+    def ids(self, events):
+        return [event['id'] for event in events]
+
+    def test_fresh_gap_holds_the_cursor(self):
+        self.event(1)
+        # id 2 尚未提交，其后的 3 刚写入：停在 1 之后，下次再读
+        self.event(3)
+        events, after_id = fetch_outbox_events(0)
+        self.assertEqual(self.ids(events), [1])
+        self.assertEqual(after_id, 1)
+
+        self.event(2)
+        events, after_id = fetch_outbox_events(after_id)
+        self.assertEqual(self.ids(events), [2, 3])
+        self.assertEqual(after_id, 3)
+
+    def test_settled_gap_is_crossed(self):
+        self.event(1, age_seconds=60)
+        # id 2 的事务已回滚：3 写入已超过 OUTBOX_GAP_SECONDS，越过空缺
+        self.event(3, age_seconds=11)
+        self.event(5)
+        events, after_id = fetch_outbox_events(0)
+        self.assertEqual(self.ids(events), [1, 3])
+        self.assertEqual(after_id, 3)
+
+    def test_topic_filter_still_advances_the_cursor(self):
+        self.event(1, topic='meal')
+        self.event(2, topic='order')
+        self.event(3, topic='discount')
+        events, after_id = fetch_outbox_events(0, topics={'order'})
+        self.assertEqual(self.ids(events), [2])
+        self.assertEqual(after_id, 3)
+
+        events, after_id = fetch_outbox_events(after_id, topics={'order'})
+        self.assertEqual((events, after_id), ([], 3))
+
+    def test_read_outbox_keeps_positions_of_other_databases(self):
+        self.event(1)
+        self.event(2, topic='meal')
+        events, cursor = read_outbox('default:0,shard9:7', [None], topics={'order'})
+        self.assertEqual([(event['database'], event['id']) for event in events], [('default', 1)])
+        self.assertEqual(parse_outbox_cursor(cursor), {'default': 2, 'shard9': 7})
+        self.assertEqual(read_outbox(cursor, [None]), ([], cursor))
+
+
+@skipUnless(shard_aliases(), '需要配置订单分片（DJANGO_ORDER_SHARDS）')
+class ShardedOutboxReadTests(TestCase):
+    databases = {'default', *shard_aliases()}
+
+    def test_cursor_round_trip_across_databases(self):
+        shard = shard_aliases()[0]
+        cursor = outbox_head([None, shard])
+        append_outbox_event('meal', 'updated', 1)
+        append_outbox_event('order', 'updated', 2, using=shard)
+        append_outbox_event('order', 'updated', 3, using=shard)
+
+        events, cursor = read_outbox(cursor, [None, shard])
+        self.assertEqual(sorted((event['database'], event['entity_id']) for event in events),
+                         [('default', 1), (shard, 2), (shard, 3)])
+        self.assertEqual(cursor, outbox_head([None, shard]))
+
+        append_outbox_event('order', 'updated', 4, using=shard)
+        events, cursor = read_outbox(cursor, [None, shard])
+        self.assertEqual([(event['database'], event['entity_id']) for event in events], [(shard, 4)])
+        self.assertEqual(read_outbox(cursor, [None, shard]), ([], cursor))
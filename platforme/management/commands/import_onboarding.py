@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Project import hashing
+from platforme.onboarding import DEFAULT_BATCH_SIZE, FORMATS, OnboardingError, OnboardingImporter, detect_format
+
+
+class Command(BaseCommand):
+    help = '从 CSV / JSON / JSONL 文件批量导入平台、商家、骑手、餐品和折扣（字段说明见 platforme/onboarding.py）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='导入文件路径')
+        parser.add_argument('--format', choices=FORMATS, default=None, help='文件格式，默认按扩展名判断')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='每批落库的记录数')
+        parser.add_argument('--default-password', default=None,
+                            help='记录未提供密码时使用的初始密码；不指定则账号无法用密码登录')
+
+    def handle(self, *args, **options):
+        try:
+            fmt = options['format'] or detect_format(options['path'])
+            importer = OnboardingImporter(batch_size=options['batch_size'],
+                                          default_password=options['default_password'])
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                result = importer.import_stream(stream, fmt)
+        except (OnboardingError, OSError, json.JSONDecodeError) as exc:
+            raise CommandError(f'导入失败: {exc}')
+        finally:
+            hashing.shutdown()
+        self.stdout.write(json.dumps(result, indent=2, ensure_ascii=False))
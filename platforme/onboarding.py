@@ -0,0 +1,496 @@
+"""
+平台入驻批量导入：一次性导入平台、商家、骑手、餐品和折扣，替代逐个注册、逐个上架、逐个申请入驻。
+
+每条记录通过 type 字段区分类型（CSV 表头取各类型字段的并集，多个平台名用 | 分隔）：
+
+- platform: username, password, platform_name, phone
+- merchant: username, password, merchant_name, phone, address, platforms  （自动生成已通过的入驻申请）
+- rider:    username, password, rider_name, phone, platform              （自动生成已通过的签约申请）
+- meal:     merchant（商家用户名）, platform（平台名）, name, price, meal_type
+- discount: merchant, platform, discount_rate
+- customer: username, password, customer_name, phone, address
+
+记录按流读取、每 batch_size 条落库一次；每批在一个事务内按 平台 → 商家 → 骑手 → 顾客 → 餐品 → 折扣 的顺序
+用多行 INSERT 写入，新账号的 id 通过一次 IN 查询取回，不再逐行 lastrowid。
+已存在的同类型账号、同名餐品会被复用/跳过，因此同一文件可以重复导入。
+"""
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from Project import hashing
+from Project.db_utils import (
+    MAX_IN_LIST_SIZE,
+    append_outbox_events,
+    execute_fetchall,
+    execute_fetchall_in,
+    execute_insert_many,
+    execute_non_query,
+    execute_update_many,
+    quote_table,
+)
+from register.bloom import username_bloom
+
+RECORD_TYPES = ('platform', 'merchant', 'rider', 'customer', 'meal', 'discount')
+ACCOUNT_TYPES = ('platform', 'merchant', 'rider', 'customer')
+FORMATS = ('csv', 'jsonl', 'json')
+MEAL_TYPES = {'breakfast', 'lunch', 'dinner', 'lunch_and_dinner'}
+PLACEHOLDER_ADDRESS = '待填写'
+DEFAULT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+
+PLATFORM_TABLE = quote_table('platform')
+
+AUTH_USER_INSERT_COLUMNS = [
+    'username', 'password', 'first_name', 'last_name', 'email',
+    'is_superuser', 'is_staff', 'is_active', 'date_joined',
+]
+
+# 各角色表导入时写入的列
+ROLE_COLUMNS = {
+    'platform': ['user_profile_id', 'platform_name', 'phone', 'rating_score', 'rating_count', 'created_at'],
+    'merchant': ['user_profile_id', 'merchant_name', 'phone', 'address', 'rating_score', 'rating_count',
+                 'created_at'],
+    'rider': ['user_profile_id', 'rider_name', 'phone', 'status', 'rating_score', 'rating_count', 'created_at'],
+    'customer': ['user_profile_id', 'customer_name', 'phone', 'address', 'created_at'],
+}
+
+
+class OnboardingError(ValueError):
+    pass
+
+
+def detect_format(filename):
+    lowered = (filename or '').lower()
+    if lowered.endswith('.jsonl') or lowered.endswith('.ndjson'):
+        return 'jsonl'
+    if lowered.endswith('.json'):
+        return 'json'
+    if lowered.endswith('.csv'):
+        return 'csv'
+    raise OnboardingError('无法识别的文件格式，请使用 .csv、.json 或 .jsonl')
+
+
+def iter_records(stream, fmt):
+    """按格式逐条产出记录（dict）；CSV 与 JSONL 均为流式读取"""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'jsonl':
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    elif fmt == 'json':
+        data = json.load(stream)
+        if isinstance(data, list):
+            yield from data
+        elif isinstance(data, dict):
+            # {"platforms": [...], "merchants": [...], ...}
+            for record_type in RECORD_TYPES:
+                for record in data.get(f'{record_type}s') or []:
+                    yield {'type': record_type, **record}
+        else:
+            raise OnboardingError('JSON 文件顶层必须是数组或对象')
+    else:
+        raise OnboardingError(f'不支持的格式: {fmt}')
+
+
+def _text(record, key, default=''):
+    value = record.get(key)
+    if value is None:
+        return default
+    return str(value).strip() or default
+
+
+def _names(value):
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value).split('|') if item.strip()]
+
+
+class OnboardingImporter:
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, default_password=None):
+        self.batch_size = max(1, batch_size)
+        self.default_password = default_password
+        self.buffers = {record_type: [] for record_type in RECORD_TYPES}
+        self.buffered = 0
+        self.line = 0
+        self.platform_ids = {}
+        self.merchant_ids = {}
+        self.discount_ids = {}
+        self.created = {record_type: 0 for record_type in RECORD_TYPES}
+        self.skipped = 0
+        self.errors = []
+
+    # ---- 入口 ----
+
+    def import_stream(self, stream, fmt):
+        return self.import_records(iter_records(stream, fmt))
+
+    def import_records(self, records):
+        for record in records:
+            self.feed(record)
+        return self.finish()
+
+    def feed(self, record):
+        self.line += 1
+        record_type = _text(record, 'type').lower()
+        if record_type not in RECORD_TYPES:
+            self._skip(self.line, f'未知的记录类型: {record_type or "(空)"}')
+            return
+        self.buffers[record_type].append((self.line, record))
+        self.buffered += 1
+        if self.buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffered:
+            return
+        batches = {record_type: self.buffers[record_type] for record_type in RECORD_TYPES}
+        self.buffers = {record_type: [] for record_type in RECORD_TYPES}
+        self.buffered = 0
+        password_hashes = self._hash_passwords(batches)
+        with transaction.atomic():
+            for user_type in ACCOUNT_TYPES:
+                self._import_accounts(user_type, batches[user_type], password_hashes)
+            self._import_meals(batches['meal'])
+            self._import_discounts(batches['discount'])
+
+    def finish(self):
+        self.flush()
+        return {
+            'records': self.line,
+            'created': self.created,
+            'skipped': self.skipped,
+            'errors': self.errors,
+        }
+
+    def _skip(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'message': message})
+
+    # ---- 账号（平台 / 商家 / 骑手） ----
+
+    def _import_accounts(self, user_type, entries, password_hashes):
+        records = {}
+        for line, record in entries:
+            username = _text(record, 'username')
+            if not username:
+                self._skip(line, '用户名不能为空')
+                continue
+            if username.lower() in records:
+                self._skip(line, f'用户名重复: {username}')
+                continue
+            records[username.lower()] = (line, username, record)
+        if not records:
+            return
+
+        existing = execute_fetchall_in(
+            '''
+            SELECT u.id, u.username, up.user_type
+            FROM auth_user u
+            LEFT JOIN user_profile up ON up.user_id = u.id
+            WHERE LOWER(u.username) IN ({placeholders})
+            ''',
+            records.keys(),
+        )
+        for row in existing:
+            item = records.get(row['username'].lower())
+            if item and (row['user_type'] != user_type or row['username'] != item[1]):
+                del records[row['username'].lower()]
+                self._skip(item[0], f'用户名已被占用: {item[1]}')
+        existing_names = {row['username'] for row in existing}
+        new_records = [item for item in records.values() if item[1] not in existing_names]
+
+        now = timezone.now()
+        if new_records:
+            self._create_accounts(user_type, new_records, password_hashes, now)
+            self.created[user_type] += len(new_records)
+
+        entity_ids = self._entity_ids(user_type, [username for _, username, _ in records.values()])
+        if user_type == 'platform':
+            for _, username, record in records.values():
+                if username in entity_ids:
+                    self.platform_ids[_text(record, 'platform_name', username)] = entity_ids[username]
+        elif user_type == 'merchant':
+            self.merchant_ids.update(entity_ids)
+            pairs = []
+            for line, username, record in records.values():
+                platform_names = _names(record.get('platforms') or record.get('platform'))
+                platform_ids = self._resolve_platforms(platform_names)
+                for name in platform_names:
+                    if name not in platform_ids:
+                        self._skip(line, f'平台不存在: {name}')
+                    elif username in entity_ids:
+                        pairs.append((entity_ids[username], platform_ids[name]))
+            self._approve_requests('enter_request', 'merchant_id', pairs)
+        elif user_type == 'rider':
+            pairs = []
+            for line, username, record in records.values():
+                platform_names = _names(record.get('platform'))
+                platform_ids = self._resolve_platforms(platform_names)
+                for name in platform_names:
+                    if name not in platform_ids:
+                        self._skip(line, f'平台不存在: {name}')
+                    elif username in entity_ids:
+                        pairs.append((entity_ids[username], platform_ids[name]))
+            self._approve_requests('sign_request', 'rider_id', pairs)
+            rider_ids = sorted({rider_id for rider_id, _ in pairs})
+            for start in range(0, len(rider_ids), MAX_IN_LIST_SIZE):
+                chunk = rider_ids[start:start + MAX_IN_LIST_SIZE]
+                execute_non_query(
+                    f"UPDATE rider SET status = 'online' WHERE status = 'offline' "
+                    f"AND id IN ({','.join(['%s'] * len(chunk))})",
+                    chunk,
+                )
+
+    def _hash_passwords(self, batches):
+        """
+        在开启批次事务之前算好各账号初始密码的哈希，返回 {明文: 哈希}：PBKDF2 很慢，放在事务中会让事务
+        长时间持有 auth_user 唯一索引上的锁，并发的注册随之等待或超时。
+        同一批次中相同的密码只计算一次（默认密码通常所有账号共用），其余分发到哈希进程池。
+        """
+        plain = {
+            _text(record, 'password') or self.default_password
+            for user_type in ACCOUNT_TYPES for _, record in batches[user_type]
+        }
+        distinct = sorted(password for password in plain if password)
+        return dict(zip(distinct, hashing.make_passwords(distinct)))
+
+    def _create_accounts(self, user_type, new_records, password_hashes, now):
+        plain = [_text(record, 'password') or self.default_password for _, _, record in new_records]
+        passwords = [password_hashes[password] if password else hashing.make_password(None) for password in plain]
+        execute_insert_many('auth_user', AUTH_USER_INSERT_COLUMNS, [
+            (username, password, '', '', '', False, False, True, now)
+            for (_, username, _), password in zip(new_records, passwords)
+        ], ignore=True)
+        user_ids = {
+            row['username']: row['id']
+            for row in execute_fetchall_in(
+                'SELECT id, username FROM auth_user WHERE username IN ({placeholders})',
+                [username for _, username, _ in new_records],
+            )
+        }
+
+        execute_insert_many('user_profile', ['user_id', 'user_type', 'phone', 'created_at', 'updated_at'], [
+            (user_ids[username], user_type, _text(record, 'phone'), now, now)
+            for _, username, record in new_records
+        ], ignore=True)
+        profile_ids = {
+            row['user_id']: row['id']
+            for row in execute_fetchall_in(
+                'SELECT id, user_id FROM user_profile WHERE user_id IN ({placeholders})',
+                user_ids.values(),
+            )
+        }
+
+        role_rows = []
+        for _, username, record in new_records:
+            profile_id = profile_ids[user_ids[username]]
+            phone = _text(record, 'phone')
+            if user_type == 'platform':
+                role_rows.append((profile_id, _text(record, 'platform_name', username), phone, 0, 0, now))
+            elif user_type == 'merchant':
+                role_rows.append((profile_id, _text(record, 'merchant_name', username), phone,
+                                  _text(record, 'address', PLACEHOLDER_ADDRESS), 0, 0, now))
+            elif user_type == 'rider':
+                role_rows.append((profile_id, _text(record, 'rider_name', username), phone, 'offline', 0, 0, now))
+            else:
+                role_rows.append((profile_id, _text(record, 'customer_name', username), phone,
+                                  _text(record, 'address', PLACEHOLDER_ADDRESS), now))
+        execute_insert_many(user_type, ROLE_COLUMNS[user_type], role_rows, ignore=True)
+
+        # 事务回滚时过滤器里多出的用户名只会导致一次多余的数据库查询
+        for _, username, _ in new_records:
+            username_bloom.add(username)
+
+    def _entity_ids(self, user_type, usernames):
+        table = quote_table(user_type)
+        rows = execute_fetchall_in(
+            f'''
+            SELECT t.id, u.username
+            FROM {table} t
+            JOIN user_profile up ON t.user_profile_id = up.id
+            JOIN auth_user u ON up.user_id = u.id
+            WHERE u.username IN ({{placeholders}})
+            ''',
+            usernames,
+        )
+        return {row['username']: row['id'] for row in rows}
+
+    # ---- 名称解析 ----
+
+    def _resolve_platforms(self, names):
+        missing = {name for name in names if name not in self.platform_ids}
+        if missing:
+            rows = execute_fetchall_in(
+                f'SELECT id, platform_name FROM {PLATFORM_TABLE} WHERE platform_name IN ({{placeholders}}) ORDER BY id',
+                missing,
+            )
+            for row in rows:
+                self.platform_ids.setdefault(row['platform_name'], row['id'])
+        return {name: self.platform_ids[name] for name in names if name in self.platform_ids}
+
+    def _resolve_merchants(self, usernames):
+        missing = {username for username in usernames if username not in self.merchant_ids}
+        if missing:
+            self.merchant_ids.update(self._entity_ids('merchant', missing))
+        return {username: self.merchant_ids[username] for username in usernames if username in self.merchant_ids}
+
+    def _resolve_discounts(self, rates):
+        missing = sorted({rate for rate in rates if rate not in self.discount_ids})
+        if missing:
+            for row in execute_fetchall('SELECT id, discount_rate FROM discount ORDER BY id'):
+                self.discount_ids.setdefault(Decimal(row['discount_rate']).quantize(Decimal('0.01')), row['id'])
+            to_create = [rate for rate in missing if rate not in self.discount_ids]
+            if to_create:
+                execute_insert_many('discount', ['discount_rate'], [(rate,) for rate in to_create])
+                for row in execute_fetchall('SELECT id, discount_rate FROM discount ORDER BY id'):
+                    self.discount_ids.setdefault(Decimal(row['discount_rate']).quantize(Decimal('0.01')), row['id'])
+        return self.discount_ids
+
+    def _resolve_pairs(self, entries):
+        """把 (merchant 用户名, 平台名) 解析为 id，返回 [(line, merchant_id, platform_id, record)]"""
+        merchants = self._resolve_merchants({_text(record, 'merchant') for _, record in entries})
+        platforms = self._resolve_platforms({_text(record, 'platform') for _, record in entries})
+        resolved = []
+        for line, record in entries:
+            merchant_name = _text(record, 'merchant')
+            platform_name = _text(record, 'platform')
+            if merchant_name not in merchants:
+                self._skip(line, f'商家不存在: {merchant_name}')
+            elif platform_name not in platforms:
+                self._skip(line, f'平台不存在: {platform_name}')
+            else:
+                resolved.append((line, merchants[merchant_name], platforms[platform_name], record))
+        return resolved
+
+    # ---- 入驻 / 签约申请 ----
+
+    def _approve_requests(self, table_name, owner_column, pairs):
+        """确保 (owner, platform) 的申请存在且为 approved：缺失的多行插入，其余状态一次更新"""
+        pairs = set(pairs)
+        if not pairs:
+            return
+        existing = execute_fetchall_in(
+            f'SELECT id, {owner_column} AS owner_id, platform_id, status FROM {table_name} '
+            f'WHERE {owner_column} IN ({{placeholders}})',
+            sorted({owner_id for owner_id, _ in pairs}),
+        )
+        to_update = []
+        for row in existing:
+            pair = (row['owner_id'], row['platform_id'])
+            if pair in pairs:
+                pairs.discard(pair)
+                if row['status'] != 'approved':
+                    to_update.append(row['id'])
+        execute_insert_many(table_name, [owner_column, 'platform_id', 'status'],
+                            [(owner_id, platform_id, 'approved') for owner_id, platform_id in sorted(pairs)],
+                            ignore=True)
+        for start in range(0, len(to_update), MAX_IN_LIST_SIZE):
+            chunk = to_update[start:start + MAX_IN_LIST_SIZE]
+            execute_non_query(
+                f"UPDATE {table_name} SET status = 'approved' WHERE id IN ({','.join(['%s'] * len(chunk))})",
+                chunk,
+            )
+
+    # ---- 餐品 ----
+
+    def _import_meals(self, entries):
+        if not entries:
+            return
+        resolved = self._resolve_pairs(entries)
+        existing = {
+            (row['merchant_id'], row['platform_id'], row['name'])
+            for row in execute_fetchall_in(
+                'SELECT merchant_id, platform_id, name FROM meal WHERE merchant_id IN ({placeholders})',
+                sorted({merchant_id for _, merchant_id, _, _ in resolved}),
+            )
+        }
+        now = timezone.now()
+        rows = []
+        for line, merchant_id, platform_id, record in resolved:
+            name = _text(record, 'name')
+            meal_type = _text(record, 'meal_type', 'lunch_and_dinner')
+            try:
+                price = Decimal(_text(record, 'price'))
+            except InvalidOperation:
+                price = None
+            if not name:
+                self._skip(line, '餐品名称不能为空')
+            elif price is None or not price.is_finite() or price <= 0:
+                self._skip(line, f'价格无效: {record.get("price")}')
+            elif meal_type not in MEAL_TYPES:
+                self._skip(line, f'餐品类型无效: {meal_type}')
+            elif (merchant_id, platform_id, name) in existing:
+                self._skip(line, f'餐品已存在: {name}')
+            else:
+                existing.add((merchant_id, platform_id, name))
+                rows.append((merchant_id, platform_id, name, price.quantize(Decimal('0.01')), meal_type,
+                             now, now, 0, 0))
+        execute_insert_many('meal', ['merchant_id', 'platform_id', 'name', 'price', 'meal_type',
+                                     'created_at', 'updated_at', 'rating_score', 'rating_count'], rows)
+        self.created['meal'] += len(rows)
+        counts = {}
+        for row in rows:
+            counts[(row[0], row[1])] = counts.get((row[0], row[1]), 0) + 1
+        append_outbox_events([
+            ('meal', 'imported', None, {'merchant_id': merchant_id, 'platform_id': platform_id, 'count': count})
+            for (merchant_id, platform_id), count in sorted(counts.items())
+        ])
+        # 商家在该平台上架餐品即视为已入驻
+        self._approve_requests('enter_request', 'merchant_id', [(row[0], row[1]) for row in rows])
+
+    # ---- 折扣 ----
+
+    def _import_discounts(self, entries):
+        if not entries:
+            return
+        latest = {}
+        for line, merchant_id, platform_id, record in self._resolve_pairs(entries):
+            try:
+                rate = Decimal(_text(record, 'discount_rate')).quantize(Decimal('0.01'))
+            except InvalidOperation:
+                rate = None
+            if rate is None or not Decimal('0') < rate < Decimal('1'):
+                self._skip(line, f'折扣比例无效: {record.get("discount_rate")}')
+                continue
+            latest[(merchant_id, platform_id)] = rate
+        if not latest:
+            return
+        discount_ids = self._resolve_discounts(latest.values())
+
+        existing = {
+            (row['merchant_id'], row['platform_id']): row
+            for row in execute_fetchall_in(
+                'SELECT id, merchant_id, platform_id, discount_id FROM merchant_platform_discount '
+                'WHERE merchant_id IN ({placeholders})',
+                sorted({merchant_id for merchant_id, _ in latest}),
+            )
+        }
+        now = timezone.now()
+        inserts = []
+        updates = []
+        events = []
+        for (merchant_id, platform_id), rate in latest.items():
+            row = existing.get((merchant_id, platform_id))
+            if row is None:
+                inserts.append((merchant_id, platform_id, discount_ids[rate], now, now))
+            elif row['discount_id'] != discount_ids[rate]:
+                updates.append((row['id'], discount_ids[rate], now))
+            else:
+                continue
+            events.append(('discount', 'updated', None, {'merchant_id': merchant_id, 'platform_id': platform_id,
+                                                         'discount_id': discount_ids[rate]}))
+        execute_insert_many('merchant_platform_discount',
+                            ['merchant_id', 'platform_id', 'discount_id', 'created_at', 'updated_at'], inserts)
+        execute_update_many('merchant_platform_discount', 'id', ['discount_id', 'updated_at'], updates)
+        append_outbox_events(events)
+        self.created['discount'] += len(inserts) + len(updates)
+        self._approve_requests('enter_request', 'merchant_id', list(latest.keys()))
@@ -1,15 +1,28 @@
+import io
+import json
+from functools import partial
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
 
 from Project.db_utils import (
+    attach_names,
     execute_fetchall,
     execute_fetchone,
     execute_non_query,
-    get_platform_by_user,
+    get_request_entity,
     quote_table,
+    run_parallel,
 )
+from Project.sharding import attach_order_names, db_for_order, db_for_platform, delete_order_rows
+from order.archive import created_range, fetch_order_history, parse_page
+from order.counters import get_status_counts
+from order.rollups import fetch_daily_sales, fetch_merchant_sales, parse_days
+from order.sla import get_platform_sla
+from platforme.onboarding import DEFAULT_BATCH_SIZE, OnboardingError, OnboardingImporter, detect_format
 
 
 ORDER_STATUS_DISPLAY = {
@@ -21,11 +34,10 @@ ORDER_STATUS_DISPLAY = {
 }
 
 ORDER_TABLE = quote_table('order')
-ORDER_ITEM_TABLE = quote_table('order_item')
 
 
-def _get_platform(user):
-    platform = get_platform_by_user(user.id)
+def _get_platform(request):
+    platform = get_request_entity(request, 'platform')
     if not platform:
         raise ValueError('平台信息不存在')
     return platform
@@ -79,65 +91,39 @@ def _get_rider_requests(platform_id, status):
     } for row in rows]
 
 
-def _build_in_clause(values):
-    return ','.join(['%s'] * len(values))
-
-
-def _get_orders(platform_id):
+def _get_platform_orders_in(platform_id, alias, tables, limit, since=None, before=None):
+    # 平台的订单都在同一个库（见 Project/sharding.py），其他库没有本平台的订单
+    if alias != db_for_platform(platform_id):
+        return []
+    window, window_params = created_range(since, before)
     query = f'''
         SELECT o.id,
                o.price,
                o.status,
                o.created_at,
-               c.customer_name,
-               m.merchant_name,
-               r.rider_name
-        FROM {ORDER_TABLE} o
-        JOIN customer c ON o.customer_id = c.id
-        JOIN merchant m ON o.merchant_id = m.id
-        LEFT JOIN rider r ON o.rider_id = r.id
-        WHERE o.platform_id = %s
-        ORDER BY o.created_at DESC
+               o.customer_id,
+               o.customer_name,
+               o.merchant_id,
+               o.merchant_name,
+               o.rider_id,
+               o.meal_summary,
+               o.item_count
+        FROM {tables['order']} o
+        WHERE o.platform_id = %s{window}
+        ORDER BY o.created_at DESC, o.id DESC
+        LIMIT %s
     '''
-    orders = execute_fetchall(query, [platform_id])
-    if not orders:
-        return []
+    return execute_fetchall(query, [platform_id, *window_params, limit], using=alias)
 
-    order_map = {order['id']: order for order in orders}
-    for order in order_map.values():
-        order['meals'] = []
-
-    order_ids = list(order_map.keys())
-    placeholders = _build_in_clause(order_ids)
-    items_query = f'''
-        SELECT oi.order_id,
-               oi.id,
-               meal.name AS meal_name,
-               oi.quantity,
-               oi.unit_price,
-               oi.line_price
-        FROM {ORDER_ITEM_TABLE} oi
-        JOIN meal ON oi.meal_id = meal.id
-        WHERE oi.order_id IN ({placeholders})
-        ORDER BY oi.id
-    '''
-    items = execute_fetchall(items_query, order_ids)
-    for item in items:
-        order_map[item['order_id']]['meals'].append({
-            'item_id': item['id'],
-            'name': item['meal_name'],
-            'quantity': item['quantity'],
-            'unit_price': item['unit_price'],
-            'line_price': item['line_price'],
-        })
-
-    return orders
 
-
-def _format_meal_summary(meals):
-    if not meals:
-        return ''
-    return ', '.join(f"{meal['name']} x{meal['quantity']}" for meal in meals)
+def _get_orders(platform_id, page=1, page_size=None):
+    # 与商家、顾客的订单历史一样按页读取：顾客、商家名与餐品摘要读订单行，骑手名回主库批量查询；
+    # 热数据窗口内够一页时只扫描近期的分区（见 order/partitions.py），翻过窗口才读归档表
+    orders, has_more = fetch_order_history(
+        partial(_get_platform_orders_in, platform_id),
+        page, page_size or settings.ORDER_HISTORY_PAGE_SIZE,
+    )
+    return attach_order_names(orders, 'rider_name'), has_more
 
 
 def _format_orders_for_context(order_rows):
@@ -151,19 +137,17 @@ def _format_orders_for_context(order_rows):
             'created_at': row['created_at'],
             'customer': {'customer_name': row['customer_name']},
             'merchant': {'merchant_name': row['merchant_name']},
-            'meals': row.get('meals', []),
-            'meal_summary': _format_meal_summary(row.get('meals', [])),
+            'meal_summary': row['meal_summary'],
+            'item_count': row['item_count'],
             'rider': {'rider_name': row['rider_name']} if row['rider_name'] else None,
         })
     return formatted
 
 
-def _get_order_counts(order_rows):
-    total = len(order_rows)
-    unassigned = sum(1 for row in order_rows if row['status'] == 'unassigned')
-    assigned = sum(1 for row in order_rows if row['status'] == 'assigned')
-    ready = sum(1 for row in order_rows if row['status'] == 'ready')
-    return total, unassigned, assigned, ready
+def _get_order_counts(platform_id):
+    # 计数表含已归档的订单，统计的是平台全部订单，而不只是列表中热数据窗口内的订单
+    counts = get_status_counts('platform', platform_id, [db_for_platform(platform_id)])
+    return counts['total'], counts['unassigned'], counts['assigned'], counts['ready']
 
 
 def _get_enter_request_entry(platform_id, request_id, status):
@@ -187,16 +171,22 @@ def _get_sign_request_entry(platform_id, request_id, status):
 @login_required
 def platform(request):
     try:
-        current_platform = _get_platform(request.user)
+        current_platform = _get_platform(request)
         platform_name = current_platform['platform_name']
-
-        pending_merchants = _get_merchant_requests(current_platform['id'], 'pending')
-        approved_merchants = _get_merchant_requests(current_platform['id'], 'approved')
-        pending_riders = _get_rider_requests(current_platform['id'], 'pending')
-        approved_riders = _get_rider_requests(current_platform['id'], 'approved')
-        order_rows = _get_orders(current_platform['id'])
+        page, page_size = parse_page(request.GET)
+
+        # 各部分互不依赖，并发查询（见 Project/db_utils.py 的 run_parallel）
+        pending_merchants, approved_merchants, pending_riders, approved_riders, order_page, order_counts = run_parallel(
+            (_get_merchant_requests, current_platform['id'], 'pending'),
+            (_get_merchant_requests, current_platform['id'], 'approved'),
+            (_get_rider_requests, current_platform['id'], 'pending'),
+            (_get_rider_requests, current_platform['id'], 'approved'),
+            (_get_orders, current_platform['id'], page, page_size),
+            (_get_order_counts, current_platform['id']),
+        )
+        order_rows, orders_has_more = order_page
         orders = _format_orders_for_context(order_rows)
-        total_orders, unassigned_orders, assigned_orders, ready_orders = _get_order_counts(order_rows)
+        total_orders, unassigned_orders, assigned_orders, ready_orders = order_counts
 
         context = {
             'platform_name': platform_name,
@@ -205,6 +195,8 @@ def platform(request):
             'pending_rider_requests': pending_riders,
             'approved_rider_requests': approved_riders,
             'orders': orders,
+            'orders_page': page,
+            'orders_has_more': orders_has_more,
             'total_orders': total_orders,
             'unassigned_orders': unassigned_orders,
             'assigned_orders': assigned_orders,
@@ -219,6 +211,8 @@ def platform(request):
             'pending_rider_requests': [],
             'approved_rider_requests': [],
             'orders': [],
+            'orders_page': 1,
+            'orders_has_more': False,
             'total_orders': 0,
             'unassigned_orders': 0,
             'assigned_orders': 0,
@@ -235,7 +229,7 @@ def approve_merchant_request(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        platform = _get_platform(request.user)
+        platform = _get_platform(request)
         request_id = request.POST.get('request_id')
         if not request_id:
             return JsonResponse({'success': False, 'message': '申请ID不能为空'})
@@ -259,7 +253,7 @@ def reject_merchant_request(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        platform = _get_platform(request.user)
+        platform = _get_platform(request)
         request_id = request.POST.get('request_id')
         if not request_id:
             return JsonResponse({'success': False, 'message': '申请ID不能为空'})
@@ -283,7 +277,7 @@ def remove_merchant(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        platform = _get_platform(request.user)
+        platform = _get_platform(request)
         request_id = request.POST.get('request_id')
         if not request_id:
             return JsonResponse({'success': False, 'message': '申请ID不能为空'})
@@ -307,7 +301,7 @@ def approve_rider_request(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        platform = _get_platform(request.user)
+        platform = _get_platform(request)
         request_id = request.POST.get('request_id')
         if not request_id:
             return JsonResponse({'success': False, 'message': '申请ID不能为空'})
@@ -332,7 +326,7 @@ def reject_rider_request(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        platform = _get_platform(request.user)
+        platform = _get_platform(request)
         request_id = request.POST.get('request_id')
         if not request_id:
             return JsonResponse({'success': False, 'message': '申请ID不能为空'})
@@ -356,7 +350,7 @@ def remove_rider(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        platform = _get_platform(request.user)
+        platform = _get_platform(request)
         request_id = request.POST.get('request_id')
         if not request_id:
             return JsonResponse({'success': False, 'message': '申请ID不能为空'})
@@ -381,7 +375,7 @@ def delete_order(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        platform = _get_platform(request.user)
+        platform = _get_platform(request)
         order_id = request.POST.get('order_id')
         if not order_id:
             return JsonResponse({'success': False, 'message': '订单ID不能为空'})
@@ -391,16 +385,85 @@ def delete_order(request):
             FROM {ORDER_TABLE}
             WHERE id = %s AND platform_id = %s
         '''
-        order = execute_fetchone(order_query, [order_id, platform['id']])
+        order_db = db_for_order(order_id)
+        order = execute_fetchone(order_query, [order_id, platform['id']], using=order_db)
         if not order:
             return JsonResponse({'success': False, 'message': '订单不存在'})
 
         if order['status'] != 'unassigned':
             return JsonResponse({'success': False, 'message': '只能删除待分配骑手的订单'})
 
-        execute_non_query(f'DELETE FROM {ORDER_TABLE} WHERE id = %s', [order_id])
+        delete_order_rows(order_id, using=order_db)
         return JsonResponse({'success': True, 'message': '订单删除成功'})
     except ValueError:
         return JsonResponse({'success': False, 'message': '平台信息不存在'})
     except Exception as exc:
         return JsonResponse({'success': False, 'message': f'操作失败: {str(exc)}'})
+
+
+@login_required
+def get_sales(request):
+    """最近 days 天平台的每日销售与各商家销售，只读汇总表（见 order/rollups.py）"""
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'message': '无效的请求方法'})
+
+    try:
+        current_platform = _get_platform(request)
+        days = parse_days(request.GET)
+        order_db = db_for_platform(current_platform['id'])
+        daily, totals = fetch_daily_sales('platform', current_platform['id'], days, [order_db])
+        merchants = attach_names(fetch_merchant_sales(current_platform['id'], days, using=order_db),
+                                 'merchant_id', 'merchant', 'merchant_name', 'merchant_name')
+        return JsonResponse({
+            'success': True,
+            'days': days,
+            'daily': daily,
+            'totals': totals,
+            'merchants': merchants,
+        })
+    except ValueError:
+        return JsonResponse({'success': False, 'message': '平台信息不存在'})
+    except Exception as exc:
+        return JsonResponse({'success': False, 'message': f'获取销售数据失败: {str(exc)}'})
+
+
+@login_required
+def get_sla(request):
+    """最近 days 天接单、送达、取餐耗时的 p50 / p95（秒），由时效分布计算（见 order/sla.py）"""
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'message': '无效的请求方法'})
+
+    try:
+        current_platform = _get_platform(request)
+        days = parse_days(request.GET)
+        metrics = get_platform_sla(current_platform['id'], days, using=db_for_platform(current_platform['id']))
+        return JsonResponse({'success': True, 'days': days, 'metrics': metrics})
+    except ValueError:
+        return JsonResponse({'success': False, 'message': '平台信息不存在'})
+    except Exception as exc:
+        return JsonResponse({'success': False, 'message': f'获取时效数据失败: {str(exc)}'})
+
+
+@login_required
+@csrf_exempt
+def import_onboarding(request):
+    """管理员上传 CSV / JSON / JSONL 文件批量导入入驻数据（与 import_onboarding 命令相同）"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': '无效的请求方法'})
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'message': '仅管理员可以导入'}, status=403)
+
+    upload = request.FILES.get('file')
+    if not upload:
+        return JsonResponse({'success': False, 'message': '请上传导入文件'})
+
+    try:
+        fmt = request.POST.get('format') or detect_format(upload.name)
+        importer = OnboardingImporter(batch_size=int(request.POST.get('batch_size') or DEFAULT_BATCH_SIZE))
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        result = importer.import_stream(stream, fmt)
+        return JsonResponse({'success': True, 'message': '导入完成', **result})
+    except (OnboardingError, json.JSONDecodeError, UnicodeDecodeError) as exc:
+        return JsonResponse({'success': False, 'message': f'导入失败: {str(exc)}'})
+    except Exception as exc:
+        return JsonResponse({'success': False, 'message': f'操作失败: {str(exc)}'})
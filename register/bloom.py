@@ -0,0 +1,142 @@
+"""
+用户名布隆过滤器：实时用户名检查（check_username）先查内存中的过滤器，
+"一定不存在" 时直接返回可用，只有 "可能存在" 时才访问数据库。
+
+过滤器每个进程一份，按 USERNAME_BLOOM_REFRESH_SECONDS 在后台线程中从 auth_user 全量重建，建好后整体替换，
+重建期间请求照常使用旧的过滤器；尚未建好时一律交给数据库判断。
+其他进程、后台或命令行新建的用户不会调用本进程的 add()：每 USERNAME_BLOOM_CATCH_UP_SECONDS 秒最多一次，
+在回答 "一定不存在" 之前查 auth_user 的 MAX(id)（主键索引），把 id 更大的用户名补进过滤器，
+因此别处新建的用户名最多在这么久内被判为可用，两次补充之间的 "可用" 回答不访问数据库。
+修改已有用户的用户名不改变 MAX(id)，新用户名要到下一次重建才进入过滤器。
+过滤器只用于提示，register 提交时以 create_user_with_sql 的 NOT EXISTS 条件为准。
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(1, int(capacity))
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+def normalize_username(username):
+    return username.lower()
+
+
+class UsernameBloom:
+    def __init__(self):
+        self._filter = None
+        self._max_id = 0
+        self._built_at = 0.0
+        self._caught_up_at = 0.0
+        self._rebuilding = False
+        self._lock = threading.Lock()
+
+    def _enabled(self):
+        return getattr(settings, 'USERNAME_BLOOM_ENABLED', True)
+
+    def _expired(self):
+        refresh = getattr(settings, 'USERNAME_BLOOM_REFRESH_SECONDS', 300)
+        return self._filter is None or time.monotonic() - self._built_at > refresh
+
+    def _start_rebuild(self):
+        # 调用方持有 self._lock；同一时间只有一个重建线程
+        if not self._rebuilding:
+            self._rebuilding = True
+            threading.Thread(target=self._rebuild, name='username-bloom', daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            error_rate = getattr(settings, 'USERNAME_BLOOM_ERROR_RATE', 0.01)
+            with connection.cursor() as cursor:
+                # 先取 MAX(id)：扫描期间新建的用户由 _catch_up 补上，重复加入没有影响
+                cursor.execute('SELECT COUNT(*), MAX(id) FROM auth_user')
+                total, max_id = cursor.fetchone()
+                bloom = BloomFilter(capacity=max(total * 2, 10000), error_rate=error_rate)
+                cursor.execute('SELECT username FROM auth_user')
+                while True:
+                    rows = cursor.fetchmany(5000)
+                    if not rows:
+                        break
+                    for (username,) in rows:
+                        bloom.add(normalize_username(username))
+            with self._lock:
+                self._filter = bloom
+                self._max_id = max_id or 0
+                self._built_at = self._caught_up_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._rebuilding = False
+            connection.close()
+
+    def _due_for_catch_up(self):
+        # 调用方持有 self._lock；到期后只让一个线程去补充，其余线程照常使用当前的过滤器
+        interval = getattr(settings, 'USERNAME_BLOOM_CATCH_UP_SECONDS', 2)
+        now = time.monotonic()
+        if now - self._caught_up_at < interval:
+            return False
+        self._caught_up_at = now
+        return True
+
+    def _catch_up(self, bloom, max_id):
+        """把 id 大于 max_id 的用户名加入 bloom"""
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT MAX(id) FROM auth_user')
+            current = cursor.fetchone()[0] or 0
+            if current <= max_id:
+                return
+            cursor.execute('SELECT username FROM auth_user WHERE id > %s', [max_id])
+            usernames = [normalize_username(username) for (username,) in cursor.fetchall()]
+        with self._lock:
+            for username in usernames:
+                bloom.add(username)
+            if self._filter is bloom:
+                self._max_id = max(self._max_id, current)
+
+    def might_exist(self, username):
+        # 非 ASCII 用户名的大小写转换在 Python 与数据库之间可能不一致，直接交给数据库判断
+        if not self._enabled() or not username.isascii():
+            return True
+        with self._lock:
+            if self._expired():
+                self._start_rebuild()
+            bloom, max_id = self._filter, self._max_id
+            catch_up = bloom is not None and self._due_for_catch_up()
+        if bloom is None:
+            return True
+        normalized = normalize_username(username)
+        if normalized in bloom:
+            return True
+        if catch_up:
+            self._catch_up(bloom, max_id)
+            return normalized in bloom
+        return False
+
+    def add(self, username):
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(normalize_username(username))
+
+
+username_bloom = UsernameBloom()
@@ -0,0 +1,54 @@
+import json
+import threading
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from Project.bench import allow_test_host, delete_users_by_prefix, run_concurrently
+
+USER_TYPES = ('customer', 'merchant', 'rider', 'platform')
+
+
+class Command(BaseCommand):
+    help = '并发压测注册接口，输出 registrations/sec、延迟分位数和每次注册的 SQL 次数'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100, help='注册总次数')
+        parser.add_argument('--workers', type=int, default=8, help='并发线程数')
+        parser.add_argument('--keep', action='store_true', help='保留压测创建的账号')
+
+    def handle(self, *args, **options):
+        prefix = f'bench_reg_{uuid.uuid4().hex[:8]}_'
+        query_counts = []
+        lock = threading.Lock()
+
+        def register_once(index):
+            client = Client()
+            with CaptureQueriesContext(connections['default']) as queries:
+                response = client.post('/register/', {
+                    'username': f'{prefix}{index}',
+                    'password': 'bench-register-pass',
+                    'user_type': USER_TYPES[index % len(USER_TYPES)],
+                    'phone': '13800000000',
+                })
+            if response.status_code != 302:
+                raise RuntimeError(f'register failed with status {response.status_code}')
+            with lock:
+                query_counts.append(len(queries))
+
+        try:
+            with allow_test_host():
+                result = run_concurrently(register_once, options['iterations'], options['workers'])
+        finally:
+            if not options['keep']:
+                delete_users_by_prefix(prefix)
+
+        result['benchmark'] = 'register'
+        result['workers'] = options['workers']
+        result['queries_per_registration'] = (
+            round(sum(query_counts) / len(query_counts), 2) if query_counts else 0
+        )
+        self.stdout.write(json.dumps(result, indent=2, ensure_ascii=False))
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+INDEX_NAME = 'auth_user_username_lower_idx'
+
+
+def create_username_lower_index(apps, schema_editor):
+    connection = schema_editor.connection
+    vendor = connection.vendor
+    if vendor == 'mysql':
+        # 函数索引需要 MySQL 8.0.13+；更早的版本跳过（其默认排序规则本身不区分大小写）
+        if connection.mysql_is_mariadb or connection.mysql_version < (8, 0, 13):
+            return
+        schema_editor.execute(f'CREATE INDEX {INDEX_NAME} ON auth_user ((LOWER(username)))')
+    elif vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON auth_user (LOWER(username))')
+
+
+def drop_username_lower_index(apps, schema_editor):
+    connection = schema_editor.connection
+    vendor = connection.vendor
+    if vendor == 'mysql':
+        if connection.mysql_is_mariadb or connection.mysql_version < (8, 0, 13):
+            return
+        schema_editor.execute(f'DROP INDEX {INDEX_NAME} ON auth_user')
+    elif vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_username_lower_index, drop_username_lower_index),
+    ]
@@ -2,21 +2,34 @@
 import logging
 
 from django.contrib import messages
-from django.contrib.auth import login, authenticate
-from django.contrib.auth.hashers import make_password
-from django.db import connection
+from django.contrib.auth import login
+from django.db import connection, transaction
 from django.http import JsonResponse
 from django.shortcuts import render, redirect
+from django.utils import timezone
 from django.views.decorators.http import require_GET
 
-from Project.db_utils import execute_fetchone, execute_non_query, execute_write
+from Project import hashing
+from register.bloom import username_bloom
+from Project.db_utils import (
+    build_user,
+    execute_fetchone,
+    execute_insert_ignore,
+    from_dual,
+    quote_table,
+    remember_login_identity,
+    run_in_db_thread,
+)
 
 logger = logging.getLogger(__name__)
 
+PLACEHOLDER_ADDRESS = '待填写'
+
 
 def check_username_exists(username):
     """
     使用原始SQL查询检查用户名是否存在
+    （表达式与迁移中创建的 LOWER(username) 函数索引一致，可走索引）
     """
     if not username:
         return False
@@ -25,97 +38,66 @@ def check_username_exists(username):
         return cursor.fetchone() is not None
 
 
-def create_user_with_sql(username, password):
+def username_taken(username):
+    """布隆过滤器判定"一定不存在"时省去查询；过滤器过期时的重建也要查库"""
+    return username_bloom.might_exist(username) and check_username_exists(username)
+
+
+def create_user_with_sql(username, hashed_password, joined_at):
     """
-    使用SQL创建用户
+    使用SQL创建用户：用户名查重与插入合并为一条语句（不区分大小写），
+    用户名已存在时返回 None，否则返回新用户ID（lastrowid）
     """
     with connection.cursor() as cursor:
-        # 使用Django的密码哈希函数
-        hashed_password = make_password(password)
-
-        # 插入用户记录
-        cursor.execute("""
-            INSERT INTO auth_user (username, password, is_superuser, is_staff, is_active, date_joined)
-            VALUES (%s, %s, %s, %s, %s, NOW())
-        """, [username, hashed_password, False, False, True])
-
-        # 获取刚创建的用户ID
-        cursor.execute("SELECT id FROM auth_user WHERE username = %s", [username])
-        user_id = cursor.fetchone()[0]
-
-        return user_id
-
-
-def ensure_user_profile(user_id, user_type, phone):
-    profile = execute_fetchone('SELECT id FROM user_profile WHERE user_id = %s', [user_id])
-    if profile:
-        execute_non_query(
-            '''
-            UPDATE user_profile
-            SET user_type = %s,
-                phone = %s,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = %s
-            ''',
-            [user_type, phone, profile['id']],
-        )
-        return profile['id']
-
-    return execute_write(
-        '''
-        INSERT INTO user_profile (user_id, user_type, phone, created_at, updated_at)
-        VALUES (%s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-        ''',
-        [user_id, user_type, phone],
+        cursor.execute(f"""
+            INSERT INTO auth_user (username, password, first_name, last_name, email,
+                                   is_superuser, is_staff, is_active, date_joined)
+            SELECT %s, %s, '', '', '', %s, %s, %s, %s{from_dual()}
+            WHERE NOT EXISTS (SELECT 1 FROM auth_user WHERE LOWER(username) = LOWER(%s))
+        """, [username, hashed_password, False, False, True, joined_at, username])
+        if cursor.rowcount == 0:
+            return None
+        return cursor.lastrowid
+
+
+def ensure_user_profile(user_id, user_type, phone, now):
+    profile_id = execute_insert_ignore(
+        'user_profile',
+        ['user_id', 'user_type', 'phone', 'created_at', 'updated_at'],
+        [user_id, user_type, phone, now, now],
     )
+    if profile_id is None:
+        profile_id = execute_fetchone('SELECT id FROM user_profile WHERE user_id = %s', [user_id])['id']
+    return profile_id
 
 
-def ensure_detail_record(profile_id, user_type, username, phone):
+def _detail_record_values(user_type, username, phone):
     if user_type == 'customer':
-        existing = execute_fetchone('SELECT id FROM customer WHERE user_profile_id = %s', [profile_id])
-        if not existing:
-            execute_write(
-                '''
-                INSERT INTO customer (user_profile_id, customer_name, phone, address, created_at)
-                VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
-                ''',
-                [profile_id, username, phone, '待填写'],
-            )
-    elif user_type == 'rider':
-        existing = execute_fetchone('SELECT id FROM rider WHERE user_profile_id = %s', [profile_id])
-        if not existing:
-            execute_write(
-                '''
-                INSERT INTO rider (user_profile_id, rider_name, phone, status, created_at)
-                VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
-                ''',
-                [profile_id, username, phone, 'offline'],
-            )
-    elif user_type == 'merchant':
-        existing = execute_fetchone('SELECT id FROM merchant WHERE user_profile_id = %s', [profile_id])
-        if not existing:
-            execute_write(
-                '''
-                INSERT INTO merchant (user_profile_id, merchant_name, phone, address, created_at)
-                VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
-                ''',
-                [profile_id, username, phone, '待填写'],
-            )
-    elif user_type == 'platform':
-        existing = execute_fetchone('SELECT id FROM platform WHERE user_profile_id = %s', [profile_id])
-        if not existing:
-            execute_write(
-                '''
-                INSERT INTO platform (user_profile_id, platform_name, phone, created_at)
-                VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
-                ''',
-                [profile_id, username, phone],
-            )
-
-
-def cleanup_user_records(user_id):
-    execute_non_query('DELETE FROM user_profile WHERE user_id = %s', [user_id])
-    execute_non_query('DELETE FROM auth_user WHERE id = %s', [user_id])
+        return 'customer', {'customer_name': username, 'phone': phone, 'address': PLACEHOLDER_ADDRESS}
+    if user_type == 'rider':
+        return 'rider', {'rider_name': username, 'phone': phone, 'status': 'offline',
+                         'rating_score': 0, 'rating_count': 0}
+    if user_type == 'merchant':
+        return 'merchant', {'merchant_name': username, 'phone': phone, 'address': PLACEHOLDER_ADDRESS,
+                            'rating_score': 0, 'rating_count': 0}
+    if user_type == 'platform':
+        return 'platform', {'platform_name': username, 'phone': phone, 'rating_score': 0, 'rating_count': 0}
+    return None, None
+
+
+def ensure_detail_record(profile_id, user_type, username, phone, now):
+    table_name, values = _detail_record_values(user_type, username, phone)
+    if table_name is None:
+        return None
+    values = {'user_profile_id': profile_id, **values, 'created_at': now}
+    entity_id = execute_insert_ignore(table_name, list(values.keys()), list(values.values()))
+    if entity_id is None:
+        existing = execute_fetchone(
+            f'SELECT id FROM {quote_table(table_name)} WHERE user_profile_id = %s',
+            [profile_id],
+        )
+        entity_id = existing['id'] if existing else None
+    return entity_id
 
 
 def register(request):
@@ -132,35 +114,54 @@ def register(request):
             messages.error(request, '用户名和密码不能为空')
             return render(request, 'register.html')
 
-        # 使用自定义SQL函数检查用户名是否存在
-        if check_username_exists(username):
+        # 最终以插入语句中的查重为准
+        if username_taken(username):
             messages.error(request, '用户名已存在')
             return render(request, 'register.html')
 
         try:
-            user_id = create_user_with_sql(username, password)
-            logger.info(f"用户创建成功: {user_id}")
-
-            profile_id = ensure_user_profile(user_id, user_type, phone)
-            logger.info(f"用户资料处理成功: {profile_id}, 类型: {user_type}")
-
-            ensure_detail_record(user_type=user_type, profile_id=profile_id, username=username, phone=phone)
-            logger.info("类型记录创建完成")
-
-            user = authenticate(username=username, password=password)
-            if user is not None:
-                login(request, user)
-                messages.success(request, f'注册成功！欢迎{user_type}用户 {username}')
-            else:
-                messages.error(request, '自动登录失败，请手动登录')
-                return redirect('login')
-
+            # 哈希在事务外计算，避免长时间持有锁
+            hashed_password = hashing.make_password(password)
+            now = timezone.now()
+
+            # 用户、资料、角色记录在同一事务中写入，任一步失败整体回滚；
+            # 原生 SQL 写入不会触发 post_save 信号，也就不会重复检查资料与角色表
+            with transaction.atomic():
+                user_id = create_user_with_sql(username, hashed_password, now)
+                if user_id is None:
+                    messages.error(request, '用户名已存在')
+                    return render(request, 'register.html')
+                profile_id = ensure_user_profile(user_id, user_type, phone, now)
+                entity_id = ensure_detail_record(profile_id, user_type, username, phone, now)
+            logger.info(f"用户创建成功: {user_id}, 资料: {profile_id}, 类型: {user_type}")
+            username_bloom.add(username)
+
+            identity = {
+                'id': user_id,
+                'password': hashed_password,
+                'last_login': None,
+                'is_superuser': False,
+                'username': username,
+                'first_name': '',
+                'last_name': '',
+                'email': '',
+                'is_staff': False,
+                'is_active': True,
+                'date_joined': now,
+                'user_type': user_type,
+                'entity_id': entity_id,
+            }
+            # 刚写入的记录无需再查询或校验密码，直接登录
+            login(request, build_user(identity))
+            remember_login_identity(request, identity)
+            messages.success(request, f'注册成功！欢迎{user_type}用户 {username}')
             return redirect('login')
 
+        except hashing.HashingBusy:
+            messages.error(request, '当前注册人数较多，请稍后再试')
+            return render(request, 'register.html')
         except Exception as e:
             logger.error(f"注册错误: {str(e)}")
-            if 'user_id' in locals():
-                cleanup_user_records(user_id)
             messages.error(request, f'注册失败: {str(e)}')
             return render(request, 'register.html')
 
@@ -168,9 +169,9 @@ def register(request):
 
 
 @require_GET
-def check_username(request):
+async def check_username(request):
     username = (request.GET.get('username') or '').strip()
     if not username:
         return JsonResponse({'available': False, 'message': '用户名不能为空'}, status=400)
-    exists = check_username_exists(username)
-    return JsonResponse({'available': not exists})
+    taken = await run_in_db_thread(username_taken, username)
+    return JsonResponse({'available': not taken})
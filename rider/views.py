@@ -2,19 +2,36 @@ from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
+from django.db import transaction
+from django.utils import timezone
 
 from Project.db_utils import (
+    aget_request_entity,
     execute_fetchall,
     execute_fetchone,
     execute_non_query,
     execute_write,
-    get_rider_by_user,
+    get_request_entity,
     quote_table,
+    run_in_db_thread,
 )
+from order.counters import record_transition
+from order.events import publish_order_event
+from order.live import platform_channel
+from order.sla import record_latency
+from Project.live import event_stream_response
+from Project.sharding import db_for_order, group_platforms, newest_first, order_databases
 
 
-def _get_rider(user):
-    rider = get_rider_by_user(user.id)
+def _get_rider(request):
+    rider = get_request_entity(request, 'rider')
+    if not rider:
+        raise ValueError('骑手信息不存在')
+    return rider
+
+
+async def _aget_rider(request):
+    rider = await aget_request_entity(request, 'rider')
     if not rider:
         raise ValueError('骑手信息不存在')
     return rider
@@ -22,7 +39,6 @@ def _get_rider(user):
 
 PLATFORM_TABLE = quote_table('platform')
 ORDER_TABLE = quote_table('order')
-ORDER_ITEM_TABLE = quote_table('order_item')
 ORDER_STATUS_DISPLAY = {
     'unassigned': '未分配骑手',
     'assigned': '已分配骑手',
@@ -63,70 +79,38 @@ def _build_in_clause(values):
     return ','.join(['%s'] * len(values))
 
 
-def _format_meal_summary(meals):
-    if not meals:
-        return ''
-    return ', '.join(f"{meal['name']} x{meal['quantity']}" for meal in meals)
-
-
-def _attach_meal_summaries(order_rows):
-    if not order_rows:
-        return []
-    order_map = {order['id']: order for order in order_rows}
-    for order in order_map.values():
-        order['meals'] = []
-
-    order_ids = list(order_map.keys())
-    placeholders = _build_in_clause(order_ids)
-    items_query = f'''
-        SELECT oi.order_id,
-               meal.name AS meal_name,
-               oi.quantity,
-               oi.unit_price,
-               oi.line_price
-        FROM {ORDER_ITEM_TABLE} oi
-        JOIN meal ON oi.meal_id = meal.id
-        WHERE oi.order_id IN ({placeholders})
-        ORDER BY oi.id
-    '''
-    items = execute_fetchall(items_query, order_ids)
-    for item in items:
-        order_map[item['order_id']]['meals'].append({
-            'name': item['meal_name'],
-            'quantity': item['quantity'],
-            'unit_price': item['unit_price'],
-            'line_price': item['line_price'],
-        })
-    for order in order_map.values():
-        order['meal_summary'] = _format_meal_summary(order['meals'])
+def _with_status_display(order_rows):
+    for order in order_rows:
         order['status_display'] = ORDER_STATUS_DISPLAY.get(order.get('status'), order.get('status'))
-    return list(order_map.values())
+    return order_rows
 
 
 def _get_unassigned_order_groups(platform_ids):
     if not platform_ids:
         return []
 
-    placeholders = _build_in_clause(platform_ids)
-    query = f'''
-        SELECT o.id,
-               o.price,
-               o.status,
-               o.created_at,
-               o.merchant_id,
-               m.merchant_name,
-               o.customer_id,
-               c.customer_name
-        FROM {ORDER_TABLE} o
-        JOIN merchant m ON o.merchant_id = m.id
-        JOIN customer c ON o.customer_id = c.id
-        WHERE o.platform_id IN ({placeholders})
-          AND o.rider_id IS NULL
-          AND o.status = 'unassigned'
-        ORDER BY o.created_at DESC
-    '''
-    orders = execute_fetchall(query, platform_ids)
-    return _attach_meal_summaries(orders)
+    # 只查询骑手签约平台所在的库
+    orders = []
+    for alias, alias_platform_ids in group_platforms(platform_ids).items():
+        placeholders = _build_in_clause(alias_platform_ids)
+        query = f'''
+            SELECT o.id,
+                   o.price,
+                   o.status,
+                   o.created_at,
+                   o.merchant_id,
+                   o.merchant_name,
+                   o.customer_id,
+                   o.customer_name,
+                   o.meal_summary,
+                   o.item_count
+            FROM {ORDER_TABLE} o
+            WHERE o.platform_id IN ({placeholders})
+              AND o.rider_id IS NULL
+              AND o.status = 'unassigned'
+        '''
+        orders.extend(execute_fetchall(query, alias_platform_ids, using=alias))
+    return _with_status_display(newest_first(orders))
 
 
 def _get_accepted_order_groups(rider_id):
@@ -136,18 +120,19 @@ def _get_accepted_order_groups(rider_id):
                o.status,
                o.created_at,
                o.merchant_id,
-               m.merchant_name,
+               o.merchant_name,
                o.customer_id,
-               c.customer_name
+               o.customer_name,
+               o.meal_summary,
+               o.item_count
         FROM {ORDER_TABLE} o
-        JOIN merchant m ON o.merchant_id = m.id
-        JOIN customer c ON o.customer_id = c.id
         WHERE o.rider_id = %s
           AND o.status IN ('assigned', 'ready')
-        ORDER BY o.created_at DESC
     '''
-    orders = execute_fetchall(query, [rider_id])
-    return _attach_meal_summaries(orders)
+    orders = []
+    for alias in order_databases():
+        orders.extend(execute_fetchall(query, [rider_id], using=alias))
+    return _with_status_display(newest_first(orders))
 
 
 @login_required
@@ -157,7 +142,7 @@ def apply_platform(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        rider = _get_rider(request.user)
+        rider = _get_rider(request)
         if _has_sign_request(rider['id']):
             return JsonResponse({'success': False, 'message': '您已经申请或签约了平台，不能再次申请'})
 
@@ -187,7 +172,7 @@ def accept_orders(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        rider = _get_rider(request.user)
+        rider = _get_rider(request)
         signed_platform_ids = _get_signed_platform_ids(rider['id'])
         if not signed_platform_ids:
             return JsonResponse({'success': False, 'message': '您尚未签约任何平台，无法接单'})
@@ -203,7 +188,7 @@ def accept_orders(request):
 
         placeholders = _build_in_clause(signed_platform_ids)
         query = f'''
-            SELECT id
+            SELECT id, platform_id, merchant_id, customer_id, rider_id, status, created_at
             FROM {ORDER_TABLE}
             WHERE id = %s
               AND platform_id IN ({placeholders})
@@ -211,19 +196,32 @@ def accept_orders(request):
               AND status = 'unassigned'
         '''
         params = [order_id_int, *signed_platform_ids]
-        order = execute_fetchone(query, params)
+        order_db = db_for_order(order_id_int)
+        order = execute_fetchone(query, params, using=order_db)
         if not order:
             return JsonResponse({'success': False, 'message': '没有找到对应的订单'})
 
-        execute_non_query(
-            f'''
-            UPDATE {ORDER_TABLE}
-            SET rider_id = %s,
-                status = 'assigned'
-            WHERE id = %s
-            ''',
-            [rider['id'], order_id_int],
-        )
+        # 多个骑手可能同时抢同一单：只有仍未被接走时才更新，计数与时效分布随之在同一事务中调整
+        now = timezone.now()
+        with transaction.atomic(using=order_db):
+            claimed = execute_non_query(
+                f'''
+                UPDATE {ORDER_TABLE}
+                SET rider_id = %s,
+                    status = 'assigned',
+                    assigned_at = %s,
+                    updated_at = %s
+                WHERE id = %s AND rider_id IS NULL AND status = 'unassigned'
+                ''',
+                [rider['id'], now, now, order_id_int],
+                using=order_db,
+            )
+            if not claimed:
+                return JsonResponse({'success': False, 'message': '没有找到对应的订单'})
+            assigned = {**order, 'rider_id': rider['id'], 'status': 'assigned'}
+            record_transition(order, assigned, using=order_db)
+            record_latency(order['platform_id'], 'assign', order['created_at'], now, using=order_db)
+            publish_order_event('assigned', order_id_int, assigned, using=order_db)
         return JsonResponse({'success': True, 'message': '成功接取订单'})
     except ValueError:
         return JsonResponse({'success': False, 'message': '骑手信息不存在'})
@@ -238,7 +236,7 @@ def cancel_orders(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        rider = _get_rider(request.user)
+        rider = _get_rider(request)
         order_id = request.POST.get('order_id')
         if not order_id:
             return JsonResponse({'success': False, 'message': '订单ID不能为空'})
@@ -248,28 +246,44 @@ def cancel_orders(request):
         except (TypeError, ValueError):
             return JsonResponse({'success': False, 'message': '订单ID无效'})
 
+        order_db = db_for_order(order_id_int)
         order = execute_fetchone(
             f'''
-            SELECT id
+            SELECT id, platform_id, merchant_id, customer_id, rider_id, status, created_at, assigned_at, ready_at
             FROM {ORDER_TABLE}
             WHERE rider_id = %s
               AND status IN ('assigned', 'ready')
               AND id = %s
             ''',
             [rider['id'], order_id_int],
+            using=order_db,
         )
         if not order:
             return JsonResponse({'success': False, 'message': '没有找到对应的订单'})
 
-        execute_non_query(
-            f'''
-            UPDATE {ORDER_TABLE}
-            SET rider_id = NULL,
-                status = 'unassigned'
-            WHERE id = %s
-            ''',
-            [order_id_int],
-        )
+        with transaction.atomic(using=order_db):
+            released = execute_non_query(
+                f'''
+                UPDATE {ORDER_TABLE}
+                SET rider_id = NULL,
+                    status = 'unassigned',
+                    assigned_at = NULL,
+                    ready_at = NULL,
+                    updated_at = %s
+                WHERE id = %s AND rider_id = %s AND status = %s
+                ''',
+                [timezone.now(), order_id_int, rider['id'], order['status']],
+                using=order_db,
+            )
+            if not released:
+                return JsonResponse({'success': False, 'message': '没有找到对应的订单'})
+            released = {**order, 'rider_id': None, 'status': 'unassigned'}
+            record_transition(order, released, using=order_db)
+            record_latency(order['platform_id'], 'assign', order['created_at'], order['assigned_at'],
+                           using=order_db, delta=-1)
+            record_latency(order['platform_id'], 'ready', order['created_at'], order['ready_at'],
+                           using=order_db, delta=-1)
+            publish_order_event('released', order_id_int, released, using=order_db)
         return JsonResponse({'success': True, 'message': '成功取消订单'})
     except ValueError:
         return JsonResponse({'success': False, 'message': '骑手信息不存在'})
@@ -284,7 +298,7 @@ def complete_orders(request):
         return JsonResponse({'success': False, 'message': '无效的请求方法'})
 
     try:
-        rider = _get_rider(request.user)
+        rider = _get_rider(request)
         order_id = request.POST.get('order_id')
         if not order_id:
             return JsonResponse({'success': False, 'message': '订单ID不能为空'})
@@ -294,27 +308,41 @@ def complete_orders(request):
         except (TypeError, ValueError):
             return JsonResponse({'success': False, 'message': '订单ID无效'})
 
+        order_db = db_for_order(order_id_int)
         order = execute_fetchone(
             f'''
-            SELECT id
+            SELECT id, platform_id, merchant_id, customer_id, rider_id, status, created_at
             FROM {ORDER_TABLE}
             WHERE rider_id = %s
               AND status IN ('assigned', 'ready')
               AND id = %s
             ''',
             [rider['id'], order_id_int],
+            using=order_db,
         )
         if not order:
             return JsonResponse({'success': False, 'message': '没有找到对应的订单'})
 
-        execute_non_query(
-            f'''
-            UPDATE {ORDER_TABLE}
-            SET status = 'ready'
-            WHERE id = %s
-            ''',
-            [order_id_int],
-        )
+        # 已送达的订单再次提交时保留第一次的送达时间，也不重复计入时效分布
+        now = timezone.now()
+        with transaction.atomic(using=order_db):
+            delivered = execute_non_query(
+                f'''
+                UPDATE {ORDER_TABLE}
+                SET status = 'ready',
+                    ready_at = COALESCE(ready_at, %s),
+                    updated_at = %s
+                WHERE id = %s AND rider_id = %s AND status = %s
+                ''',
+                [now, now, order_id_int, rider['id'], order['status']],
+                using=order_db,
+            )
+            if not delivered:
+                return JsonResponse({'success': False, 'message': '没有找到对应的订单'})
+            record_transition(order, {**order, 'status': 'ready'}, using=order_db)
+            if order['status'] == 'assigned':
+                record_latency(order['platform_id'], 'ready', order['created_at'], now, using=order_db)
+                publish_order_event('ready', order_id_int, {**order, 'status': 'ready'}, using=order_db)
         return JsonResponse({'success': True, 'message': '订单状态已更新为待取餐'})
     except ValueError:
         return JsonResponse({'success': False, 'message': '骑手信息不存在'})
@@ -322,12 +350,27 @@ def complete_orders(request):
         return JsonResponse({'success': False, 'message': f'完成订单失败: {str(exc)}'})
 
 
+@login_required
+async def order_events(request):
+    """
+    签约平台待接订单的实时推送（SSE，见 Project/live.py）：新订单与被放弃的订单推送 available，
+    被接走或删除的订单推送 taken。连接期间不查询数据库，签约平台变化后需重新连接。
+    """
+    try:
+        rider = await _aget_rider(request)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': '骑手信息不存在'})
+    platform_ids = await run_in_db_thread(_get_signed_platform_ids, rider['id'])
+    return event_stream_response(request, [platform_channel(platform_id) for platform_id in platform_ids],
+                                 f'rider:{rider["id"]}')
+
+
 @login_required
 def rider(request):
     rider_name = request.session.get('rider_name', request.user.username)
 
     try:
-        current_rider = _get_rider(request.user)
+        current_rider = _get_rider(request)
         platform_query = f'SELECT id, platform_name, phone FROM {PLATFORM_TABLE} ORDER BY platform_name'
         all_platforms = execute_fetchall(platform_query)
         signed_platforms = _get_platforms_by_status(current_rider['id'], 'approved')